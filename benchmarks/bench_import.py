@@ -0,0 +1,69 @@
+"""
+Cold import time of the parser modules, from the cumulative times that python -X importtime reports in a fresh
+interpreter, with the imports that cost the most. Exits with 1 when a module takes longer than the budget or pulls
+in Scrapy, Twisted, parsel or lxml, so it can guard the budget in CI.
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --budget 20 parser.item_parser parser.peg
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+modules = ['parser.item_parser', 'parser.string_parser', 'parser.ebnf_parser', 'parser.peg', 'parser.artifact']
+
+# what the parser must not need, the crawler brings them
+forbidden = ['scrapy', 'twisted', 'parsel', 'lxml']
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module: str) -> dict[str, int]:
+    """
+    Cumulative microseconds of the module and of every module it imports, in a fresh interpreter. Modules that the
+    interpreter imports at startup, such as those of .pth files, are left out.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=root,
+                            capture_output=True, text=True, check=True)
+    lines = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # nested imports are indented by two more spaces and reported before the module importing them
+        lines.append((len(name) - len(name.lstrip()), name.strip(), int(cumulative)))
+    end = max(i for i, (_, name, _) in enumerate(lines) if name == module)
+    depth = lines[end][0]
+    start = end
+    while start > 0 and lines[start - 1][0] > depth:
+        start -= 1
+    return {name: cumulative for _, name, cumulative in lines[start:end + 1]}
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('modules', nargs='*', default=modules, metavar='MODULE')
+    arg_parser.add_argument('--budget', type=float, default=50, help='ms per module (default: %(default)s)')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='the fastest of this many runs counts')
+    arg_parser.add_argument('--top', type=int, default=5, help='slowest imports to list per module')
+    args = arg_parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        times = min(runs, key=lambda run: run[module])
+        milliseconds = times[module] / 1e3
+        pulled = sorted({name.partition('.')[0] for name in times} & set(forbidden))
+        over = milliseconds > args.budget
+        failed |= over or bool(pulled)
+        print(f'{module}: {milliseconds:.1f} ms, {len(times)} modules' + (' OVER BUDGET' if over else ''))
+        for name in sorted(times, key=times.get, reverse=True)[1:args.top + 1]:
+            print(f'    {name}: {times[name] / 1e3:.1f} ms')
+        if pulled:
+            print(f'    imports {", ".join(pulled)}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,69 @@
+"""
+Throughput of the Swift lexer generated from the lexical structure of the grammar, in MB/s over a corpus of
+Swift files. The lexer is generated from the grammar summary fixture unless one is given.
+
+    python -m benchmarks.bench_lexer
+    python -m benchmarks.bench_lexer --corpus ~/src/swift-algorithms --size 20
+"""
+import argparse
+import glob
+import io
+import os
+import tempfile
+import timeit
+from contextlib import redirect_stdout
+
+from benchmarks.fixtures import load_page
+from swift_syntax.lexer import load_lexer
+from swift_syntax.offline import convert, get_settings
+from swift_syntax.pipelines import SwiftSyntaxPipeline
+
+corpus_dir = os.path.join(os.path.dirname(__file__), 'corpus')
+
+
+def generate_lexer(directory: str) -> str:
+    path = os.path.join(directory, 'swift_lexer.py')
+    settings = get_settings()
+    settings.set('GRAMMAR_DIR', os.path.join(directory, 'grammar'))
+    settings.set('GRAMMAR_LEXER_MODULE', path)
+    with redirect_stdout(io.StringIO()):
+        convert(load_page(), SwiftSyntaxPipeline.from_settings(settings))
+    return path
+
+
+def load_corpus(directory: str) -> list[str]:
+    sources = []
+    for path in sorted(glob.glob(os.path.join(directory, '**', '*.swift'), recursive=True)):
+        with open(path, encoding='utf-8') as f:
+            sources.append(f.read())
+    return sources
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--corpus', default=corpus_dir, help='directory searched for .swift files')
+    arg_parser.add_argument('--lexer', help='a generated lexer module instead of generating one')
+    arg_parser.add_argument('--size', type=float, default=1.0, help='MB of source per round, the corpus is repeated')
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        lexer = load_lexer(args.lexer or generate_lexer(directory))
+
+    sources = load_corpus(args.corpus)
+    if not sources:
+        arg_parser.error(f'no .swift files in {args.corpus}')
+    source = '\n'.join(sources)
+    source = source * max(1, round(args.size * 1e6 / len(source.encode('utf-8'))))
+    size = len(source.encode('utf-8'))
+
+    tokens = sum(1 for _ in lexer.tokenize(source, skip=()))
+    seconds = min(timeit.repeat(lambda: sum(1 for _ in lexer.tokenize(source, skip=())), number=1,
+                                repeat=args.repeat))
+    print(f'{len(sources)} files, {size / 1e6:.2f} MB, {tokens} tokens')
+    print(f'{size / 1e6 / seconds:.2f} MB/s, {tokens / seconds / 1e6:.2f} M tokens/s ({seconds * 1e3:.1f} ms)')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
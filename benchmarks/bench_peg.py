@@ -0,0 +1,62 @@
+"""
+Parse time of one Swift file with and without the packrat memo, and the latency of an edit parsed incrementally
+against parsing the whole file again. The grammar is generated from the grammar summary fixture and the source is
+synthetic, unless a grammar and a .swift file are given.
+
+    python -m benchmarks.bench_peg
+    python -m benchmarks.bench_peg --grammar grammar/index.ebnf --source Sources/App/Model.swift
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+from benchmarks.bench_service import generate_grammar, synthetic_source
+from parser.peg import IncrementalParser
+from swift_syntax.service import load_parser, recursion_limit, start_rules
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--grammar', help='index.ebnf of a generated grammar instead of generating one')
+    arg_parser.add_argument('--source', help='a .swift file instead of a synthetic one')
+    arg_parser.add_argument('--lines', type=int, default=2000, help='lines of the synthetic source')
+    arg_parser.add_argument('--item', default='statement', help='rule of the top-level items (default: %(default)s)')
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args(argv)
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), recursion_limit))
+
+    with tempfile.TemporaryDirectory() as directory:
+        grammar = args.grammar or generate_grammar(os.path.join(directory, 'grammar'))
+        memoized = load_parser(grammar)
+        plain = load_parser(grammar, memo_size=0)
+    if args.source:
+        with open(args.source, encoding='utf-8') as f:
+            source = f.read()
+    else:
+        source = synthetic_source(random.Random(0), args.lines)
+    start = next(name for name in start_rules if name in memoized.rules)
+    print(f'{len(source.encode("utf-8")) / 1e3:.1f} kB, {source.count(chr(10))} lines')
+
+    for name, parser in [('without memo', plain), ('with memo', memoized)]:
+        seconds = min(timeit.repeat(lambda: parser.parse(source, start), number=1, repeat=args.repeat))
+        print(f'full parse {name}: {seconds * 1e3:.1f} ms')
+
+    document = IncrementalParser(memoized, args.item)
+    document.parse(source)
+    # types a character into the middle of the file and deletes it again
+    middle = document.spans[len(document.spans) // 2][1]
+
+    def edit():
+        document.edit(middle, middle, ' ')
+        document.edit(middle, middle + 1, '')
+
+    seconds = min(timeit.repeat(edit, number=1, repeat=args.repeat)) / 2
+    print(f'incremental edit: {seconds * 1e3:.2f} ms ({len(document.spans)} top-level items)')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
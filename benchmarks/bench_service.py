@@ -0,0 +1,101 @@
+"""
+Throughput of the parse service in files/s, MB/s and lines/s, with one worker and with a pool. The grammar is
+generated from the grammar summary fixture and the corpus is synthetic source it accepts, unless a grammar and a
+directory of .swift files are given.
+
+    python -m benchmarks.bench_service
+    python -m benchmarks.bench_service --grammar grammar/index.ebnf --corpus ~/src/swift-algorithms -j 8
+"""
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from benchmarks.fixtures import load_page
+from swift_syntax.offline import convert, get_settings
+from swift_syntax.pipelines import SwiftSyntaxPipeline
+from swift_syntax.service import find_sources, parse_files
+
+
+def generate_grammar(directory: str) -> str:
+    settings = get_settings()
+    settings.set('GRAMMAR_DIR', directory)
+    with redirect_stdout(io.StringIO()):
+        convert(load_page(), SwiftSyntaxPipeline.from_settings(settings))
+    return os.path.join(directory, 'index.ebnf')
+
+
+def expression(rng: random.Random, depth: int = 0) -> str:
+    if depth < 3 and rng.random() < 0.3:
+        return f'({expression(rng, depth + 1)})'
+    terms = [rng.choice(['value', 'count', '42', '0x1F', '"text"', 'true', 'nil', '-index'])
+             for _ in range(rng.randint(1, 4))]
+    return terms[0] + ''.join(f' {rng.choice(["+", "-", "*", "/", "=="])} {term}' for term in terms[1:])
+
+
+def synthetic_source(rng: random.Random, lines: int) -> str:
+    statements = []
+    for i in range(lines):
+        match rng.randrange(4):
+            case 0:
+                statements.append(f'let name{i}: [Int] = {expression(rng)}')
+            case 1:
+                statements.append(f'var name{i} = {expression(rng)}; // note')
+            case 2:
+                statements.append(f'/* step {i} */ name{i} == {expression(rng)}')
+            case _:
+                statements.append(expression(rng))
+    return '\n'.join(statements) + '\n'
+
+
+def write_corpus(directory: str, files: int, lines: int) -> str:
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(0)
+    for i in range(files):
+        with open(os.path.join(directory, f'Source{i}.swift'), 'w', encoding='utf-8') as f:
+            f.write(synthetic_source(rng, lines))
+    return directory
+
+
+def measure(paths: list[str], grammar: str, workers: int) -> tuple[float, list[dict]]:
+    started = time.perf_counter()
+    records = list(parse_files(paths, grammar, workers=workers))
+    return time.perf_counter() - started, records
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--grammar', help='index.ebnf of a generated grammar instead of generating one')
+    arg_parser.add_argument('--corpus', help='directory searched for .swift files instead of a synthetic corpus')
+    arg_parser.add_argument('--files', type=int, default=200, help='files of the synthetic corpus')
+    arg_parser.add_argument('--lines', type=int, default=200, help='lines per file of the synthetic corpus')
+    arg_parser.add_argument('-j', '--workers', type=int, default=os.cpu_count())
+    args = arg_parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        grammar = args.grammar or generate_grammar(os.path.join(directory, 'grammar'))
+        if args.corpus:
+            corpus = args.corpus
+        else:
+            corpus = write_corpus(os.path.join(directory, 'corpus'), args.files, args.lines)
+        paths = list(find_sources([corpus]))
+        if not paths:
+            arg_parser.error(f'no .swift files in {corpus}')
+
+        for workers in sorted({1, args.workers}):
+            seconds, records = measure(paths, grammar, workers)
+            size = sum(record['bytes'] for record in records)
+            lines = sum(record['lines'] for record in records)
+            failed = sum(not record['ok'] for record in records)
+            print(f'{workers} workers: {len(records)} files ({failed} failed), {size / 1e6:.2f} MB, {lines} lines '
+                  f'in {seconds:.2f} s')
+            print(f'  {len(records) / seconds:.1f} files/s, {size / 1e6 / seconds:.3f} MB/s, '
+                  f'{lines / seconds:.0f} lines/s')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,36 @@
+"""
+Micro-benchmark for the prose parser.
+
+Compares the table-driven LL(1) engine against the recursive descent parser it replaced, on every prose string of
+the grammar summary page, of the page scaled 10x and on very long prose. The trees of both engines are checked to be
+the same first.
+
+    python -m benchmarks.bench_string_parser
+"""
+import timeit
+
+from benchmarks.fixtures import load_page, long_prose, prose_strings, scale_page, syntax_defs
+from parser.string_parser import StringParser
+from tests.reference_string_parser import RecursiveStringParser, parse_all
+
+
+def inputs():
+    html = load_page()
+    yield 'page', prose_strings(syntax_defs(html))
+    yield 'page 10x', prose_strings(syntax_defs(scale_page(html, 10)))
+    yield 'long', long_prose(2000)
+
+
+def main():
+    print(f'{"input":>10} {"strings":>8} {"recursive":>12} {"table":>12} {"speedup":>8}')
+    for name, strings in inputs():
+        assert parse_all(RecursiveStringParser, strings) == parse_all(StringParser, strings)
+        number = 3 if name == 'long' else 20
+        recursive = min(timeit.repeat(lambda: parse_all(RecursiveStringParser, strings), number=number, repeat=5))
+        table = min(timeit.repeat(lambda: parse_all(StringParser, strings), number=number, repeat=5))
+        print(f'{name:>10} {len(strings):>8} {recursive / number * 1e3:>9.3f} ms {table / number * 1e3:>9.3f} ms '
+              f'{recursive / table:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Micro-benchmark for the string tokenizer.
+
+Compares the single-pass master regex engine against the previous engine, which
+sliced the remaining input and tried every spec pattern for each token.
+
+    python -m benchmarks.bench_string_tokenizer
+"""
+import re
+import sys
+import timeit
+
+from parser.string_tokenizer import StringTokenizer, spec
+from parser.token import Token
+
+samples = [
+    'U+0000, U+000B, or U+000C',
+    'Any Unicode scalar value except U+000A or U+000D',
+    'Digit 0 through 9, a through f, or A through F',
+    'Between one and eight hexadecimal digits',
+    'Upper- or lowercase letter A through Z',
+    'Any identifier, keyword, literal, or operator',
+]
+
+
+class SlicingStringTokenizer:
+    """The previous engine, kept as a reference for speed and output."""
+
+    def __init__(self, string: str):
+        self._string = string
+        self._cursor = 0
+
+    def has_more_tokens(self) -> bool:
+        return self._cursor < len(self._string)
+
+    def get_next_token(self) -> Token or None:
+        if not self.has_more_tokens():
+            return None
+        string = self._string[self._cursor:]
+        for regexp, token_type in spec:
+            matched = re.match(regexp, string, re.I)
+            if not matched:
+                continue
+            self._cursor += len(matched.group(0))
+            if token_type is None:
+                return self.get_next_token()
+            return Token(token_type, matched.group(0))
+        raise SyntaxError(f'Unexpected token: "{string[0]}"')
+
+
+def tokenize(tokenizer_class, string) -> list[Token]:
+    tokenizer = tokenizer_class(string)
+    tokens = []
+    token = tokenizer.get_next_token()
+    while token is not None:
+        tokens.append(token)
+        token = tokenizer.get_next_token()
+    return tokens
+
+
+def long_input(repeat: int) -> str:
+    return ' followed by '.join(samples[i % len(samples)] for i in range(repeat))
+
+
+def main():
+    sys.setrecursionlimit(100000)
+    print(f'{"input":>12} {"slicing":>12} {"master":>12} {"speedup":>8}')
+    for repeat in (1, 10, 100, 1000):
+        string = long_input(repeat)
+        assert tokenize(SlicingStringTokenizer, string) == tokenize(StringTokenizer, string)
+        number = max(1, 1000 // repeat)
+        slicing = min(timeit.repeat(lambda: tokenize(SlicingStringTokenizer, string), number=number, repeat=3))
+        master = min(timeit.repeat(lambda: tokenize(StringTokenizer, string), number=number, repeat=3))
+        print(f'{len(string):>10} ch {slicing / number * 1e3:>9.3f} ms {master / number * 1e3:>9.3f} ms '
+              f'{slicing / master:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+// An inventory model with some control flow, closures and optionals.
+
+enum Category: String, CaseIterable {
+    case tools
+    case food = "groceries"
+    case toys
+}
+
+struct Item {
+    let id: Int
+    var title: String
+    var price: Double
+    var quantity: Int = 1
+    var category: Category?
+}
+
+final class Inventory {
+    private var items: [Int: Item] = [:]
+    private var nextID = 1
+
+    @discardableResult
+    func insert(title: String, price: Double, category: Category? = nil) -> Item {
+        let item = Item(id: nextID, title: title, price: price, category: category)
+        items[item.id] = item
+        nextID += 1
+        return item
+    }
+
+    func remove(id: Int) -> Item? {
+        return items.removeValue(forKey: id)
+    }
+
+    var total: Double {
+        items.values.reduce(0) { sum, item in
+            sum + item.price * Double(item.quantity)
+        }
+    }
+
+    func cheapest(in category: Category) -> Item? {
+        items.values
+            .filter { $0.category == category }
+            .min { a, b in a.price < b.price }
+    }
+
+    func restock(_ id: Int, by amount: Int) throws {
+        guard var item = items[id] else {
+            throw InventoryError.missing(id)
+        }
+        switch amount {
+        case ..<0:
+            throw InventoryError.negative
+        case 0:
+            return
+        default:
+            item.quantity += amount
+        }
+        items[id] = item
+    }
+
+    func report() -> [String] {
+        var lines = [String]()
+        for (id, item) in items.sorted(by: { $0.key < $1.key }) {
+            let label = item.category?.rawValue ?? "none"
+            lines.append(String(id) + ": " + item.title + " (" + label + ")")
+        }
+        return lines
+    }
+}
+
+enum InventoryError: Error {
+    case missing(Int)
+    case negative
+}
+
+let inventory = Inventory()
+inventory.insert(title: "Hammer", price: 12.5, category: .tools)
+inventory.insert(title: "Apple", price: 0.45, category: .food)
+inventory.insert(title: "Kite", price: 7, category: .toys)
+try? inventory.restock(2, by: 10)
+let empty = inventory.cheapest(in: .tools) == nil
+print(inventory.total, empty, "tab\tand quote\"")
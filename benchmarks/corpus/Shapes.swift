@@ -0,0 +1,89 @@
+// A small geometry module used as lexer benchmark input.
+
+import Foundation
+
+/// A point in two dimensional space.
+public struct Point: Equatable, Hashable {
+    public var x: Double
+    public var y: Double
+
+    public init(x: Double, y: Double) {
+        self.x = x
+        self.y = y
+    }
+
+    public static let zero = Point(x: 0, y: 0)
+
+    public func distance(to other: Point) -> Double {
+        let dx = other.x - x
+        let dy = other.y - y
+        return (dx * dx + dy * dy).squareRoot()
+    }
+}
+
+public protocol Shape {
+    var name: String { get }
+    var area: Double { get }
+    func contains(_ point: Point) -> Bool
+}
+
+public struct Circle: Shape {
+    public let center: Point
+    public let radius: Double
+
+    public var name: String { "circle" }
+
+    public var area: Double {
+        return Double.pi * radius * radius
+    }
+
+    public func contains(_ point: Point) -> Bool {
+        center.distance(to: point) <= radius
+    }
+}
+
+public struct Rectangle: Shape {
+    public let origin: Point
+    public let width: Double
+    public let height: Double
+
+    public var name: String { "rectangle" }
+    public var area: Double { width * height }
+
+    public func contains(_ point: Point) -> Bool {
+        guard point.x >= origin.x, point.y >= origin.y else {
+            return false
+        }
+        return point.x <= origin.x + width && point.y <= origin.y + height
+    }
+}
+
+/* Shapes are grouped into layers.
+   /* Layers may be nested, like comments. */
+*/
+public final class Layer {
+    private(set) var shapes: [Shape] = []
+    weak var parent: Layer?
+    var isHidden = false
+    let mask = 0xFF_FF
+    let flags = 0b1010
+
+    func add(_ shape: Shape) {
+        shapes.append(shape)
+    }
+
+    func totalArea() -> Double {
+        shapes.map { $0.area }.reduce(0, +)
+    }
+
+    func hit(_ point: Point) -> [String] {
+        if isHidden {
+            return []
+        }
+        var names: [String] = []
+        for shape in shapes where shape.contains(point) {
+            names.append(shape.name)
+        }
+        return names
+    }
+}
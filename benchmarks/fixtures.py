@@ -0,0 +1,61 @@
+"""
+Inputs for the benchmarks: the checked-in grammar summary page and synthetically scaled variants of it.
+"""
+import os
+import re
+
+from scrapy import Selector
+
+from parser.item_tokenizer import Tokenizer
+from swift_syntax.spiders.swift import SwiftSpider
+
+page = os.path.join(os.path.dirname(__file__), os.pardir, 'tests', 'fixtures', 'zzSummaryOfTheGrammar.html')
+
+
+def load_page() -> str:
+    with open(page, encoding='utf-8') as f:
+        return f.read()
+
+
+def scale_page(html: str, factor: int) -> str:
+    """
+    Repeats every syntax-def paragraph `factor` times, renaming the copies so that every definition stays unique.
+    """
+    if factor == 1:
+        return html
+
+    def repeat(match):
+        paragraph = match.group(0)
+        copies = [paragraph]
+        for i in range(1, factor):
+            copies.append(re.sub(r'(<span class="syntax-def-name"><a id="[^"]*"></a>)([^<]+)',
+                                 lambda m: f'{m.group(1)}{m.group(2)}-{i}', paragraph, count=1))
+        return '\n'.join(copies)
+
+    return re.sub(r'<p class="syntax-def">.*?</p>', repeat, html, flags=re.S)
+
+
+def syntax_defs(html: str) -> list:
+    selector = Selector(text=html)
+    return [SwiftSpider.parse_syntax_def(node) for node in selector.css('p.syntax-def')]
+
+
+def prose_strings(defs: list) -> list[str]:
+    strings = []
+    for items in defs:
+        tokenizer = Tokenizer(items)
+        while tokenizer.has_more_tokens():
+            token = tokenizer.get_next_token()
+            if token.type == 'STRING':
+                strings.append(token.value)
+    return strings
+
+
+def long_prose(count: int) -> list[str]:
+    """
+    Prose definitions far longer than any on the real page.
+    """
+    unicode_list = ', '.join(f'U+{i:04X}' for i in range(count)) + f', or U+{count:04X}'
+    ranges = ', '.join(f'U+{i * 2:04X}–U+{i * 2 + 1:04X}' for i in range(count)) + ', or U+FFFF'
+    sequence = ' followed by '.join(f'U+{i:04X}' for i in range(count))
+    return [unicode_list, ranges, sequence]
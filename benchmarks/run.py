@@ -0,0 +1,229 @@
+"""
+Benchmark suite for the tokenizers, the parsers and the whole conversion.
+
+Every stage is measured on the grammar summary fixture and on variants with 10x and 100x as many
+definitions, plus very long prose strings. Results can be written to JSON and compared with the
+results of another commit:
+
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --output after.json --compare before.json
+"""
+import argparse
+import io
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+from contextlib import redirect_stdout
+
+from scrapy import Selector
+
+from benchmarks.fixtures import load_page, long_prose, prose_strings, scale_page, syntax_defs
+from parser.artifact import GrammarArtifact
+from parser.ebnf_parser import read_grammar
+from parser.item_parser import Parser
+from parser.item_tokenizer import Tokenizer
+from parser.nodes import Prose
+from parser.optimizer import optimize_grammar
+from parser.string_parser import StringParser
+from parser.string_tokenizer import StringTokenizer
+from swift_syntax import compiler
+from swift_syntax.offline import convert, get_settings
+from swift_syntax.pipelines import artifact_filename, SwiftSyntaxPipeline
+from swift_syntax.spiders.swift import SwiftSpider
+
+scales = [1, 10, 100]
+
+
+def tokenize_strings(strings):
+    for string in strings:
+        tokenizer = StringTokenizer(string)
+        while tokenizer.get_next_token() is not None:
+            pass
+
+
+def parse_strings(strings):
+    for string in strings:
+        try:
+            StringParser().parse(string)
+        except SyntaxError:
+            pass
+
+
+def parse_string_batch(strings):
+    for _ in StringParser().parse_many(strings, fallback=Prose):
+        pass
+
+
+def tokenize_defs(defs):
+    for items in defs:
+        tokenizer = Tokenizer(items)
+        while tokenizer.has_more_tokens():
+            tokenizer.get_next_token()
+
+
+def parse_defs(defs):
+    for items in defs:
+        Parser().parse(items)
+
+
+def parse_def_batch(defs):
+    for _ in Parser().parse_many(defs):
+        pass
+
+
+def extract_defs(nodes):
+    for node in nodes:
+        SwiftSpider.parse_syntax_def(node)
+
+
+def run_pipeline(html):
+    with tempfile.TemporaryDirectory() as output:
+        settings = get_settings()
+        settings.set('GRAMMAR_DIR', output)
+        with redirect_stdout(io.StringIO()):
+            convert(html, SwiftSyntaxPipeline.from_settings(settings))
+
+
+def parser_startup(defs):
+    """
+    Compiling the grammar with TatSu against loading the model compiled at build time.
+    """
+    rules, report = optimize_grammar([Parser().parse_tree(items) for items in defs])
+    grammar = compiler.tatsu_grammar(rules, 'Swift', report.undefined_rules)
+    directory = tempfile.TemporaryDirectory()
+    path = compiler.compile_parser(grammar, os.path.join(directory.name, 'swift_parser.py'))
+    # tatsu.compile() caches models by name and grammar, a new name makes it compile again
+    names = (f'Swift{idx}' for idx in itertools.count())
+    yield 'parser_startup', 'compile', len(rules), lambda: compiler.tatsu.compile(grammar, name=next(names))
+    # the directory is removed once the lambda holding it is gone
+    yield 'parser_startup', 'load_model', len(rules), lambda d=directory: compiler.load_model(path)
+
+
+def grammar_startup(html):
+    """
+    Reading the EBNF files of the grammar against memory-mapping the binary artifact, all of it or a single rule.
+    """
+    directory = tempfile.TemporaryDirectory()
+    settings = get_settings()
+    settings.set('GRAMMAR_DIR', directory.name)
+    settings.set('GRAMMAR_ARTIFACT', True)
+    with redirect_stdout(io.StringIO()):
+        convert(html, SwiftSyntaxPipeline.from_settings(settings))
+    index = os.path.join(directory.name, 'index.ebnf')
+    path = os.path.join(directory.name, artifact_filename)
+
+    def load_rules():
+        with GrammarArtifact(path) as grammar:
+            return grammar.rules()
+
+    def load_rule():
+        with GrammarArtifact(path) as grammar:
+            return grammar['type']
+
+    rules = len(read_grammar(index))
+    # the directory is removed once the lambdas holding it are gone
+    yield 'grammar_startup', 'ebnf', rules, lambda d=directory: read_grammar(index)
+    yield 'grammar_startup', 'artifact', rules, lambda d=directory: load_rules()
+    yield 'grammar_startup', 'artifact_rule', 1, lambda d=directory: load_rule()
+
+
+def cases():
+    html = load_page()
+    for scale in scales:
+        scaled = scale_page(html, scale)
+        defs = syntax_defs(scaled)
+        strings = prose_strings(defs)
+        nodes = Selector(text=scaled).css('p.syntax-def')
+        yield 'syntax_def_extraction', f'{scale}x', len(nodes), lambda n=nodes: extract_defs(n)
+        yield 'string_tokenizer', f'{scale}x', len(strings), lambda s=strings: tokenize_strings(s)
+        yield 'string_parser', f'{scale}x', len(strings), lambda s=strings: parse_strings(s)
+        yield 'string_parser_batch', f'{scale}x', len(strings), lambda s=strings: parse_string_batch(s)
+        yield 'item_tokenizer', f'{scale}x', len(defs), lambda d=defs: tokenize_defs(d)
+        yield 'item_parser', f'{scale}x', len(defs), lambda d=defs: parse_defs(d)
+        yield 'item_parser_batch', f'{scale}x', len(defs), lambda d=defs: parse_def_batch(d)
+        yield 'pipeline', f'{scale}x', len(defs), lambda h=scaled: run_pipeline(h)
+
+    if compiler.tatsu is not None:
+        yield from parser_startup(syntax_defs(html))
+    yield from grammar_startup(scale_page(html, 10))
+
+    strings = long_prose(2000)
+    yield 'string_tokenizer', 'long', len(strings), lambda: tokenize_strings(strings)
+    yield 'string_parser', 'long', len(strings), lambda: parse_strings(strings)
+
+
+def measure(func, min_time: float, repeat: int) -> dict:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    timings = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return dict(min=min(timings), mean=sum(timings) / len(timings), rounds=repeat, number=number)
+
+
+def commit() -> str or None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+    regressions = 0
+    print(f'\n{"benchmark":<30} {"baseline":>12} {"current":>12} {"ratio":>8}')
+    for name, current in results['benchmarks'].items():
+        before = baseline['benchmarks'].get(name)
+        if before is None:
+            continue
+        ratio = current['min'] / before['min']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  slower'
+            regressions += 1
+        print(f'{name:<30} {before["min"] * 1e3:>9.3f} ms {current["min"] * 1e3:>9.3f} ms {ratio:>7.2f}x{flag}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-o', '--output', help='write the results as JSON to this file')
+    parser.add_argument('-c', '--compare', metavar='JSON', help='compare with the results of an earlier run')
+    parser.add_argument('-k', dest='filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown reported as a regression (default: %(default)s)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per round (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=5, help='rounds per benchmark (default: %(default)s)')
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+
+    results = dict(commit=commit(), python=platform.python_version(), benchmarks={})
+    print(f'{"benchmark":<30} {"items":>8} {"min":>12} {"mean":>12}')
+    for stage, variant, size, func in cases():
+        name = f'{stage}[{variant}]'
+        if args.filter not in name:
+            continue
+        result = measure(func, args.min_time, args.repeat)
+        result['items'] = size
+        results['benchmarks'][name] = result
+        print(f'{name:<30} {size:>8} {result["min"] * 1e3:>9.3f} ms {result["mean"] * 1e3:>9.3f} ms')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        return 1 if compare(results, baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
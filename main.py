@@ -1,8 +1,16 @@
 # -*- coding: utf-8 -*-
+import argparse
+
 from scrapy.crawler import CrawlerProcess
+from swift_syntax.profiling import profile
 from swift_syntax.spiders.swift import SwiftSpider
 from scrapy.utils.project import get_project_settings
 
+parser = argparse.ArgumentParser(description='Crawl the Swift grammar summary and convert it into EBNF.')
+parser.add_argument('--profile', metavar='FILE', help='dump cProfile stats of the run to FILE')
+args = parser.parse_args()
+
 process = CrawlerProcess(get_project_settings())
 process.crawl(SwiftSpider)
-process.start()
+with profile(args.profile):
+    process.start()
@@ -0,0 +1,282 @@
+"""
+A whole grammar in one compact binary file that is memory-mapped and decoded rule by rule on access.
+
+All integers are little-endian unsigned words of 16 bits, or of 32 bits when a value does not fit into 16, and
+every section starts on a 4 byte boundary:
+
+    header    magic, version, word size and the offset and size of every section below
+    strings   end offsets into the blob of the interned strings, then the UTF-8 blob itself
+    rules     name, section and code offset and length of every rule, in grammar order
+    index     rule numbers sorted by name, for a binary search
+    code      rule bodies as opcode arrays, every node is its opcode and operands followed by its children
+    ranges    first and last code point of the items of every character class, always 32-bit words
+
+Rules defined over several lines are stored as one rule with all their alternatives.
+"""
+import mmap
+import struct
+import sys
+from array import array
+
+from parser.nodes import CharClass, Choice, Concatenation, Except, Node, NonTerminal, Optional, Pattern, Prose, Rule, \
+    Sequence, Terminal
+from parser.optimizer import merge_rules, OptimizationReport
+
+magic = b'EBNFBIN\0'
+version = 1
+
+header = struct.Struct('<8sIIIIIIIIIIII')
+
+# opcodes, followed by their operands
+NONTERMINAL, TERMINAL, PATTERN, PROSE = 1, 2, 3, 4  # string
+SEQUENCE, CONCATENATION, CHOICE, GROUPED_CHOICE = 5, 6, 7, 8  # number of items
+OPTIONAL, EXCEPT = 9, 10
+CHARCLASS = 11  # unicode flag, number of items and where its items start in the ranges
+SINGLE = 0xFFFFFFFF  # last code point of an item that is a single code point
+
+leaves = {NONTERMINAL: NonTerminal, TERMINAL: Terminal, PATTERN: Pattern, PROSE: Prose}
+
+
+class Encoder:
+    def __init__(self):
+        self.strings: dict[str, int] = {}
+        self.code: list[int] = []
+        self.ranges = array('I')
+
+    def intern(self, text: str) -> int:
+        return self.strings.setdefault(text, len(self.strings))
+
+    def encode(self, node: Node):
+        code = self.code
+        match node:
+            case NonTerminal(name=name):
+                code.extend((NONTERMINAL, self.intern(name)))
+            case Terminal(value=value):
+                code.extend((TERMINAL, self.intern(value)))
+            case Pattern(source=source):
+                code.extend((PATTERN, self.intern(source)))
+            case Prose(text=text):
+                code.extend((PROSE, self.intern(text)))
+            case Sequence(items=items) | Concatenation(items=items) | Choice(items=items):
+                if isinstance(node, Choice):
+                    opcode = GROUPED_CHOICE if node.grouped else CHOICE
+                else:
+                    opcode = SEQUENCE if isinstance(node, Sequence) else CONCATENATION
+                code.extend((opcode, len(items)))
+                for item in items:
+                    self.encode(item)
+            case Optional(item=item):
+                code.append(OPTIONAL)
+                self.encode(item)
+            case Except(item=item, exception=exception):
+                code.append(EXCEPT)
+                self.encode(item)
+                self.encode(exception)
+            case CharClass(items=items, unicode=unicode):
+                code.extend((CHARCLASS, int(unicode), len(items), len(self.ranges) // 2))
+                for item in items:
+                    self.ranges.extend(item if isinstance(item, tuple) else (item, SINGLE))
+            case _:
+                raise TypeError(f'Cannot encode a {node.kind} node')
+
+
+def dump_artifact(rules: list[tuple[str, Rule]]) -> bytes:
+    """
+    The artifact of the rules, each with the title of the section it is defined in.
+    """
+    sections = {}
+    for section, rule in rules:
+        sections.setdefault(rule.name, section)
+    encoder = Encoder()
+    entries = []
+    for rule in merge_rules([rule for _, rule in rules], OptimizationReport()):
+        start = len(encoder.code)
+        encoder.encode(rule.body)
+        entries.extend((encoder.intern(rule.name), encoder.intern(sections[rule.name]), start,
+                        len(encoder.code) - start))
+
+    strings = list(encoder.strings)
+    blob = bytearray()
+    ends = []
+    for text in strings:
+        blob += text.encode('utf-8')
+        ends.append(len(blob))
+    names = [strings[entries[i * 4]] for i in range(len(entries) // 4)]
+    index = sorted(range(len(names)), key=names.__getitem__)
+
+    typecode = 'H' if max(ends + entries + index + encoder.code, default=0) <= 0xFFFF else 'I'
+    sections_data = [_words(ends, typecode), bytes(blob), _words(entries, typecode), _words(index, typecode),
+                     _words(encoder.code, typecode), _words(encoder.ranges, 'I')]
+    offsets = []
+    offset = header.size
+    for i, data in enumerate(sections_data):
+        sections_data[i] += bytes(-len(data) % 4)
+        offsets.append(offset)
+        offset += len(sections_data[i])
+    strings_offset, blob_offset, rules_offset, index_offset, code_offset, ranges_offset = offsets
+    head = header.pack(magic, version, array(typecode).itemsize, len(strings), strings_offset, blob_offset,
+                       len(names), rules_offset, index_offset, code_offset, len(encoder.code), ranges_offset,
+                       len(encoder.ranges))
+    return head + b''.join(sections_data)
+
+
+def write_artifact(path: str, rules: list[tuple[str, Rule]]):
+    with open(path, 'wb') as f:
+        f.write(dump_artifact(rules))
+
+
+def is_artifact(path: str) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(magic)) == magic
+    except OSError:
+        return False
+
+
+def _words(values, typecode: str) -> bytes:
+    words = array(typecode, values)
+    if sys.byteorder == 'big':
+        words.byteswap()
+    return words.tobytes()
+
+
+class GrammarArtifact:
+    """
+    Read-only mapping from rule names to rules, backed by the memory-mapped artifact. A rule is decoded the first
+    time it is looked up, the pages of the file are shared by every process that maps it.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._mmap) < header.size:
+                raise ValueError(f'{path} is not a grammar artifact')
+            (file_magic, file_version, word_size, string_count, strings_offset, blob_offset, rule_count,
+             rules_offset, index_offset, code_offset, code_size, ranges_offset, ranges_size) \
+                = header.unpack_from(self._mmap)
+            if file_magic != magic:
+                raise ValueError(f'{path} is not a grammar artifact')
+            if file_version != version:
+                raise ValueError(f'{path} is a version {file_version} grammar artifact, expected version {version}')
+            self._view = memoryview(self._mmap)
+            typecode = 'H' if word_size == 2 else 'I'
+            self._ends = self._words(strings_offset, string_count, typecode)
+            self._blob = self._view[blob_offset:rules_offset]
+            self._entries = self._words(rules_offset, rule_count * 4, typecode)
+            self._index = self._words(index_offset, rule_count, typecode)
+            self._code = self._words(code_offset, code_size, typecode)
+            self._ranges = self._words(ranges_offset, ranges_size, 'I')
+        except Exception:
+            self.close()
+            raise
+        self._strings: dict[int, str] = {}
+        self._rules: dict[str, Rule] = {}
+
+    def _words(self, offset: int, count: int, typecode: str):
+        data = self._view[offset:offset + count * array(typecode).itemsize]
+        if sys.byteorder == 'big':
+            words = array(typecode, data)
+            words.byteswap()
+            return words
+        return data.cast(typecode)
+
+    def close(self):
+        for name in ['_ends', '_blob', '_entries', '_index', '_code', '_ranges', '_view']:
+            view = self.__dict__.pop(name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __iter__(self):
+        """
+        The rule names in grammar order.
+        """
+        return (self._string(self._entries[i * 4]) for i in range(len(self)))
+
+    def __contains__(self, name: str) -> bool:
+        return self._find(name) >= 0
+
+    def __getitem__(self, name: str) -> Rule:
+        rule = self._rules.get(name)
+        if rule is None:
+            number = self._find(name)
+            if number < 0:
+                raise KeyError(name)
+            start, length = self._entries[number * 4 + 2], self._entries[number * 4 + 3]
+            body, end = self._decode(start)
+            assert end == start + length
+            rule = self._rules[name] = Rule(name, body)
+        return rule
+
+    def get(self, name: str, default=None) -> Rule or None:
+        return self[name] if name in self else default
+
+    def rules(self) -> list[Rule]:
+        return [self[name] for name in self]
+
+    def section(self, name: str) -> str:
+        number = self._find(name)
+        if number < 0:
+            raise KeyError(name)
+        return self._string(self._entries[number * 4 + 1])
+
+    def _string(self, number: int) -> str:
+        text = self._strings.get(number)
+        if text is None:
+            start = self._ends[number - 1] if number else 0
+            text = self._strings[number] = str(self._blob[start:self._ends[number]], 'utf-8')
+        return text
+
+    def _find(self, name: str) -> int:
+        low, high = 0, len(self._index)
+        while low < high:
+            middle = (low + high) // 2
+            number = self._index[middle]
+            found = self._string(self._entries[number * 4])
+            if found == name:
+                return number
+            if found < name:
+                low = middle + 1
+            else:
+                high = middle
+        return -1
+
+    def _decode(self, pos: int) -> tuple[Node, int]:
+        code = self._code
+        opcode = code[pos]
+        if opcode in leaves:
+            return leaves[opcode](self._string(code[pos + 1])), pos + 2
+        if opcode in (SEQUENCE, CONCATENATION, CHOICE, GROUPED_CHOICE):
+            items = []
+            count, pos = code[pos + 1], pos + 2
+            for _ in range(count):
+                item, pos = self._decode(pos)
+                items.append(item)
+            if opcode == SEQUENCE:
+                return Sequence(items), pos
+            if opcode == CONCATENATION:
+                return Concatenation(items), pos
+            return Choice(items, grouped=opcode == GROUPED_CHOICE), pos
+        if opcode == OPTIONAL:
+            item, pos = self._decode(pos + 1)
+            return Optional(item), pos
+        if opcode == EXCEPT:
+            item, pos = self._decode(pos + 1)
+            exception, pos = self._decode(pos)
+            return Except(item, exception), pos
+        if opcode == CHARCLASS:
+            unicode, count, start = bool(code[pos + 1]), code[pos + 2], code[pos + 3] * 2
+            ranges = self._ranges[start:start + count * 2]
+            items = [first if last == SINGLE else (first, last) for first, last in zip(ranges[::2], ranges[1::2])]
+            return CharClass(items, unicode), pos + 4
+        raise ValueError(f'Unknown opcode {opcode} at word {pos} of the grammar artifact')
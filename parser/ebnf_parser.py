@@ -0,0 +1,156 @@
+"""
+Reads the EBNF written to the grammar directory back into grammar trees, following #include directives.
+
+Terminals are read as they were written, without escapes. Character classes and patterns both come back as
+patterns, which match the same.
+"""
+import os
+import re
+
+from parser.nodes import Choice, Concatenation, Except, Node, NonTerminal, Optional, Pattern, Prose, Rule, Sequence, \
+    Terminal
+from parser.token import Token
+
+spec = [
+    # white space, comments and directives
+    (r'\s+|\(\*.*?\*\)|@@[^\n]*', None),
+    (r'#include\s*::\s*"(?P<path>[^"]*)"', 'INCLUDE'),
+    (r'[A-Za-z_][A-Za-z0-9_]*', 'NAME'),
+    (r'"[^"]*"|\'[^\']*\'', 'STRING'),
+    (r'/(?:\\.|[^/\\\n])*/', 'PATTERN'),
+    (r'<[^>\n]*>', 'PROSE'),
+    (r'[=;|,~\[\]()]', 'PUNCTUATION'),
+]
+
+master_pattern = re.compile('|'.join(f'(?P<{token_type or "SKIP"}>{regexp})' for regexp, token_type in spec),
+                            re.S)
+
+
+def tokenize(text: str):
+    cursor = 0
+    while cursor < len(text):
+        matched = master_pattern.match(text, cursor)
+        if not matched:
+            raise SyntaxError(f'Unexpected character "{text[cursor]}" at offset {cursor}')
+        cursor = matched.end()
+        token_type = matched.lastgroup
+        if token_type == 'SKIP':
+            continue
+        if token_type == 'INCLUDE':
+            yield Token(token_type, matched.group('path'))
+        elif token_type == 'PUNCTUATION':
+            yield Token(matched.group(), matched.group())
+        else:
+            yield Token(token_type, matched.group())
+
+
+class EbnfParser:
+    def __init__(self):
+        self._tokens = iter(())
+        self._lookahead: Token or None = None
+
+    def parse(self, text: str) -> list[Rule or str]:
+        """
+        The rules of an EBNF file, with the path of every #include in its place.
+        """
+        self._tokens = tokenize(text)
+        self._lookahead = next(self._tokens, None)
+        definitions = []
+        while self._lookahead is not None:
+            if self._lookahead.type == 'INCLUDE':
+                definitions.append(self._eat('INCLUDE'))
+            else:
+                definitions.append(self.rule())
+        return definitions
+
+    def rule(self) -> Rule:
+        name = self._eat('NAME')
+        self._eat('=')
+        body = self.choice()
+        self._eat(';')
+        return Rule(name, body)
+
+    def choice(self) -> Node:
+        items = [self.concatenation()]
+        while self._lookahead_is('|'):
+            self._eat('|')
+            items.append(self.concatenation())
+        return items[0] if len(items) == 1 else Choice(items)
+
+    def concatenation(self) -> Node:
+        items = [self.sequence()]
+        while self._lookahead_is(','):
+            self._eat(',')
+            items.append(self.sequence())
+        return items[0] if len(items) == 1 else Concatenation(items)
+
+    def sequence(self) -> Node:
+        items = [self.exception()]
+        while self._lookahead_is('NAME', 'STRING', 'PATTERN', 'PROSE', '[', '('):
+            items.append(self.exception())
+        return items[0] if len(items) == 1 else Sequence(items)
+
+    def exception(self) -> Node:
+        item = self.term()
+        if self._lookahead_is('~'):
+            self._eat('~')
+            return Except(item, self.term())
+        return item
+
+    def term(self) -> Node:
+        token = self._lookahead
+        if token is None:
+            raise SyntaxError('Unexpected end of input')
+        match token.type:
+            case 'NAME':
+                return NonTerminal(self._eat('NAME'))
+            case 'STRING':
+                return Terminal(self._eat('STRING')[1:-1])
+            case 'PATTERN':
+                return Pattern(self._eat('PATTERN')[1:-1])
+            case 'PROSE':
+                return Prose(self._eat('PROSE')[1:-1])
+            case '[':
+                self._eat('[')
+                item = self.choice()
+                self._eat(']')
+                return Optional(item)
+            case '(':
+                self._eat('(')
+                item = self.choice()
+                self._eat(')')
+                return Choice(item.items, grouped=True) if isinstance(item, Choice) else item
+        raise SyntaxError(f'Unexpected token: {token.value}')
+
+    def _lookahead_is(self, *token_types) -> bool:
+        return self._lookahead is not None and self._lookahead.type in token_types
+
+    def _eat(self, token_type: str) -> str:
+        token = self._lookahead
+        if token is None:
+            raise SyntaxError(f'Unexpected end of input, expected: {token_type}')
+        if token.type != token_type:
+            raise SyntaxError(f'Unexpected token: {token.value}, expected {token_type}')
+        self._lookahead = next(self._tokens, None)
+        return token.value
+
+
+def read_grammar(path: str) -> list[tuple[str, Rule]]:
+    """
+    The rules of a grammar file and of every file it includes, in order, each with the path of its file
+    relative to the directory of the first one.
+    """
+    root = os.path.dirname(path)
+    rules = []
+
+    def read(file_path: str):
+        with open(file_path, encoding='utf-8') as f:
+            definitions = EbnfParser().parse(f.read())
+        for definition in definitions:
+            if isinstance(definition, str):
+                read(os.path.join(os.path.dirname(file_path), definition))
+            else:
+                rules.append((os.path.relpath(file_path, root), definition))
+
+    read(path)
+    return rules
@@ -0,0 +1,283 @@
+"""
+Backends turning the grammar tree from parser.nodes into an output format.
+
+Each emitter visits the tree through visit_<kind> methods.
+"""
+import re
+
+from parser.nodes import CharClass, Choice, Concatenation, Node, NonTerminal, Optional, Pattern, Sequence, Terminal, \
+    kinds, walk
+
+# a pattern that matches exactly one character: a character class, an escaped character or a plain one
+single_char_pattern = re.compile(r'\[\^?\]?(?:\\.|[^\\\]])*\]|\\U[0-9A-Fa-f]{8}|\\[^dDsSwWbBAZ0-9]'
+                                 r'|[^\\.^$*+?{}()|\[\]]')
+
+
+def unicode_escape(value: int) -> str:
+    return r"\U{0:0{1}X}".format(value, 8)
+
+
+def regex_char(value: int) -> str:
+    """
+    A code point as it can appear in a character class between the / delimiters of a pattern.
+    """
+    char = chr(value)
+    if char in '\\]^-[/':
+        return '\\' + char
+    if char.isspace() or not char.isprintable():
+        return unicode_escape(value)
+    return char
+
+
+class Emitter:
+    def emit(self, node: Node):
+        return self.visit(node)
+
+    def visit(self, node: Node):
+        return getattr(self, f'visit_{node.kind}')(node)
+
+
+class EbnfEmitter(Emitter):
+    """
+    The TatSu flavoured EBNF written to the grammar directory.
+    Every construct is emitted as space separated tokens.
+    """
+
+    def emit(self, node: Node) -> str:
+        return ' '.join(self.visit(node))
+
+    def visit_rule(self, node) -> list[str]:
+        return [node.name, '=', *self.visit(node.body), ';']
+
+    def visit_choice(self, node) -> list[str]:
+        tokens = self._join(node.items, '|')
+        if node.grouped:
+            return ['(', *tokens, ')']
+        return tokens
+
+    def visit_concatenation(self, node) -> list[str]:
+        return self._join(node.items, ',')
+
+    def visit_sequence(self, node) -> list[str]:
+        return [token for item in node.items for token in self.visit(item)]
+
+    def visit_optional(self, node) -> list[str]:
+        return ['[', *self.visit(node.item), ']']
+
+    def visit_except(self, node) -> list[str]:
+        return [*self.visit(node.item), '~', *self.visit(node.exception)]
+
+    def visit_nonterminal(self, node) -> list[str]:
+        return [node.name]
+
+    def visit_terminal(self, node) -> list[str]:
+        if '"' in node.value:
+            return [f"'{node.value}'"]
+        else:
+            return [f'"{node.value}"']
+
+    def visit_charclass(self, node) -> list[str]:
+        return [f'/{self.char_class(node)}/']
+
+    def visit_pattern(self, node) -> list[str]:
+        return [f'/{node.source}/']
+
+    def visit_prose(self, node) -> list[str]:
+        return [f'<{node.text}>']
+
+    @staticmethod
+    def char_class(node) -> str:
+        char = unicode_escape if node.unicode else regex_char
+        items = [f'{char(item[0])}-{char(item[1])}' if isinstance(item, tuple) else char(item)
+                 for item in node.items]
+        # a lone code point is only safe outside of brackets as an escape, a character like . would be a metacharacter
+        if node.unicode and len(items) == 1 and not isinstance(node.items[0], tuple):
+            return items[0]
+        return '[' + ''.join(items) + ']'
+
+    def _join(self, items, separator) -> list[str]:
+        tokens = []
+        for idx, item in enumerate(items):
+            if idx:
+                tokens.append(separator)
+            tokens.extend(self.visit(item))
+        return tokens
+
+
+class TatsuEmitter(EbnfEmitter):
+    """
+    EBNF that TatSu compiles as it is. The grammar directory keeps the notation of the Swift reference, where ~ is
+    an exception, while TatSu reads ~ as a cut, so exceptions become negative lookaheads here.
+    Prose cannot be parsed and never matches.
+    """
+
+    def visit_concatenation(self, node) -> list[str]:
+        return [token for item in node.items for token in self.visit(item)]
+
+    def visit_except(self, node) -> list[str]:
+        return ['!', '(', *self.visit(node.exception), ')', *self.visit(node.item)]
+
+    def visit_terminal(self, node) -> list[str]:
+        return [repr(node.value)]
+
+    def visit_prose(self, node) -> list[str]:
+        return ['/(?!)/']
+
+
+class RegexEmitter(Emitter):
+    """
+    A Python regular expression for a rule body, with the rules it refers to written inline.
+    Right recursion, x = a [ s x ], becomes repetition, a (s a)*. Any other recursion, such as nested comments,
+    is unrolled `depth` times and then fails. Prose and rules that are not defined never match.
+    Alternatives are tried in grammar order, the first one that lets the rest match wins.
+    """
+    never = '(?!)'
+
+    def __init__(self, rules: dict[str, Node], depth: int = 3):
+        self.rules = rules
+        self.depth = depth
+        self._stack: list[str] = []
+        self._memo: dict[str, str] = {}
+        self._recursive = {name for name in rules if self._reaches(name, name)}
+
+    def visit_rule(self, node) -> str:
+        return self.visit(node.body)
+
+    def visit_choice(self, node) -> str:
+        return '(?:' + '|'.join(self.visit(item) for item in node.items) + ')'
+
+    def visit_concatenation(self, node) -> str:
+        return ''.join(self.visit(item) for item in node.items)
+
+    def visit_sequence(self, node) -> str:
+        return ''.join(self.visit(item) for item in node.items)
+
+    def visit_optional(self, node) -> str:
+        return f'(?:{self.visit(node.item)})?'
+
+    def visit_except(self, node) -> str:
+        return f'(?!{self.visit(node.exception)})(?:{self.visit(node.item)})'
+
+    def visit_nonterminal(self, node) -> str:
+        name = node.name
+        if name not in self.rules or self._stack.count(name) >= self.depth:
+            return self.never
+        if name in self._memo:
+            return self._memo[name]
+        self._stack.append(name)
+        try:
+            regex = f'(?:{self.rule(name)})'
+        finally:
+            self._stack.pop()
+        # only a recursive rule depends on how deep it was reached
+        if name not in self._recursive:
+            self._memo[name] = regex
+        return regex
+
+    def visit_terminal(self, node) -> str:
+        return re.escape(node.value)
+
+    def visit_charclass(self, node) -> str:
+        char = unicode_escape if node.unicode else regex_char
+        return '[' + ''.join(f'{char(item[0])}-{char(item[1])}' if isinstance(item, tuple) else char(item)
+                             for item in node.items) + ']'
+
+    def visit_pattern(self, node) -> str:
+        return f'(?:{node.source})'
+
+    def visit_prose(self, node) -> str:
+        return self.never
+
+    def rule(self, name: str) -> str:
+        body = self.rules[name]
+        if isinstance(body, Sequence) and isinstance(body.items[-1], Optional):
+            tail = body.items[-1].item
+            tail = tail.items if isinstance(tail, Sequence) else [tail]
+            if tail[-1] == NonTerminal(name):
+                head = self.visit(Sequence(body.items[:-1]))
+                separator = ''.join(self.visit(item) for item in tail[:-1])
+                return f'{head}(?:{separator}{head})*'
+        return self.visit(body)
+
+    def alternatives(self, name: str, limit: int = 32) -> list[Node]:
+        """
+        Nodes whose union is the rule: its choices, and those of the rules it refers to, are opened up so that the
+        longest match can be taken where the regex engine takes the first alternative that matches. Recursive
+        rules, and choices that would open up into more than `limit` alternatives, stay as they are.
+        """
+        return self._open(NonTerminal(name), limit)
+
+    def _open(self, node: Node, limit: int) -> list[Node]:
+        if isinstance(node, NonTerminal):
+            if node.name not in self.rules or node.name in self._recursive:
+                return [node]
+            return self._open(self.rules[node.name], limit)
+        if isinstance(node, Choice):
+            # alternatives of one character each all match as much
+            if all(self._single(item) for item in node.items):
+                return [node]
+            opened = [alternative for item in node.items for alternative in self._open(item, limit)]
+            return opened if len(opened) <= limit else [node]
+        if isinstance(node, (Sequence, Concatenation)):
+            opened = [[]]
+            for item in node.items:
+                alternatives = self._open(item, limit)
+                if len(opened) * len(alternatives) > limit:
+                    alternatives = [item]
+                opened = [items + [alternative] for items in opened for alternative in alternatives]
+            return [Sequence(items) for items in opened]
+        return [node]
+
+    def _single(self, node: Node) -> bool:
+        if isinstance(node, NonTerminal):
+            return node.name in self.rules and node.name not in self._recursive and self._single(self.rules[node.name])
+        if isinstance(node, Choice):
+            return all(self._single(item) for item in node.items)
+        if isinstance(node, Pattern):
+            return bool(single_char_pattern.fullmatch(node.source))
+        return isinstance(node, CharClass) or isinstance(node, Terminal) and len(node.value) == 1
+
+    def _reaches(self, start: str, target: str) -> bool:
+        seen = set()
+        stack = [start]
+        while stack:
+            for node in walk(self.rules[stack.pop()]):
+                if isinstance(node, NonTerminal) and node.name in self.rules and node.name not in seen:
+                    if node.name == target:
+                        return True
+                    seen.add(node.name)
+                    stack.append(node.name)
+        return False
+
+
+class JsonEmitter(Emitter):
+    """
+    Plain lists and dicts that json can serialize; load() turns them back into nodes.
+    """
+
+    def visit(self, node: Node) -> dict:
+        data = {'kind': node.kind}
+        for slot in node.__slots__:
+            data[slot] = self._value(getattr(node, slot))
+        return data
+
+    def _value(self, value):
+        if isinstance(value, Node):
+            return self.visit(value)
+        if isinstance(value, list):
+            return [self._value(item) for item in value]
+        return value
+
+    @classmethod
+    def load(cls, data: dict) -> Node:
+        node_class = kinds[data['kind']]
+        return node_class(*(cls._load_value(data[slot]) for slot in node_class.__slots__))
+
+    @classmethod
+    def _load_value(cls, value):
+        if isinstance(value, dict):
+            return cls.load(value)
+        if isinstance(value, list):
+            # nested lists only occur as the (first, last) ranges of a character class
+            return [tuple(item) if isinstance(item, list) else cls._load_value(item) for item in value]
+        return value
@@ -1,47 +1,105 @@
-from typing import Iterator
-
-from scrapy import Selector
+from parser.emitters import EbnfEmitter
 from parser.item_tokenizer import Tokenizer
-from humps.main import decamelize, camelize
-from parser.string_parser import StringParser
+from parser.nodes import Choice, Concatenation, Node, NonTerminal, Optional, Prose, Rule, Sequence, Terminal
+from parser.symbols import SymbolTable
+from parser.token import Token
+
+ALTERNATION = '|'
+CONCATENATION = ','
+
+# the names of the parsers that are not given a table of their own
+default_symbols = SymbolTable()
 
 
 class Parser:
-    def __init__(self):
-        self._items: list[Selector] = []
+    def __init__(self, symbols: SymbolTable or None = None):
+        self.symbols = default_symbols if symbols is None else symbols
+        self._items: list = []
         self._tokenizer: Tokenizer or None = None
-        self._lookahead: Selector or None = None
+        self._lookahead: Token or None = None
+        # created for the first prose fragment and reused for the others
+        self._string_parser = None
 
     def __del__(self):
         pass
 
-    def parse(self, items) -> Iterator:
+    def parse(self, items) -> str:
+        """
+        Parses the items of a syntax-def into an EBNF rule.
+        """
+        return EbnfEmitter().emit(self.parse_tree(items))
+
+    def parse_many(self, defs):
+        """
+        Parses the items of many syntax-defs into EBNF rules, one after the other.
+        """
+        emit = EbnfEmitter().emit
+        for tree in self.parse_trees(defs):
+            yield emit(tree)
+
+    def parse_trees(self, defs):
+        """
+        Parses the items of many syntax-defs into grammar trees, one after the other. The tokenizer and the parser
+        for prose are reset for every definition instead of being created again.
+        """
+        for items in defs:
+            yield self.parse_tree(items)
+
+    def parse_tree(self, items) -> Rule:
+        """
+        Parses the items of a syntax-def into a grammar tree.
+        """
         self._items = items
-        self._tokenizer = Tokenizer(items)
+        if self._tokenizer is None:
+            self._tokenizer = Tokenizer(items)
+        else:
+            self._tokenizer.reset(items)
         self._lookahead = self._tokenizer.get_next_token()
 
         return self.definition()
 
-    def definition(self) -> str:
+    def definition(self) -> Rule:
         """
         # Main entry point.
         #
         """
-        return f'{self.name()} {self.assignment()} {self.statement_list()} ;'
+        name = self.name()
+        self.assignment()
+        return Rule(name, self.statement_list())
 
     def name(self) -> str:
-        name = self._eat('NAME')
-        value = decamelize(camelize(name))
-        return value
+        return self.symbols.name(self._eat('NAME'))
 
-    def statement_list(self, stop_lookahead=None) -> str:
+    def statement_list(self, stop_lookahead=None) -> Node:
         statement_list = [self.statement()]
         while self._lookahead is not None and self._lookahead.type != stop_lookahead:
             statement_list.append(self.statement())
 
-        return ' '.join(statement_list)
+        return self._group(statement_list)
 
-    def statement(self) -> str:
+    @staticmethod
+    def _group(statements: list) -> Node:
+        """
+        Groups a flat list of statements by the operators between them: alternation binds loosest,
+        then explicit concatenation, then plain juxtaposition.
+        """
+        alternatives = [[[]]]
+        for statement in statements:
+            if statement == ALTERNATION:
+                alternatives.append([[]])
+            elif statement == CONCATENATION:
+                alternatives[-1].append([])
+            else:
+                alternatives[-1][-1].append(statement)
+
+        def collapse(items, node_class):
+            return items[0] if len(items) == 1 else node_class(items)
+
+        choices = [collapse([collapse(sequence, Sequence) for sequence in concatenation], Concatenation)
+                   for concatenation in alternatives]
+        return collapse(choices, Choice)
+
+    def statement(self) -> Node or str:
         match self._lookahead.type:
             case 'ALTERNATION':
                 return self.alternation()
@@ -49,9 +107,10 @@ class Parser:
                 return self.concatenation()
             case 'STRING' | 'CATEGORY' | 'CODE':
                 return self.nonterminal()
+        raise SyntaxError(f'Unexpected token: {self._lookahead.value}')
 
-    def nonterminal(self) -> str:
-        value = ''
+    def nonterminal(self) -> Node:
+        value = None
         match self._lookahead.type:
             case 'CATEGORY':
                 value = self.category()
@@ -62,43 +121,61 @@ class Parser:
         assert value
         if self._lookahead and self._lookahead.type == 'OPT':
             self._eat('OPT')
-            return f'[ {value} ]'
+            return Optional(value)
         else:
             return value
 
     def alternation(self) -> str:
         self._eat('ALTERNATION')
-        return '|'
+        return ALTERNATION
 
     def concatenation(self) -> str:
         self._eat('CONCATENATION')
-        return ','
+        return CONCATENATION
 
-    def category(self) -> str:
+    def category(self) -> Node:
         category = self._eat('CATEGORY')
-        value = decamelize(camelize(category))
         # value = category.value.replace('-', ' ')
-        return value
+        return NonTerminal(self.symbols.name(category))
 
     def assignment(self) -> str:
         self._eat('ARROW')
         return '='
 
-    def terminal_string(self) -> str:
+    def terminal_string(self) -> Node:
         code = self._eat('CODE')
-        if '"' in code:
-            return f"'{code}'"
-        else:
-            return f'"{code}"'
+        return Terminal(code)
 
-    def string(self) -> str:
+    def string(self) -> Node:
         text = self._eat('STRING')
-        parser = StringParser()
+        parser = self._string_parser
+        if parser is None:
+            from parser.string_parser import StringParser
+            parser = self._string_parser = StringParser()
 
+        if text.rstrip().endswith('except') and self._lookahead is not None and self._lookahead.type == 'CODE':
+            text = self.exception_list(text)
         try:
-            return parser.parse(text)
+            return parser.parse_tree(text)
         except SyntaxError:
-            return f'<{text}>'
+            return Prose(text)
+
+    def exception_list(self, text: str) -> str:
+        """
+        Prose like "Any Unicode scalar value except `"`, `\\`, U+000A, or U+000D" mixes code tags into the list,
+        their characters are written as code points so that StringParser sees the whole list.
+        """
+        parts = [text.rstrip()]
+        while self._lookahead is not None and self._lookahead.type in ('CODE', 'CONCATENATION', 'STRING'):
+            if self._lookahead.type == 'CODE':
+                if len(self._lookahead.value) != 1:
+                    break
+                parts.append(' U+{0:04X}'.format(ord(self._eat('CODE'))))
+            elif self._lookahead.type == 'CONCATENATION':
+                parts.append(self._eat('CONCATENATION'))
+            else:
+                parts.append(' ' + self._eat('STRING').strip())
+        return ''.join(parts)
 
     def _eat(self, token_type: str):
         token = self._lookahead
@@ -1,8 +1,48 @@
-from scrapy import Selector
+"""
+Tokenizes the items of a syntax-def. An item is a text, or a tag given as a Scrapy or parsel Selector, a plain lxml
+element or a (tag, class, text) tuple, optionally followed by the link of the tag. Neither Scrapy nor parsel is
+imported unless a tag of an unusual shape needs the CSS selectors.
+"""
 from parser.token import Token
 import re
 
 
+def _selector(item):
+    if hasattr(item, 'css'):
+        return item
+    from parsel import Selector
+    return Selector(root=item)
+
+
+def _describe(item) -> str:
+    if hasattr(item, 'extract'):
+        return item.extract()
+    if isinstance(item, tuple):
+        return repr(item)
+    from lxml import etree
+    return etree.tostring(item, encoding='unicode', with_tail=False)
+
+
+# the link kept with the tuple of a tag: the anchor of a definition and the target of a reference
+links = {'NAME': ('.//a[@id]', 'id'), 'CATEGORY': ('.//a[@href]', 'href')}
+
+
+def compact(element):
+    """
+    A tag of one of the well-known shapes as the (tag, class, text) tuple of its token, followed by its link when it
+    has one, any other tag as it is.
+    """
+    token = Tokenizer._classify(element)
+    if token is None:
+        return element
+    if token.type in links:
+        path, attribute = links[token.type]
+        anchor = element.find(path)
+        if anchor is not None:
+            return element.tag, element.get('class'), token.value, anchor.get(attribute)
+    return element.tag, element.get('class'), token.value
+
+
 class Tokenizer:
     # Regex selectors for strings
     spec_str = [
@@ -22,9 +62,18 @@ class Tokenizer:
         ('sub::text', 'OPT'),
     ]
 
-    def __init__(self, items: list[Selector]):
+    def __init__(self, items: list, fast_path: bool = True):
+        self._fast_path = fast_path
+        self.reset(items)
+
+    def reset(self, items: list):
+        """
+        Starts over with the items of another syntax-def.
+        """
         self._items = items
         self._cursor = 0
+        # what is left of a text item after a leading separator, e.g. the U+000A of ", U+000A"
+        self._rest: str or None = None
 
     def has_more_tokens(self):
         return self._cursor < len(self._items)
@@ -33,7 +82,7 @@ class Tokenizer:
         if not self.has_more_tokens():
             return None
 
-        item = self._items[self._cursor]
+        item = self._items[self._cursor] if self._rest is None else self._rest
 
         if isinstance(item, str):
             for pattern, token_type in self.spec_str:
@@ -43,18 +92,91 @@ class Tokenizer:
                 if token_type is None:
                     return self.get_next_token()
                 return Token(token_type, token_value)
+        elif isinstance(item, tuple):
+            token = self._classify_tuple(item)
+            if token is not None:
+                self._cursor += 1
+                return token
         else:
+            if self._fast_path:
+                token = self._classify(item)
+                if token is not None:
+                    self._cursor += 1
+                    return token
+            selector = _selector(item)
             for css, token_type in self.spec_css:
-                token_value = self._match_css(css, item)
+                token_value = self._match_css(css, selector)
                 if token_value is None:
                     continue
                 if token_type is None:
                     return self.get_next_token()
                 return Token(token_type, token_value)
-        raise SyntaxError(f'Unexpected token: "{item.extract()}"')
+        raise SyntaxError(f'Unexpected token: "{_describe(item)}"')
+
+    @staticmethod
+    def _classify_tuple(item: tuple) -> Token or None:
+        """
+        Classifies a (tag, class, text) tuple the way _classify does a tag without nested tags.
+        """
+        tag, classes, text = item[:3]
+        if classes and 'syntax-def-name' in classes.split():
+            token_type = 'NAME'
+        elif tag == 'span' and classes == 'arrow':
+            token_type = 'ARROW'
+        elif tag == 'span' and classes == 'syntactic-category':
+            token_type = 'CATEGORY'
+        elif tag == 'code':
+            token_type = 'CODE'
+        elif tag == 'sub':
+            token_type = 'OPT'
+        else:
+            return None
+        value = (text or '').strip()
+        return Token(token_type, value) if value else None
+
+    @staticmethod
+    def _classify(item) -> Token or None:
+        """
+        Classifies the well-known tag shapes by tag name and class attribute alone.
+        Returns None for anything else, so the caller falls back to the CSS selectors.
+        """
+        node = getattr(item, 'root', item)
+        tag = getattr(node, 'tag', None)
+        if not isinstance(tag, str):
+            return None
+        children = list(node)
+        if any(not isinstance(child.tag, str) for child in children):
+            return None
+        classes = node.get('class')
 
-    def _match_css(self, selector: str, item: Selector) -> str or None:
-        matched = item.css(selector).extract_first()
+        token_type = None
+        texts = []
+        if classes and 'syntax-def-name' in classes.split():
+            if all(len(child) == 0 and child.get('class') is None for child in children):
+                token_type = 'NAME'
+                texts = [node.text] + [child.tail for child in children]
+        elif children:
+            if tag == 'span' and classes == 'syntactic-category' \
+                    and all(child.tag == 'a' and len(child) == 0 and child.get('class') is None for child in children):
+                token_type = 'CATEGORY'
+                texts = [child.text for child in children]
+        elif tag == 'span' and classes == 'arrow':
+            token_type = 'ARROW'
+            texts = [node.text]
+        elif tag == 'code':
+            token_type = 'CODE'
+            texts = [node.text]
+        elif tag == 'sub':
+            token_type = 'OPT'
+            texts = [node.text]
+
+        value = next((text for text in texts if text is not None), '').strip()
+        if not value:
+            return None
+        return Token(token_type, value)
+
+    def _match_css(self, css: str, selector) -> str or None:
+        matched = selector.css(css).extract_first()
         if not matched:
             return None
         matched = matched.strip()
@@ -64,8 +186,14 @@ class Tokenizer:
         return matched
 
     def _match_str(self, pattern, item: str) -> str or None:
-        matched = re.match(pattern, item)
+        # a text may span lines, and a match that consumes nothing must not keep the same rest forever
+        matched = re.match(pattern, item, re.S)
         if not matched:
             return None
-        self._cursor += 1
+        rest = item[matched.end():]
+        if rest.strip() and matched.end():
+            self._rest = rest
+        else:
+            self._rest = None
+            self._cursor += 1
         return matched.group(0)
@@ -0,0 +1,189 @@
+"""
+Grammar tree built by Parser and StringParser.
+
+Nodes are small __slots__ classes; turning them into text is left to the emitters in parser.emitters.
+Character classes keep code points, so passes over the tree can reason about the ranges they cover.
+"""
+
+
+class Node:
+    __slots__ = ()
+    kind = 'node'
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, s) == getattr(other, s) for s in self.__slots__)
+
+    def __hash__(self):
+        return hash((type(self), *(_hashable(getattr(self, s)) for s in self.__slots__)))
+
+    def __repr__(self):
+        args = ', '.join(repr(getattr(self, s)) for s in self.__slots__)
+        return f'{type(self).__name__}({args})'
+
+    def children(self) -> list['Node']:
+        return []
+
+
+class Rule(Node):
+    __slots__ = ('name', 'body')
+    kind = 'rule'
+
+    def __init__(self, name: str, body: Node):
+        self.name = name
+        self.body = body
+
+    def children(self):
+        return [self.body]
+
+
+class Choice(Node):
+    """
+    Alternatives; grouped choices are wrapped in parentheses.
+    """
+    __slots__ = ('items', 'grouped')
+    kind = 'choice'
+
+    def __init__(self, items: list[Node], grouped: bool = False):
+        self.items = items
+        self.grouped = grouped
+
+    def children(self):
+        return self.items
+
+
+class Concatenation(Node):
+    """
+    Items separated by an explicit comma in the source.
+    """
+    __slots__ = ('items',)
+    kind = 'concatenation'
+
+    def __init__(self, items: list[Node]):
+        self.items = items
+
+    def children(self):
+        return self.items
+
+
+class Sequence(Node):
+    """
+    Items that simply follow each other.
+    """
+    __slots__ = ('items',)
+    kind = 'sequence'
+
+    def __init__(self, items: list[Node]):
+        self.items = items
+
+    def children(self):
+        return self.items
+
+
+class Optional(Node):
+    __slots__ = ('item',)
+    kind = 'optional'
+
+    def __init__(self, item: Node):
+        self.item = item
+
+    def children(self):
+        return [self.item]
+
+
+class Except(Node):
+    __slots__ = ('item', 'exception')
+    kind = 'except'
+
+    def __init__(self, item: Node, exception: Node):
+        self.item = item
+        self.exception = exception
+
+    def children(self):
+        return [self.item, self.exception]
+
+
+class NonTerminal(Node):
+    __slots__ = ('name',)
+    kind = 'nonterminal'
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+class Terminal(Node):
+    __slots__ = ('value',)
+    kind = 'terminal'
+
+    def __init__(self, value: str):
+        self.value = value
+
+
+class CharClass(Node):
+    """
+    A set of code points. Items are single code points or inclusive (first, last) ranges.
+    `unicode` selects \\U escapes over literal characters when emitted.
+    """
+    __slots__ = ('items', 'unicode')
+    kind = 'charclass'
+
+    def __init__(self, items: list[int or tuple[int, int]], unicode: bool = False):
+        self.items = items
+        self.unicode = unicode
+
+
+class Pattern(Node):
+    """
+    A regular expression that is not a plain character class.
+    """
+    __slots__ = ('source',)
+    kind = 'pattern'
+
+    def __init__(self, source: str):
+        self.source = source
+
+
+class Prose(Node):
+    """
+    Text the string parser could not make sense of.
+    """
+    __slots__ = ('text',)
+    kind = 'prose'
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+kinds = {cls.kind: cls for cls in [Rule, Choice, Concatenation, Sequence, Optional, Except, NonTerminal, Terminal,
+                                   CharClass, Pattern, Prose]}
+
+
+def walk(node: Node):
+    """
+    Yields the node and all its descendants, depth first.
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(node.children()))
+
+
+def transform(node: Node, func) -> Node:
+    """
+    Rebuilds the tree bottom up, replacing every node by func(node) once its children have been transformed.
+    """
+    values = []
+    for slot in node.__slots__:
+        value = getattr(node, slot)
+        if isinstance(value, Node):
+            value = transform(value, func)
+        elif isinstance(value, list) and value and isinstance(value[0], Node):
+            value = [transform(item, func) for item in value]
+        values.append(value)
+    return func(type(node)(*values))
+
+
+def _hashable(value):
+    if isinstance(value, list):
+        return tuple(_hashable(v) for v in value)
+    return value
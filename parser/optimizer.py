@@ -0,0 +1,167 @@
+"""
+Whole grammar optimization: the rules of every syntax-def are looked at together, unlike the passes in
+parser.passes which only ever see a single definition.
+"""
+from parser.nodes import Choice, Node, NonTerminal, Optional, Rule, Sequence, transform, walk
+
+
+class OptimizationReport:
+    def __init__(self):
+        self.merged_rules: list[str] = []
+        self.unreachable_rules: list[str] = []
+        self.undefined_rules: list[str] = []
+        self.duplicate_alternatives = 0
+        self.factored_prefixes = 0
+
+    def lines(self) -> list[str]:
+        lines = [
+            f'merged {len(self.merged_rules)} rules defined on several lines',
+            f'removed {len(self.unreachable_rules)} unreachable rules',
+            f'removed {self.duplicate_alternatives} duplicate alternatives',
+            f'left-factored {self.factored_prefixes} common prefixes',
+        ]
+        if self.unreachable_rules:
+            lines.append('unreachable: ' + ', '.join(self.unreachable_rules))
+        if self.undefined_rules:
+            lines.append('referenced but not defined: ' + ', '.join(self.undefined_rules))
+        return lines
+
+    def __str__(self):
+        return '\n'.join(self.lines())
+
+
+def optimize_grammar(rules: list[Rule], roots: list[str] or None = None) -> tuple[list[Rule], OptimizationReport]:
+    """
+    Merges the lines of each rule, drops the rules that cannot be reached from the roots, removes duplicate
+    alternatives and left-factors alternatives with a common prefix.
+    Without roots every rule that no other rule refers to is a root.
+    Rules keep the order in which they were first defined.
+    """
+    report = OptimizationReport()
+    rules = merge_rules(rules, report)
+
+    graph = dependency_graph(rules)
+    if roots is None:
+        referenced = {name for rule, references in graph.items() for name in references if name != rule}
+        roots = [name for name in graph if name not in referenced]
+    live = reachable(graph, roots)
+    report.unreachable_rules = [rule.name for rule in rules if rule.name not in live]
+    report.undefined_rules = sorted({name for rule in live for name in graph.get(rule, ()) if name not in graph})
+    rules = [rule for rule in rules if rule.name in live]
+
+    def optimize(node: Node) -> Node:
+        if isinstance(node, Choice):
+            node = _dedupe(node, report)
+        if isinstance(node, Choice):
+            node = _factor(node, report)
+        return node
+
+    return [transform(rule, optimize) for rule in rules], report
+
+
+def merge_rules(rules: list[Rule], report: OptimizationReport) -> list[Rule]:
+    """
+    The Swift grammar lists the alternatives of some rules on separate lines, this joins them into one rule.
+    """
+    bodies: dict[str, list[Node]] = {}
+    for rule in rules:
+        bodies.setdefault(rule.name, []).append(rule.body)
+    report.merged_rules = [name for name, alternatives in bodies.items() if len(alternatives) > 1]
+    return [Rule(name, alternatives[0] if len(alternatives) == 1 else Choice(alternatives))
+            for name, alternatives in bodies.items()]
+
+
+def references(node: Node) -> set[str]:
+    return {item.name for item in walk(node) if isinstance(item, NonTerminal)}
+
+
+def dependency_graph(rules: list[Rule]) -> dict[str, set[str]]:
+    """
+    Maps every rule name to the names of the rules its definition refers to.
+    """
+    graph: dict[str, set[str]] = {}
+    for rule in rules:
+        graph.setdefault(rule.name, set()).update(references(rule.body))
+    return graph
+
+
+def reachable(graph: dict[str, set[str]], roots: list[str]) -> set[str]:
+    seen = set()
+    stack = [root for root in roots if root in graph]
+    while stack:
+        name = stack.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        stack.extend(reference for reference in graph[name] if reference in graph)
+    return seen
+
+
+def _alternatives(node: Choice) -> list[Node]:
+    # nested choices were only grouped for precedence, inside a choice they add nothing
+    return [alternative for item in node.items
+            for alternative in (_alternatives(item) if isinstance(item, Choice) else [item])]
+
+
+def _dedupe(node: Choice, report: OptimizationReport) -> Node:
+    """
+    A repeated alternative can never match where its first occurrence did not, so it is dropped.
+    """
+    items = []
+    for item in _alternatives(node):
+        if item in items:
+            report.duplicate_alternatives += 1
+        else:
+            items.append(item)
+    if len(items) == 1:
+        return items[0]
+    return Choice(items, node.grouped)
+
+
+def _factor(node: Choice, report: OptimizationReport) -> Node:
+    """
+    Replaces neighbouring alternatives with a common prefix, a b | a c, by a ( b | c ).
+    When the prefix is a whole alternative, a | a b, the rest becomes optional: a [ b ]. That is the same language
+    in EBNF, and a PEG no longer commits to a before it had a chance to try a b.
+    """
+    items = []
+    run = []
+    for item in node.items + [None]:
+        if item is not None and run and _terms(item)[0] == _terms(run[0])[0]:
+            run.append(item)
+            continue
+        items.extend(_factor_run(run, report))
+        run = [item] if item is not None else []
+
+    if len(items) == 1:
+        return items[0]
+    return Choice(items, node.grouped)
+
+
+def _factor_run(run: list[Node], report: OptimizationReport) -> list[Node]:
+    if len(run) < 2:
+        return run
+    terms = [_terms(item) for item in run]
+    prefix = []
+    for idx in range(min(len(t) for t in terms)):
+        if any(t[idx] != terms[0][idx] for t in terms):
+            break
+        prefix.append(terms[0][idx])
+
+    report.factored_prefixes += 1
+    rests = [_sequence(t[len(prefix):]) for t in terms if len(t) > len(prefix)]
+    rest = rests[0] if len(rests) == 1 else _factor(Choice(rests, grouped=True), report)
+    if len(rests) < len(terms):
+        # one alternative, and as they are unique only one, was the prefix itself
+        if isinstance(rest, Choice):
+            rest = Choice(rest.items)
+        return [_sequence(prefix + [Optional(rest)])]
+    return [_sequence(prefix + _terms(rest))]
+
+
+def _terms(node: Node) -> list[Node]:
+    return node.items if isinstance(node, Sequence) else [node]
+
+
+def _sequence(terms: list[Node]) -> Node:
+    return terms[0] if len(terms) == 1 else Sequence(terms)
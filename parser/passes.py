@@ -0,0 +1,98 @@
+"""
+Optimization passes over the grammar tree. Each pass takes a tree and returns an equivalent one.
+"""
+from parser.nodes import CharClass, Choice, Except, Node, Terminal, transform
+
+
+def merge_char_classes(node: Node) -> Node:
+    """
+    Merges runs of alternatives that each match a single character, character classes as well as one character
+    terminals such as the digits of "Digit 0 or 1", into one character class with sorted, coalesced ranges.
+    Only neighbouring alternatives are merged, so the order in which a choice is tried stays the same.
+    An exception between two character classes becomes their difference.
+    """
+    return transform(node, _merge)
+
+
+def _merge(node: Node) -> Node:
+    if isinstance(node, Choice):
+        return _merge_choice(node)
+    if isinstance(node, Except):
+        return _merge_except(node)
+    return node
+
+
+def _merge_choice(node: Choice) -> Node:
+    items = []
+    run = []
+    for item in node.items + [None]:
+        if item is not None and code_point_ranges(item) is not None:
+            run.append(item)
+            continue
+        if len(run) > 1:
+            items.append(char_class([r for i in run for r in code_point_ranges(i)],
+                                    any(isinstance(i, CharClass) and i.unicode for i in run)))
+        else:
+            items.extend(run)
+        run = []
+        if item is not None:
+            items.append(item)
+
+    if len(items) == 1:
+        return items[0]
+    return Choice(items, node.grouped)
+
+
+def _merge_except(node: Except) -> Node:
+    ranges = code_point_ranges(node.item)
+    exception = code_point_ranges(node.exception)
+    if ranges is None or exception is None:
+        return node
+    difference = subtract(normalize(ranges), normalize(exception))
+    if not difference:
+        return node
+    return char_class(difference, any(isinstance(i, CharClass) and i.unicode for i in [node.item, node.exception]))
+
+
+def code_point_ranges(node: Node) -> list[tuple[int, int]] or None:
+    """
+    The inclusive code point ranges of a node that matches exactly one character, None for any other node.
+    """
+    if isinstance(node, CharClass):
+        return [item if isinstance(item, tuple) else (item, item) for item in node.items]
+    if isinstance(node, Terminal) and len(node.value) == 1:
+        return [(ord(node.value), ord(node.value))]
+    return None
+
+
+def normalize(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    Sorts ranges and joins the ones that overlap or touch.
+    """
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def subtract(ranges: list[tuple[int, int]], exception: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    result = []
+    for first, last in ranges:
+        for excluded_first, excluded_last in exception:
+            if excluded_last < first or excluded_first > last:
+                continue
+            if excluded_first > first:
+                result.append((first, excluded_first - 1))
+            first = excluded_last + 1
+            if first > last:
+                break
+        if first <= last:
+            result.append((first, last))
+    return result
+
+
+def char_class(ranges: list[tuple[int, int]], unicode: bool) -> CharClass:
+    return CharClass([first if first == last else (first, last) for first, last in normalize(ranges)], unicode)
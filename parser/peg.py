@@ -0,0 +1,501 @@
+"""
+Parses source text with a grammar tree, reading EBNF as a parsing expression grammar: alternatives are ordered
+and the first one that matches wins, options and repetitions are greedy.
+
+Left recursion, like postfix-expression → function-call-expression → postfix-expression, grows a seed: the recursive
+call fails at first, then returns the longest match so far, and the rule is matched again for as long as its match
+gets longer. Which alternative can build on the match so far is not known in advance, so a left recursive rule
+takes the longest of its alternatives.
+
+Lexical rules are compiled into one regular expression each and match a token at once. Between the tokens
+of the other rules the whitespace rule, comments included, is skipped.
+"""
+import re
+import time
+
+from parser.emitters import RegexEmitter
+from parser.nodes import CharClass, Choice, Concatenation, Except, Node, NonTerminal, Optional, Pattern, Prose, Rule, \
+    Sequence, Terminal, walk
+from parser.optimizer import merge_rules, OptimizationReport
+from parser.passes import merge_char_classes
+
+
+class ParseError(SyntaxError):
+    def __init__(self, message: str, offset: int, line: int, column: int, expected: list[str]):
+        super().__init__(message)
+        self.offset = offset
+        self.line = line
+        self.column = column
+        self.expected = expected
+
+
+class ParseTimeout(Exception):
+    pass
+
+
+class PegParser:
+    # rule calls between two looks at the clock
+    check_interval = 4096
+
+    def __init__(self, rules: list[Rule], lexical: set[str] = frozenset(), whitespace: str = 'whitespace',
+                 memo_size: int = 100000):
+        rules = merge_rules(rules, OptimizationReport())
+        self.rules = {rule.name: rule.body for rule in rules}
+        self.lexical = {name for name in lexical if name in self.rules}
+        # the words that syntactic rules spell out are keywords, which a token such as an identifier cannot be
+        self.keywords = {node.value for name, body in self.rules.items() if name not in self.lexical
+                         for node in walk(body) if isinstance(node, Terminal) and re.fullmatch(r'\w+', node.value)}
+        self._regex_emitter = RegexEmitter({name: merge_char_classes(self.rules[name]) for name in self.lexical})
+        # the rules a syntactic rule can call at the position it starts at
+        self._calls = {name: self._leading(body) for name, body in self.rules.items() if name not in self.lexical}
+        self.left_recursive = self._leaders()
+        # packrat memo of rule results by rule and position, the oldest entries are evicted first once it is full
+        self.memo_size = memo_size
+        self.memoized = self._backtracked()
+        self._functions: dict[str, object] = {}
+
+        if whitespace in self.lexical:
+            self._whitespace = re.compile(f'(?:{self._token_regex(whitespace)})?')
+        else:
+            self._whitespace = re.compile(r'\s*')
+
+        self._text = ''
+        self._active: set[tuple[str, int]] = set()
+        # the match so far of a left recursive rule that is growing, and how often it was read
+        self._seeds: dict[tuple[str, int], list[int]] = {}
+        self._farthest = -1
+        self._expected: set[str] = set()
+        self._deadline: float or None = None
+        # rule calls of the last parse
+        self.calls = 0
+        self._memo: dict[tuple[str, int], int] = {}
+        self._recursions = 0
+
+    def parse(self, text: str, start: str, timeout: float or None = None) -> int:
+        """
+        Parses the whole text as the start rule, returns its length or raises ParseError at the farthest position
+        the parser got to. ParseTimeout is raised once more than timeout seconds have passed.
+        """
+        self._begin(text, timeout)
+        try:
+            end = self._function(start)(0)
+            if end >= 0:
+                end = self._skip(end)
+                if end == len(text):
+                    return end
+                self._fail(end, 'end of input')
+            raise self._error()
+        finally:
+            self._finish()
+
+    def _begin(self, text: str, timeout: float or None):
+        self._text = text
+        self._active = set()
+        self._seeds = {}
+        self._farthest = -1
+        self._expected = set()
+        self.calls = 0
+        self._memo = {}
+        self._recursions = 0
+        self._deadline = None if timeout is None else time.perf_counter() + timeout
+
+    def _finish(self):
+        self._text = ''
+        self._active = set()
+        self._seeds = {}
+        self._memo = {}
+
+    def _backtracked(self) -> set[str]:
+        """
+        The rules worth memoizing: those that backtracking can call twice at the same position, because they can
+        come first in more than one alternative of a choice, or in both the item and the exception of an except.
+        """
+        reached: dict[str, set[str]] = {}
+
+        def lead(node: Node) -> set[str]:
+            names = set()
+            for name in self._leading(node):
+                if name not in reached:
+                    reached[name] = self._reach(name)
+                names |= reached[name]
+            return names
+
+        backtracked = set()
+        for name, body in self.rules.items():
+            if name in self.lexical:
+                continue
+            for node in walk(body):
+                if isinstance(node, Choice):
+                    alternatives = [lead(item) for item in node.items]
+                    for i, names in enumerate(alternatives[:-1]):
+                        backtracked |= names & set().union(*alternatives[i + 1:])
+                elif isinstance(node, Except):
+                    backtracked |= lead(node.item) & lead(node.exception)
+        return backtracked
+
+    def _leading(self, node: Node) -> set[str]:
+        """
+        The syntactic rules a node can call at the position it starts at.
+        """
+        if isinstance(node, NonTerminal):
+            return {node.name} if node.name in self.rules and node.name not in self.lexical else set()
+        if isinstance(node, (Sequence, Concatenation)):
+            names = set()
+            for item in node.items:
+                names |= self._leading(item)
+                if not isinstance(item, Optional):
+                    break
+            return names
+        if isinstance(node, Choice):
+            return set().union(*(self._leading(item) for item in node.items))
+        if isinstance(node, Optional):
+            return self._leading(node.item)
+        if isinstance(node, Except):
+            return self._leading(node.item) | self._leading(node.exception)
+        return set()
+
+    def _reach(self, name: str, without: set[str] = frozenset()) -> set[str]:
+        """
+        The rule and the rules it can get to without moving on in the text, passing none of `without`.
+        """
+        reached = {name}
+        stack = [name]
+        while stack:
+            for called in self._calls[stack.pop()]:
+                if called not in reached and called not in without:
+                    reached.add(called)
+                    stack.append(called)
+        return reached
+
+    def _cyclic(self, without: set[str]) -> list[str]:
+        return [name for name in self._calls if name not in without
+                and any(name in self._calls[called] for called in self._reach(name, without))]
+
+    def _leaders(self) -> set[str]:
+        """
+        The rules a left recursion grows from, chosen so that every cycle of left recursion goes through one: a
+        rule of a cycle that leaves the fewest others on a cycle, the first in grammar order of those.
+        """
+        leaders = set()
+        cyclic = self._cyclic(leaders)
+        while cyclic:
+            leaders.add(min(cyclic, key=lambda name: len(self._cyclic(leaders | {name}))))
+            cyclic = self._cyclic(leaders)
+        return leaders
+
+    def _error(self) -> ParseError:
+        offset = max(self._farthest, 0)
+        line = self._text.count('\n', 0, offset) + 1
+        column = offset - (self._text.rfind('\n', 0, offset) + 1) + 1
+        expected = sorted(self._expected)
+        found = repr(self._text[offset]) if offset < len(self._text) else 'end of input'
+        return ParseError(f'Unexpected {found} at line {line}, column {column}, expected: {", ".join(expected)}',
+                          offset, line, column, expected)
+
+    def _fail(self, pos: int, expected: str):
+        if pos > self._farthest:
+            self._farthest = pos
+            self._expected = {expected}
+        elif pos == self._farthest:
+            self._expected.add(expected)
+
+    def _skip(self, pos: int) -> int:
+        return self._whitespace.match(self._text, pos).end()
+
+    def _token_regex(self, name: str) -> str:
+        return self._regex_emitter.visit(NonTerminal(name))
+
+    def _function(self, name: str):
+        function = self._functions.get(name)
+        if function is None:
+            if name in self.lexical:
+                function = self._token(name)
+            elif name in self.rules:
+                function = self._rule(name)
+            else:
+                function = self._never(name)
+            self._functions[name] = function
+        return function
+
+    def _rule(self, name: str):
+        functions = self._functions
+        memoized = self.memo_size > 0 and name in self.memoized
+        grows = name in self.left_recursive
+        body = None
+
+        def rule(pos: int) -> int:
+            nonlocal body
+            if body is None:
+                body = self._longest(self.rules[name]) if grows else self._compile(self.rules[name])
+            self.calls += 1
+            if self._deadline is not None and self.calls % self.check_interval == 0 \
+                    and time.perf_counter() > self._deadline:
+                raise ParseTimeout(f'parsing took longer than the budget, at offset {pos}')
+            key = (name, pos)
+            memo = self._memo
+            if memoized:
+                end = memo.get(key)
+                if end is not None:
+                    return end
+            seed = self._seeds.get(key)
+            if seed is not None:
+                seed[1] += 1
+                self._recursions += 1
+                return seed[0]
+            # a left recursion that does not go through a growing rule, e.g. behind a rule that can match nothing,
+            # would never end, the recursive alternative fails instead
+            if key in self._active:
+                self._recursions += 1
+                return -1
+            recursions = self._recursions
+            if grows:
+                end = self._grow(key, body)
+            else:
+                self._active.add(key)
+                try:
+                    end = body(pos)
+                finally:
+                    self._active.discard(key)
+            # a result that depends on an enclosing call failing its left recursion only holds in that call
+            if memoized and recursions == self._recursions:
+                if len(memo) >= self.memo_size:
+                    del memo[next(iter(memo))]
+                memo[key] = end
+            return end
+
+        functions[name] = rule
+        return rule
+
+    def _grow(self, key: tuple[str, int], body) -> int:
+        """
+        Matches a left recursive rule again and again, each time with the longest match so far as the result of the
+        recursive call, until the match gets no longer.
+        """
+        seed = self._seeds[key] = [-1, 0]
+        try:
+            while True:
+                reads = seed[1]
+                end = body(key[1])
+                if end <= seed[0]:
+                    break
+                seed[0] = end
+                # when nothing read the seed, matching again would give the same
+                if seed[1] == reads:
+                    break
+        finally:
+            del self._seeds[key]
+        # the calls that read this seed were part of growing it, the result does not depend on an enclosing call
+        self._recursions -= seed[1]
+        return seed[0]
+
+    def _token(self, name: str):
+        # backtracks into the next alternative rather than end a token in the middle of a word, so the 0 of 0x1F
+        # is not taken for a decimal literal
+        word_end = '(?:(?<=\\w)(?!\\w)|(?<!\\w))'
+        pattern = re.compile(f'(?:{self._token_regex(name)}){word_end}')
+        # the regex engine takes the first alternative that matches, the token is the longest one, so 1.5 is not 1
+        alternatives = self._regex_emitter.alternatives(name)
+        alternatives = [re.compile(f'(?:{self._regex_emitter.visit(node)}){word_end}')
+                        for node in alternatives] if len(alternatives) > 1 else []
+        keywords = self.keywords
+
+        def token(pos: int) -> int:
+            pos = self._skip(pos)
+            matched = pattern.match(self._text, pos)
+            if matched is None or matched.end() == pos:
+                self._fail(pos, name)
+                return -1
+            end = matched.end()
+            for alternative in alternatives:
+                longer = alternative.match(self._text, pos)
+                if longer is not None and longer.end() > end:
+                    end = longer.end()
+            if self._text[pos:end] in keywords:
+                self._fail(pos, name)
+                return -1
+            return end
+
+        return token
+
+    def _never(self, name: str):
+        def never(pos: int) -> int:
+            self._fail(self._skip(pos), name)
+            return -1
+
+        return never
+
+    def _longest(self, node: Node):
+        """
+        Like _compile, but a choice takes the alternative that matches the most.
+        """
+        if not isinstance(node, Choice):
+            return self._compile(node)
+        items = [self._compile(item) for item in node.items]
+
+        def longest(pos: int) -> int:
+            end = -1
+            for item in items:
+                end = max(end, item(pos))
+            return end
+
+        return longest
+
+    def _compile(self, node: Node):
+        """
+        Turns a node into a function that takes a position and returns where the match ends, -1 if it fails.
+        """
+        if isinstance(node, NonTerminal):
+            name = node.name
+            return lambda pos: self._function(name)(pos)
+
+        if isinstance(node, Terminal):
+            value = node.value
+            length = len(value)
+            # a keyword must not be the start of a longer word
+            word = bool(re.match(r'\w', value[-1:]))
+
+            def terminal(pos: int) -> int:
+                text = self._text
+                pos = self._skip(pos)
+                end = pos + length
+                if text.startswith(value, pos) and not (word and end < len(text) and
+                                                        (text[end].isalnum() or text[end] == '_')):
+                    return end
+                self._fail(pos, repr(value))
+                return -1
+
+            return terminal
+
+        if isinstance(node, (Pattern, CharClass)):
+            source = node.source if isinstance(node, Pattern) else self._regex_emitter.visit(node)
+            pattern = re.compile(source)
+            source = f'/{source}/'
+
+            def regex(pos: int) -> int:
+                pos = self._skip(pos)
+                matched = pattern.match(self._text, pos)
+                if matched is None:
+                    self._fail(pos, source)
+                    return -1
+                return matched.end()
+
+            return regex
+
+        if isinstance(node, (Sequence, Concatenation)):
+            items = [self._compile(item) for item in node.items]
+
+            def sequence(pos: int) -> int:
+                for item in items:
+                    pos = item(pos)
+                    if pos < 0:
+                        return -1
+                return pos
+
+            return sequence
+
+        if isinstance(node, Choice):
+            items = [self._compile(item) for item in node.items]
+
+            def choice(pos: int) -> int:
+                for item in items:
+                    end = item(pos)
+                    if end >= 0:
+                        return end
+                return -1
+
+            return choice
+
+        if isinstance(node, Optional):
+            item = self._compile(node.item)
+
+            def optional(pos: int) -> int:
+                end = item(pos)
+                return pos if end < 0 else end
+
+            return optional
+
+        if isinstance(node, Except):
+            item = self._compile(node.item)
+            exception = self._compile(node.exception)
+
+            def except_(pos: int) -> int:
+                if exception(pos) >= 0:
+                    return -1
+                return item(pos)
+
+            return except_
+
+        if isinstance(node, Prose):
+            text = f'<{node.text}>'
+
+            def prose(pos: int) -> int:
+                self._fail(pos, text)
+                return -1
+
+            return prose
+
+        raise TypeError(f'Cannot parse with a {node.kind} node')
+
+
+class IncrementalParser:
+    """
+    Keeps a document parsed as a sequence of top-level items, like the statements of a Swift file, and after an
+    edit parses again only from the item the edit touches up to the first item that starts where an old one
+    after the edit started. The items from there on are kept and only moved by the change in length.
+    """
+
+    def __init__(self, parser: PegParser, item: str = 'statement', timeout: float or None = None):
+        self.parser = parser
+        self.item = item
+        self.timeout = timeout
+        self.text = ''
+        # where every item starts, the white space before it included, and where it ends
+        self.spans: list[tuple[int, int]] = []
+        # False after a parse error, the text after the last item is then not parsed yet
+        self.complete = True
+
+    def parse(self, text: str) -> range:
+        """
+        Parses the whole text, returns the indexes of the items parsed.
+        """
+        self.spans = []
+        return self._reparse(text, 0, [], 0, 0)
+
+    def edit(self, start: int, end: int, replacement: str) -> range:
+        """
+        Replaces the text between start and end, returns the indexes of the items parsed again. Raises ParseError
+        when the new text does not parse; the items before the error are kept and the next edit goes on from them.
+        """
+        text = self.text[:start] + replacement + self.text[end:]
+        changed = start if self.complete else min(start, self.spans[-1][1] if self.spans else 0)
+        # an edit right at the end of an item can still extend it
+        index = next((i for i, (_, item_end) in enumerate(self.spans) if item_end >= changed), len(self.spans))
+        # after a parse error the items kept are followed by text that has not been parsed, so none can be reused
+        following = [span for span in self.spans[index:] if span[0] >= end] if self.complete else []
+        self.spans = self.spans[:index]
+        return self._reparse(text, index, following, len(replacement) - (end - start), start + len(replacement))
+
+    def _reparse(self, text: str, index: int, following: list[tuple[int, int]], delta: int, edited: int) -> range:
+        parser = self.parser
+        self.text = text
+        starts = {start + delta: i for i, (start, _) in enumerate(following) if start + delta >= edited}
+        pos = self.spans[-1][1] if self.spans else 0
+        self.complete = False
+        parser._begin(text, self.timeout)
+        try:
+            item = parser._function(self.item)
+            while pos not in starts:
+                if parser._skip(pos) == len(text):
+                    self.complete = True
+                    return range(index, len(self.spans))
+                end = item(pos)
+                if end <= pos:
+                    raise parser._error()
+                self.spans.append((pos, end))
+                pos = end
+        finally:
+            parser._finish()
+        stop = len(self.spans)
+        self.complete = True
+        self.spans += [(start + delta, end + delta) for start, end in following[starts[pos]:]]
+        return range(index, stop)
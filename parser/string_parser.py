@@ -1,247 +1,320 @@
-from copy import deepcopy
+"""
+Table-driven LL(1) parser for the prose of the grammar summary, like "Digit 0 through 9, a through f, or A through F".
+
+The prose grammar is declared as data below and compiled once, when the module is imported, into a predictive parse
+table: one row per nonterminal mapping every token type to the symbols of the production to expand. Parsing is a
+loop over a stack of symbols without any recursion, so its cost per token is a dict lookup instead of a chain of
+method calls and lookahead checks.
+"""
+from parser.emitters import EbnfEmitter
+from parser.nodes import CharClass, Choice, Except, Node, NonTerminal, Pattern, Sequence, Terminal
+from parser.string_tokenizer import scan, spec
+
+
+def _range(left: str, right: str) -> Node:
+    if len(left) == 1 and len(right) == 1:
+        return CharClass([(ord(left), ord(right))])
+    return Pattern(f'[{left}-{right}]')
+
+
+def _code_point(value: str) -> int:
+    return int(value[2:], 16)
+
+
+def _append(rest: list, item) -> list:
+    # lists are built from the right, in reverse, and turned around by the production that starts them
+    rest.append(item)
+    return rest
+
+
+def _sequence(first: Node, rest: list) -> Node:
+    if not rest:
+        return first
+    rest.append(first)
+    rest.reverse()
+    return Sequence(rest)
+
+
+def _keywords(first: str, rest: list) -> Node:
+    if not rest:
+        return NonTerminal(first)
+    rest.append(first)
+    return Choice([NonTerminal(name) for name in reversed(rest)])
+
+
+uniscalar_values = (0x0, 0xD7FF), (0xE000, 0x10FFFF)
+
+# the token types whose text is used, the others only give the prose its structure
+valued = {'UNICODE', 'CHAR', 'DIGIT', 'KEYWORD'}
+
+# The productions of every nonterminal, the first one is the start symbol. Upper case symbols are token types of
+# StringTokenizer, lower case ones nonterminals. A valued terminal leaves the text of its token on the value stack and
+# the action of a production replaces the values of its right-hand side with its result, without an action they are
+# left as they are. An action taking more values than the right-hand side leaves also takes the value left by the
+# symbols in front of the nonterminal, the left operand of a tail like `choice_tail`.
+#
+# An empty production is taken for any lookahead none of the others start with, so that lists are as long as they
+# can be, as they were in the recursive descent parser this replaces.
+grammar = [
+    ('sequence', 'choice sequence_tail', _sequence),
+    ('sequence_tail', 'SEQUENCE choice sequence_tail', lambda item, rest: _append(rest, item)),
+    ('sequence_tail', '', lambda: []),
+
+    ('choice', 'range choice_tail', None),
+    ('choice_tail', 'EXCEPT choice', lambda left, exception: Except(left, exception)),
+    ('choice_tail', 'COMMA alternatives', lambda left, rest: Choice([left] + rest[::-1], grouped=True)),
+    ('choice_tail', 'OR range', lambda left, right: Choice([left, right], grouped=True)),
+    ('choice_tail', '', None),
+    ('alternatives', 'OR range', lambda item: [item]),
+    ('alternatives', 'range alternatives_tail', lambda item, rest: _append(rest, item)),
+    ('alternatives_tail', 'COMMA alternatives', None),
+    ('alternatives_tail', 'OR range', lambda item: [item]),
+    ('alternatives_tail', '', lambda: []),
+
+    ('range', 'ANY any', None),
+    ('range', 'BETWEEN char AND char', lambda low, high: Pattern(f'[0-9a-fA-F]{{{low},{high}}}')),
+    ('range', 'UNICODE unicode_tail', None),
+    ('range', 'DIGIT char digit_tail', None),
+    ('range', 'INTEGER GREATER ZERO', lambda: Pattern('[1-9][0-9]*')),
+    ('range', 'CHAR THROUGH char', _range),
+    ('range', 'LETTER char THROUGH char',
+     lambda left, right: Choice([_range(left.lower(), right.lower()), _range(left.upper(), right.upper())],
+                                grouped=True)),
+    ('range', 'keyword', None),
+
+    ('any', 'UNISCALAR', lambda: Choice([CharClass([values], unicode=True) for values in uniscalar_values],
+                                        grouped=True)),
+    ('any', 'keyword', None),
+    ('any', '', lambda: None),
+
+    ('unicode_tail', 'RANGE UNICODE',
+     lambda left, right: CharClass([(_code_point(left), _code_point(right))], unicode=True)),
+    ('unicode_tail', '', lambda left: CharClass([_code_point(left)], unicode=True)),
+
+    ('digit_tail', 'THROUGH char', lambda _, left, right: _range(left, right)),
+    ('digit_tail', 'OR char', lambda _, left, right: Choice([Terminal(left), Terminal(right)])),
+    ('digit_tail', 'GREATER', lambda _, left: _range(chr(ord(left) + 1), '9')),
+
+    ('keyword', 'KEYWORD keyword_tail', _keywords),
+    ('keyword_tail', 'COMMA keyword_list', None),
+    ('keyword_tail', 'OR KEYWORD', lambda name: [name]),
+    ('keyword_tail', '', lambda: []),
+    ('keyword_list', 'OR KEYWORD', lambda name: [name]),
+    ('keyword_list', 'KEYWORD keyword_tail', lambda name, rest: _append(rest, name)),
+
+    ('char', 'CHAR', None),
+    ('char', 'DIGIT', None),
+    ('char', 'ZERO', lambda: '0'),
+    ('char', 'ONE', lambda: '1'),
+    ('char', 'EIGHT', lambda: '8'),
+]
+
+
+class Row(dict):
+    """
+    The productions of a nonterminal by the type of the lookahead token, None at the end of the input. Every
+    production is the symbols pushed onto the parse stack, in reverse, and what happens to the lookahead when it
+    starts with it: TAKE leaves its text, DROP only moves on and LOOK leaves it to the symbols.
+    """
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+
+    def __repr__(self):
+        return f'Row({self.name!r})'
+
+
+class Skip(str):
+    """
+    A terminal on the parse stack whose text is not used.
+    """
+
+
+class Action(tuple):
+    """
+    The action of a production, run once all of its symbols are parsed: the number of values it takes and the
+    function building the result from them.
+    """
+
+
+LOOK, TAKE, DROP = 0, 1, 2
+
+
+def first_sets(productions) -> tuple[dict[str, set[str]], set[str]]:
+    """
+    The token types every nonterminal can start with, and the nonterminals that can be empty.
+    """
+    nonterminals = {name for name, _, _ in productions}
+    first = {name: set() for name in nonterminals}
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for name, symbols, _ in productions:
+            before = len(first[name]), name in nullable
+            for symbol in symbols.split():
+                if symbol not in nonterminals:
+                    first[name].add(symbol)
+                    break
+                first[name] |= first[symbol]
+                if symbol not in nullable:
+                    break
+            else:
+                nullable.add(name)
+            changed |= before != (len(first[name]), name in nullable)
+    return first, nullable
+
+
+def compile_table(productions, token_types, valued_types) -> Row:
+    """
+    The parse table of a grammar in the format of `grammar`, as the row of its start symbol that links to the others.
+    Two productions of a nonterminal starting with the same token type are a conflict and raise a ValueError.
+    """
+    rows = {name: Row(name) for name, _, _ in productions}
+    first, nullable = first_sets(productions)
+    empty = {}
+    for name, symbols, action in productions:
+        symbols = symbols.split()
+        unknown = [symbol for symbol in symbols if symbol not in rows and symbol not in token_types]
+        if unknown:
+            raise ValueError(f'Unknown symbol {unknown[0]} in a production of {name}')
+        expansion = [] if action is None else [Action((action.__code__.co_argcount, action))]
+        # a leading terminal is the lookahead the production is chosen by, it is taken right away
+        lookahead = LOOK
+        if symbols and symbols[0] not in rows:
+            lookahead = TAKE if symbols[0] in valued_types else DROP
+        for symbol in reversed(symbols[lookahead != LOOK:]):
+            if symbol in rows:
+                expansion.append(rows[symbol])
+            else:
+                expansion.append(symbol if symbol in valued_types else Skip(symbol))
+        expansion = tuple(expansion), lookahead
+
+        starts = set()
+        for symbol in symbols:
+            if symbol not in rows:
+                starts.add(symbol)
+                break
+            starts |= first[symbol]
+            if symbol not in nullable:
+                break
+        else:
+            if name in empty:
+                raise ValueError(f'{name} has two empty productions')
+            empty[name] = expansion
+        for token_type in starts:
+            if token_type in rows[name]:
+                raise ValueError(f'{name} has two productions starting with {token_type}')
+            rows[name][token_type] = expansion
+
+    for name, expansion in empty.items():
+        for token_type in [*token_types, None]:
+            rows[name].setdefault(token_type, expansion)
+    return rows[productions[0][0]]
+
 
-from parser.string_tokenizer import StringTokenizer
-from parser.token import Token
+table = compile_table(grammar, [token_type for _, token_type in spec if token_type], valued)
+
+# the type of the lookahead where the tokenizer failed
+_error = object()
 
 
 class StringParser:
     def __init__(self):
         self._string: str = ''
-        self._tokenizer: StringTokenizer or None = None
-        self._lookahead: Token or None = None
-
-    def lookahead_is(self, *tpe) -> bool:
-        return self._lookahead and self._lookahead.type in tpe
-
-    def lookahead_is_not(self, *tpe) -> bool:
-        return self._lookahead and self._lookahead.type not in tpe
+        # reused by every string the parser is given
+        self._tokens: tuple[list[str], list[str]] = [], []
+        self._stack: list = []
+        self._values: list = []
 
     def parse(self, string) -> str:
         """
-        Parses a string into an AST.
+        Parses a string into EBNF.
         """
-        self._string = string
-        self._tokenizer = StringTokenizer(string)
-        self._lookahead = self._tokenizer.get_next_token()
-        return self.sequence_list()
-
-    def sequence_list(self):
-        first = [self.choice_expression()]
-        following = []
-        while self.lookahead_is('SEQUENCE'):
-            self._eat('SEQUENCE')
-            following.append(self.choice_expression())
-        return ' '.join(first + following)
-
-    def choice_expression(self, left=None):
-        left = left or self.range_expression()
-        if self.lookahead_is('EXCEPT'):
-            return f'{self.except_expression(left)}'
-        if self.lookahead_is('COMMA', 'OR'):
-            return f'{self.comma_expression(left)}'
-
-        return left
-
-    def comma_expression(self, left):
-        alternations = []
-
-        while self.lookahead_is('COMMA', 'OR'):
-            if self.lookahead_is('COMMA'):
-                self._eat('COMMA')
-            if self.lookahead_is('OR'):
-                self._eat('OR')
-                alternations.append(self.range_expression())
-                break
-            alternations.append(self.range_expression())
-
-        if alternations:
-            return self._choice([left] + alternations)
-        return left
-
-    def except_expression(self, left):
-        self._eat('EXCEPT')
-        choices = self.choice_expression()
-        return f'{left} ~ {choices}'
-
-    def range_expression(self):
-        if self.lookahead_is('ANY'):
-            return self.any_range()
-        if self.lookahead_is('BETWEEN'):
-            return self.between_range()
-        if self.lookahead_is('UNICODE'):
-            return self.unicode_range()
-        if self.lookahead_is('DIGIT'):
-            return self.digit_range()
-        if self.lookahead_is('INTEGER'):
-            return self.integer_range_greater_zero()
-        if self.lookahead_is('CHAR'):
-            return self.char_range()
-        if self.lookahead_is('LETTER'):
-            return self.letter_range()
-        return self.keyword()
+        return EbnfEmitter().emit(self.parse_tree(string))
 
-    @staticmethod
-    def _range(left, right):
-        return f'[{left}-{right}]'
-
-    def between_range(self):
-        self._eat('BETWEEN')
-        from_ = self.char()
-        self._eat('AND')
-        to = self.char()
-        range_ = f'/[0-9a-fA-F]{{{from_},{to}}}/'
-        return range_
-
-
-    def integer_range_greater_zero(self):
-        self._eat('INTEGER')
-        self._eat('GREATER')
-        self._eat('ZERO')
-        return '/[1-9][0-9]*/'
-
-    def char_range(self):
-        left = self.char()
-        self._eat('THROUGH')
-        right = self.char()
-        return f'/{self._range(left, right)}/'
-
-    def digit_range(self):
-        self._eat('DIGIT')
-        left = self.char()
-
-        if self.lookahead_is('THROUGH'):
-            self._eat('THROUGH')
-            right = self.char()
-        elif self.lookahead_is('OR'):
-            self._eat('OR')
-            right = self.char()
-            return self.digit_alternation([left, right])
-        else:
-            self._eat('GREATER')
-            left = chr(ord(left) + 1)
-            right = '9'
-
-        range_ = self._range(left, right)
-        return f'/{range_}/'
-
-    def unicode_range(self):
-        left = self.unicode()
-
-        if not self.lookahead_is('RANGE'):
-            return f'/{left}/'
-        self._eat('RANGE')
-        right = self.unicode()
-        return f'/{self._range(left, right)}/'
-
-    def letter_range(self):
+    def parse_many(self, strings, fallback=None):
         """
-        Letter
-            : 'Upper- or lowercase letter' CHAR THROUGH CHAR
+        Parses strings into EBNF, one after the other, see parse_trees.
         """
-        self._eat('LETTER')
-        left = self.char()
-        self._eat('THROUGH')
-        right = self.char()
-        lower_alternation = deepcopy(self._range(left.lower(), right.lower()))
-        upper_alternation = deepcopy(self._range(left.upper(), right.upper()))
-        choice = self._choice([f'/{lower_alternation}/', f'/{upper_alternation}/'])
-        return choice
-
-    def _choice(self, items):
-        return '( ' + ' | '.join(items) + ' )'
-
-    def any_range(self):
-        self._eat('ANY')
-        if self.lookahead_is('UNISCALAR'):
-            return self.uniscalar_values()
-        elif self.lookahead_is('KEYWORD'):
-            return self.keyword()
-
-    def uniscalar_values(self):
-        self._eat('UNISCALAR')
-        uni_scalar_range = (0x0, 0xD7FF), (0xE000, 0x10FFFF)
-        x = self._range(self._unicode_formatter(uni_scalar_range[0][0]),
-                        self._unicode_formatter(uni_scalar_range[0][1]))
-        y = self._range(self._unicode_formatter(uni_scalar_range[1][0]),
-                        self._unicode_formatter(uni_scalar_range[1][1]))
-        a = self._choice([f'/{x}/', f'/{y}/'])
-        return a
-
-    def keyword(self):
-        first = self._eat('KEYWORD')
-        alternations = []
-
-        while self.lookahead_is('COMMA', 'OR'):
-            if self.lookahead_is('COMMA'):
-                self._eat('COMMA')
-            if self.lookahead_is('OR'):
-                self._eat('OR')
-                alternations.append(self._eat('KEYWORD'))
-                break
-            alternations.append(self._eat('KEYWORD'))
-
-        if alternations:
-            return ' | '.join([first] + alternations)
-        else:
-            return first
-
-    def digit_alternation(self, items):
-        return ' | '.join(f'"{item}"' for item in items)
+        emit = EbnfEmitter().emit
+        for tree in self.parse_trees(strings, fallback):
+            yield emit(tree)
 
-    def unicode_alternation(self):
-        items = [self.unicode()]
-
-        while self.lookahead_is('COMMA'):
-            self._eat('COMMA')
-
-            if self.lookahead_is('UNICODE'):
-                items.append(self.unicode())
-
-        if self.lookahead_is('OR'):
-            self._eat('OR')
-            items.append(self.unicode())
-
-        if len(items) == 1:
-            return items[0]
-        else:
-            return self._choice(items)
-
-    def unicode(self):
-        value = int(self._eat('UNICODE')[2:], 16)
-        return self._unicode_formatter(value)
+    def parse_trees(self, strings, fallback=None):
+        """
+        Parses strings into grammar trees, one after the other. A string that is not valid prose raises its
+        SyntaxError, or with a fallback like Prose gives fallback(string) instead.
+        """
+        for string in strings:
+            try:
+                tree = self.parse_tree(string)
+            except SyntaxError:
+                if fallback is None:
+                    raise
+                tree = fallback(string)
+            yield tree
+
+    def parse_tree(self, string) -> Node:
+        """
+        Parses a string into a grammar tree. Tokens after a complete expression are not looked at.
+        """
+        self._string = string
+        types, texts, error = scan(string, self._tokens)
+        # the end of the input, or where the tokens stopped
+        types.append(None if error is None else _error)
+        stack = self._stack
+        stack.clear()
+        stack.append(table)
+        values = self._values
+        values.clear()
+        pop, push, expand = stack.pop, values.append, stack.extend
+
+        position = 0
+        token_type = types[0]
+        while stack:
+            symbol = pop()
+            kind = symbol.__class__
+            if kind is Row:
+                try:
+                    expansion, lookahead = symbol[token_type]
+                except KeyError:
+                    self._unexpected(token_type, texts, position, sorted(symbol), error)
+                expand(expansion)
+                if lookahead:
+                    if lookahead == TAKE:
+                        push(texts[position])
+                    position += 1
+                    token_type = types[position]
+                    if token_type is _error:
+                        raise error
+            elif kind is str or kind is Skip:
+                if symbol != token_type:
+                    self._unexpected(token_type, texts, position, [symbol], error)
+                if kind is str:
+                    push(texts[position])
+                position += 1
+                token_type = types[position]
+                if token_type is _error:
+                    raise error
+            else:
+                arity, action = symbol
+                if arity == 1:
+                    values[-1] = action(values[-1])
+                elif arity:
+                    arguments = values[-arity:]
+                    del values[-arity:]
+                    push(action(*arguments))
+                else:
+                    push(action())
+        return values.pop()
 
     @staticmethod
-    def _unicode_formatter(value: int):
-        return r"\U{0:0{1}X}".format(value, 8)
-
-    def char(self):
-        if self.lookahead_is('CHAR'):
-            value = self._eat('CHAR')
-        elif self.lookahead_is('DIGIT'):
-            value = self._eat('DIGIT')
-        elif self.lookahead_is('ZERO'):
-            self._eat('ZERO')
-            value = '0'
-        elif self.lookahead_is('ONE'):
-            self._eat('ONE')
-            value = '1'
-        else:
-            self._eat('EIGHT')
-            value = '8'
-
-        return value
-
-    def _eat(self, token_type: str):
-        token = self._lookahead
-        if token is None:
-            raise SyntaxError(f'Unexpected end of input, expected: {token_type}')
-        if token_type != token.type:
-            raise SyntaxError(f'Unexpected token: "{token.value}", expected {token_type}')
-        self._lookahead = self._tokenizer.get_next_token()
-        return token.value
-
-
-
-
-
-
+    def _unexpected(token_type, texts: list[str], position: int, expected: list[str], error: SyntaxError or None):
+        if token_type is _error:
+            raise error
+        expected = ' or '.join(expected)
+        if token_type is None:
+            raise SyntaxError(f'Unexpected end of input, expected: {expected}')
+        raise SyntaxError(f'Unexpected token: "{texts[position]}", expected {expected}')
@@ -26,8 +26,36 @@ spec = [
     (r'\s+', None),
 ]
 
+SKIP = 'SKIP'
+
+
+def _anchor(regexp: str) -> str:
+    # The tokens used to be matched against a slice of the remaining input, where a
+    # leading \b only holds in front of a word character. Matching in place with a
+    # start position would look at the preceding character instead, so pin it down.
+    return re.sub(r'(^|(?<!\\)\|)\\b', r'\1(?=\\w)', regexp)
+
+
+def compile_spec(rules) -> re.Pattern:
+    """
+    Joins the spec into a single alternation with one named group per token type.
+    The order of the spec is kept, so the first matching rule still wins.
+    """
+    groups = [f'(?P<{token_type or SKIP}>{_anchor(regexp)})' for regexp, token_type in rules]
+    return re.compile('|'.join(groups), re.I)
+
+
+master_pattern = compile_spec(spec)
+
+
 class StringTokenizer:
     def __init__(self, string: str):
+        self.reset(string)
+
+    def reset(self, string: str):
+        """
+        Starts over with another string.
+        """
         self._string: str = string
         self._cursor: int = 0
 
@@ -35,21 +63,45 @@ class StringTokenizer:
         return self._cursor < len(self._string)
 
     def get_next_token(self) -> Token or None:
-        if not self.has_more_tokens():
-            return None
-        string = self._string[self._cursor:]
-        for regexp, token_type in spec:
-            token_value = self._match(regexp, string)
-            if token_value is None:
+        string = self._string
+        length = len(string)
+        while self._cursor < length:
+            matched = master_pattern.match(string, self._cursor)
+            if not matched:
+                raise SyntaxError(f'Unexpected token: "{string[self._cursor]}"')
+            self._cursor = matched.end()
+            token_type = matched.lastgroup
+            if token_type == SKIP:
                 continue
-            if token_type is None:
-                return self.get_next_token()
-            return Token(token_type, token_value)
-        raise SyntaxError(f'Unexpected token: "{string[0]}"')
-
-    def _match(self, regexp, string) -> str or None:
-        matched = re.match(regexp, string, re.I)
-        if not matched:
-            return None
-        self._cursor += len(matched.group(0))
-        return matched.group(0)
+            return Token(token_type, matched.group(0))
+        return None
+
+
+# every token with the whitespace in front of it, so that a scan takes one match per token
+scan_pattern = re.compile(r'\s*(?:' + compile_spec([rule for rule in spec if rule[1]]).pattern + ')', re.I)
+whitespace = re.compile(r'\s*')
+
+
+def scan(string: str, buffers: tuple[list, list] or None = None) -> tuple[list[str], list[str], SyntaxError or None]:
+    """
+    The types and the values of all tokens of the string in one pass. A character no rule matches ends the tokens,
+    the error it raises in get_next_token is returned instead, for a parser to raise once it gets that far.
+    Given a pair of lists for the types and the values, they are cleared and filled, so that a batch of strings
+    reuses them.
+    """
+    if buffers is None:
+        types, values = [], []
+    else:
+        types, values = buffers
+        types.clear()
+        values.clear()
+    end = 0
+    for matched in iter(scan_pattern.scanner(string).match, None):
+        token_type = matched.lastgroup
+        types.append(token_type)
+        values.append(matched[token_type])
+        end = matched.end()
+    end = whitespace.match(string, end).end()
+    if end < len(string):
+        return types, values, SyntaxError(f'Unexpected token: "{string[end]}"')
+    return types, values, None
@@ -0,0 +1,27 @@
+"""
+Rule names as the EBNF writes them, array_type for the array-type of the HTML.
+"""
+import sys
+
+
+class SymbolTable:
+    """
+    Normalizes every spelling of a rule name once and interns the result, so all references to a rule share one
+    string. humps is imported when the first name is normalized.
+    """
+
+    def __init__(self):
+        self._names: dict[str, str] = {}
+
+    def name(self, text: str) -> str:
+        name = self._names.get(text)
+        if name is None:
+            from humps.main import camelize, decamelize
+            name = self._names[text] = sys.intern(decamelize(camelize(text)))
+        return name
+
+    def __len__(self) -> int:
+        return len(set(self._names.values()))
+
+    def __contains__(self, text: str) -> bool:
+        return text in self._names
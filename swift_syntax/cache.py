@@ -0,0 +1,112 @@
+"""
+Persistent memo of converted definitions.
+
+Maps a hash of a syntax-def's HTML to the EBNF line the parser produced for it.
+The table is tagged with a hash of the parser sources and wiped when they change.
+"""
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+
+from parser import item_parser
+
+filename = 'definitions.sqlite'
+
+
+def parser_version() -> str:
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(item_parser.__file__), '*.py'))):
+        with open(path, 'rb') as f:
+            digest.update(os.path.basename(path).encode())
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class DefinitionCache:
+    def __init__(self, directory: str, max_entries: int = 100000, version: str or None = None):
+        os.makedirs(directory, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._used: dict[str, int] = {}
+        self._connection = sqlite3.connect(os.path.join(directory, filename))
+        self._connection.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS definitions (key TEXT PRIMARY KEY, line TEXT NOT NULL, used INTEGER NOT NULL);
+        ''')
+        self._clock = int(self._meta('clock') or 0)
+
+        version = version or parser_version()
+        if self._meta('version') != version:
+            self._connection.execute('DELETE FROM definitions')
+            self._set_meta('version', version)
+            self._connection.commit()
+
+    @staticmethod
+    def key(dumped_def: list[tuple[bool, str]]) -> str:
+        return hashlib.sha256(json.dumps(dumped_def, ensure_ascii=False).encode()).hexdigest()
+
+    def get(self, key: str) -> str or None:
+        row = self._connection.execute('SELECT line FROM definitions WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(key)
+        return row[0]
+
+    def put(self, key: str, line: str):
+        self._connection.execute('INSERT OR REPLACE INTO definitions (key, line, used) VALUES (?, ?, ?)',
+                                 (key, line, self._clock + 1))
+        self._touch(key)
+
+    def close(self):
+        self._connection.executemany('UPDATE definitions SET used = ? WHERE key = ?',
+                                     [(used, key) for key, used in self._used.items()])
+        # evict the least recently used entries
+        self._connection.execute('''
+            DELETE FROM definitions WHERE key NOT IN (
+                SELECT key FROM definitions ORDER BY used DESC LIMIT ?
+            )''', (self.max_entries,))
+        self._set_meta('clock', str(self._clock))
+        self._connection.commit()
+        self._connection.close()
+
+    def _touch(self, key: str):
+        self._clock += 1
+        self._used[key] = self._clock
+
+    def _meta(self, name: str) -> str or None:
+        row = self._connection.execute('SELECT value FROM meta WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name: str, value: str):
+        self._connection.execute('INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)', (name, value))
+
+
+class MemoryCache:
+    """
+    In-memory counterpart of DefinitionCache for definitions shared by the pages converted in one run.
+    """
+    key = staticmethod(DefinitionCache.key)
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lines: dict[str, str] = {}
+
+    def get(self, key: str) -> str or None:
+        line = self._lines.get(key)
+        if line is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return line
+
+    def put(self, key: str, line: str):
+        self._lines[key] = line
+
+    def close(self):
+        self._lines = {}
@@ -0,0 +1,20 @@
+from scrapy.commands.crawl import Command as CrawlCommand
+
+
+class Command(CrawlCommand):
+    """
+    Runs a spider with the HTTP cache on and every item pipeline off, so that a later crawl with
+    HTTPCACHE_IGNORE_MISSING set converts the pages from disk without touching the network.
+    """
+
+    def syntax(self):
+        return '[options] <spider>'
+
+    def short_desc(self):
+        return 'Fill the HTTP cache with the pages of a spider without converting them'
+
+    def process_options(self, args, opts):
+        super().process_options(args, opts)
+        self.settings.set('HTTPCACHE_ENABLED', True, priority='cmdline')
+        self.settings.set('HTTPCACHE_IGNORE_MISSING', False, priority='cmdline')
+        self.settings.set('ITEM_PIPELINES', {}, priority='cmdline')
@@ -0,0 +1,61 @@
+"""
+Compiles the converted grammar with TatSu once, at build time, into a Python parser module and a pickled grammar
+model, so that a service can import the parser instead of compiling the EBNF every time it starts.
+
+TatSu is optional and only needed to build; the generated module still needs it at run time.
+"""
+import os
+import pickle
+
+from parser.emitters import TatsuEmitter
+from parser.nodes import Rule
+
+try:
+    import tatsu
+except ImportError:
+    tatsu = None
+
+
+def tatsu_grammar(rules: list[Rule], name: str, undefined: list[str] = ()) -> str:
+    """
+    The grammar in TatSu's EBNF. Every rule must be defined once, see parser.optimizer.merge_rules.
+    Rules that are referenced but not defined never match.
+    """
+    emitter = TatsuEmitter()
+    lines = [f'@@grammar :: {name}', '']
+    lines += [emitter.emit(rule) for rule in rules]
+    lines += [f'{rule_name} = /(?!)/ ;' for rule_name in undefined]
+    return '\n'.join(lines) + '\n'
+
+
+def model_path(module_path: str) -> str:
+    return os.path.splitext(module_path)[0] + '.pickle'
+
+
+def compile_parser(grammar: str, module_path: str) -> str:
+    """
+    Writes the generated parser module and, next to it, the pickled model. Returns the path of the model.
+    """
+    if tatsu is None:
+        raise ImportError('TatSu is needed to compile the grammar: pip install TatSu')
+
+    model = tatsu.compile(grammar)
+    source = tatsu.to_python_sourcecode(grammar)
+
+    directory = os.path.dirname(module_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(module_path, 'w') as f:
+        f.write(source)
+    path = model_path(module_path)
+    with open(path, 'wb') as f:
+        pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def load_model(path: str):
+    """
+    Loads a model written by compile_parser. Its parse(text, start=rule) works like that of tatsu.compile().
+    """
+    with open(path, 'rb') as f:
+        return pickle.load(f)
@@ -24,3 +24,17 @@ class SyntaxDefItem(Item):
     name = Field()
     identifier = Field()
     items = Field()
+    section = Field()
+    group = Field()
+
+
+class SnapshotItem(Item):
+    source = Field()
+    order = Field()
+    html = Field()
+
+
+class PageItem(Item):
+    url = Field()
+    version = Field()
+    sections = Field()
@@ -0,0 +1,179 @@
+"""
+Generates a Swift source lexer from the lexical structure of the grammar: one master regular expression with a
+named group per token kind, written to a standalone module that tokenizes a whole file in a single pass. The kinds
+are tried in order, and within a kind the longest of its alternatives wins, so 1.5 is one floating point literal.
+"""
+import importlib.util
+import os
+import re
+
+from parser.emitters import RegexEmitter
+from parser.nodes import CharClass, Choice, Concatenation, Except, Node, NonTerminal, Optional, Pattern, Rule, \
+    Sequence, Terminal
+from parser.optimizer import optimize_grammar
+from parser.passes import char_class, merge_char_classes
+
+# token kinds in the order they are tried
+tokens = ['whitespace', 'literal', 'identifier', 'operator', 'punctuation']
+
+# the reference only describes these in prose, or the summary page may leave them out
+fallbacks = {
+    'operator': r'[/=\-+!*%<>&|^~?]+|\.[/=\-+!*%<>&|^~?.]+',
+    'punctuation': r'[(){}\[\].,:;@#`]',
+}
+
+# a token that ends in a word character must not be followed by one, so true does not match the start of trueValue
+word_end = r'(?:(?<=\w)(?!\w)|(?<!\w))'
+
+# the patterns that a grammar file gives back for a character class: one range of code points, or a single one
+code_point = r'\\U[0-9A-Fa-f]{8}|[^\\\]\-]'
+range_pattern = re.compile(fr'\[({code_point})-({code_point})\]|({code_point})')
+
+# a - right after an operand is the binary operator, as in x-1, and not the sign of a numeric literal
+guards = {'literal': r'(?:(?<![\w)\]}"`])|(?!-))'}
+
+template = '''"""
+Lexer for {name}, generated by swift_syntax.lexer from the lexical structure of the grammar. Do not edit.
+"""
+import re
+
+tokens = {tokens!r}
+
+master_pattern = re.compile({pattern!r})
+
+# the alternatives of the token kinds that have several, the regex engine stops at the first one that matches
+alternatives = {{
+{alternatives}}}
+
+
+def tokenize(source: str, skip=('whitespace',)):
+    """
+    Yields (kind, text, offset) for every token of the source, except for the kinds in skip.
+    """
+    offset = 0
+    match = master_pattern.match
+    while offset < len(source):
+        matched = match(source, offset)
+        if matched is None or matched.end() == offset:
+            raise SyntaxError(f'Unexpected character {{source[offset]!r}} at offset {{offset}}')
+        kind = matched.lastgroup
+        end = matched.end()
+        for pattern in alternatives.get(kind, ()):
+            longer = pattern.match(source, offset)
+            if longer is not None and longer.end() > end:
+                end = longer.end()
+        if kind not in skip:
+            yield kind, source[offset:end], offset
+        offset = end
+'''
+
+
+def token_patterns(rules: list[Rule], kinds: list[str] = None, depth: int = 3) -> list[tuple[str, str, list[str]]]:
+    """
+    The regular expression of every token kind that the rules define or that has a fallback, with the regular
+    expressions of its alternatives when it has several.
+    """
+    kinds = kinds or tokens
+    rules, _ = optimize_grammar(rules, roots=kinds)
+    # one character class is a single step for the regex engine, an alternation of them is not
+    rules = [merge_char_classes(rule) for rule in rules]
+    emitter = RegexEmitter({rule.name: rule.body for rule in rules}, depth)
+    defined = {rule.name for rule in rules}
+
+    bodies = {rule.name: rule.body for rule in rules}
+    patterns = []
+    for kind in kinds:
+        if kind in defined:
+            regex = emitter.visit(NonTerminal(kind))
+            ranges = first_ranges(NonTerminal(kind), bodies)
+            if ranges:
+                # lets the engine skip a token kind after looking at a single character
+                regex = f'(?={emitter.visit(char_class(ranges, unicode=False))})(?:{regex})'
+            alternatives = overlapping(emitter.alternatives(kind), bodies)
+            alternatives = [guards.get(kind, '') + f'(?:{emitter.visit(node)}){word_end}' for node in alternatives]
+            patterns.append((kind, guards.get(kind, '') + regex, alternatives))
+        elif kind in fallbacks:
+            patterns.append((kind, fallbacks[kind], []))
+    return patterns
+
+
+def first_ranges(node: Node, rules: dict[str, Node], seen: frozenset = frozenset()) -> list[tuple[int, int]] or None:
+    """
+    The code points a match of the node can start with, None when that is not known, as for patterns and prose,
+    or when the node can match the empty string.
+    """
+    if isinstance(node, CharClass):
+        return [item if isinstance(item, tuple) else (item, item) for item in node.items]
+    if isinstance(node, Terminal):
+        return [(ord(node.value[0]), ord(node.value[0]))] if node.value else None
+    if isinstance(node, Pattern):
+        matched = range_pattern.fullmatch(node.source)
+        if not matched:
+            return None
+        points = [int(text[2:], 16) if text.startswith('\\U') else ord(text) for text in matched.groups() if text]
+        return [(points[0], points[-1])]
+    if isinstance(node, NonTerminal):
+        if node.name not in rules or node.name in seen:
+            return None
+        return first_ranges(rules[node.name], rules, seen | {node.name})
+    if isinstance(node, Except):
+        return first_ranges(node.item, rules, seen)
+    if isinstance(node, Choice):
+        ranges = [first_ranges(item, rules, seen) for item in node.items]
+        return None if None in ranges else [r for item in ranges for r in item]
+    if isinstance(node, (Sequence, Concatenation)):
+        ranges = []
+        for item in node.items:
+            if isinstance(item, Optional):
+                first = first_ranges(item.item, rules, seen)
+                if first is None:
+                    return None
+                ranges += first
+                continue
+            first = first_ranges(item, rules, seen)
+            return None if first is None else ranges + first
+    return None
+
+
+def overlapping(alternatives: list[Node], rules: dict[str, Node]) -> list[Node]:
+    """
+    The alternatives that start like another one: only those can match longer than the first one that matches.
+    """
+    firsts = [first_ranges(node, rules) for node in alternatives]
+
+    def overlaps(a, b):
+        return a is None or b is None or any(start <= other_end and other_start <= end
+                                             for start, end in a for other_start, other_end in b)
+
+    return [node for i, node in enumerate(alternatives)
+            if any(overlaps(firsts[i], first) for j, first in enumerate(firsts) if i != j)]
+
+
+def master_pattern(patterns: list[tuple[str, str, list[str]]]) -> str:
+    return '|'.join(f'(?P<{kind}>(?:{regex}){word_end})' for kind, regex, _ in patterns)
+
+
+def lexer_source(rules: list[Rule], name: str = 'Swift', kinds: list[str] = None) -> str:
+    patterns = token_patterns(rules, kinds)
+    alternatives = ''.join(f'    {kind!r}: [{", ".join(f"re.compile({regex!r})" for regex in regexes)}],\n'
+                           for kind, _, regexes in patterns if regexes)
+    return template.format(name=name, tokens=[kind for kind, _, _ in patterns], pattern=master_pattern(patterns),
+                           alternatives=alternatives)
+
+
+def write_lexer(path: str, rules: list[Rule], name: str = 'Swift', kinds: list[str] = None):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(lexer_source(rules, name, kinds))
+
+
+def load_lexer(path: str):
+    """
+    Imports a generated lexer module from its path.
+    """
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,93 @@
+"""
+Converts saved copies of the grammar summary page without crawling.
+
+The spider's parse methods and the pipeline are driven directly on the parsed
+page, so neither the Twisted reactor nor the downloader stack is started.
+"""
+import argparse
+import logging
+import os
+import sys
+import urllib.request
+
+from scrapy import Selector
+from scrapy.settings import Settings
+
+from swift_syntax.pipelines import SwiftSyntaxPipeline
+from swift_syntax.profiling import profile
+from swift_syntax.spiders.swift import SwiftSpider
+
+
+def get_settings() -> Settings:
+    settings = Settings()
+    settings.setmodule('swift_syntax.settings', priority='project')
+    return settings
+
+
+def convert(html: str, pipeline: SwiftSyntaxPipeline, spider: SwiftSpider or None = None):
+    spider = spider or SwiftSpider()
+    response = Selector(text=html)
+
+    pipeline.open_spider(spider)
+    try:
+        for item in spider.parse(response):
+            pipeline.process_item(item, spider)
+    finally:
+        pipeline.close_spider(spider)
+
+
+def read(path: str) -> str:
+    if path == '-':
+        return sys.stdin.read()
+    if path.startswith(('http://', 'https://')):
+        with urllib.request.urlopen(path) as response:
+            return response.read().decode(response.headers.get_content_charset() or 'utf-8')
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def main(argv=None):
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description='Convert saved zzSummaryOfTheGrammar.html pages into EBNF.')
+    parser.add_argument('inputs', nargs='*', default=['-'], metavar='FILE',
+                        help='saved grammar summary page or its URL, "-" reads stdin (default)')
+    parser.add_argument('-o', '--output', default=settings.get('GRAMMAR_DIR'),
+                        help='output directory (default: %(default)s); with several inputs, '
+                             'each one is written to a subdirectory named after the file')
+    parser.add_argument('-s', '--set', action='append', default=[], metavar='NAME=VALUE',
+                        help='set or override a setting (may be repeated)')
+    parser.add_argument('--versions', action='store_true',
+                        help='the inputs are consecutive Swift versions: convert each one to a subdirectory named '
+                             'after its version, parse shared definitions once and write versions.json')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log progress and statistics')
+    parser.add_argument('--profile', metavar='FILE', help='dump cProfile stats of the run to FILE')
+    args = parser.parse_args(argv)
+
+    for option in args.set:
+        name, _, value = option.partition('=')
+        settings.set(name, value, priority='cmdline')
+    logging.basicConfig(level=logging.INFO if args.verbose else settings.get('LOG_LEVEL'),
+                        format='%(levelname)s: %(message)s')
+
+    with profile(args.profile):
+        if args.versions:
+            # imported here, the versions module builds on convert
+            from swift_syntax.versions import VersionedGrammar
+            settings.set('GRAMMAR_DIR', args.output, priority='cmdline')
+            grammar = VersionedGrammar(settings)
+            try:
+                for path in args.inputs:
+                    grammar.add(path, read(path))
+            finally:
+                grammar.close()
+            return 0
+        for path in args.inputs:
+            output = args.output
+            if len(args.inputs) > 1:
+                name = 'stdin' if path == '-' else os.path.splitext(os.path.basename(path))[0]
+                output = os.path.join(output, name)
+            settings.set('GRAMMAR_DIR', output, priority='cmdline')
+            spider = SwiftSpider(streaming=settings.getbool('GRAMMAR_STREAMING'))
+            convert(read(path), SwiftSyntaxPipeline.from_settings(settings), spider)
+    return 0
@@ -5,101 +5,678 @@
 
 
 import glob
+import hashlib
+import io
+import json
+import logging
 import os
 import shutil
+from concurrent.futures import Future, ProcessPoolExecutor
 from typing import IO
 
+from scrapy import signals
 from slugify import slugify
-from humps.main import pascalize,  kebabize
+from humps.main import pascalize
 import re
-# useful for handling different item types with a single interface
-from itemadapter import ItemAdapter
 from scrapy import Selector
+from lxml import etree
 
+from parser.artifact import dump_artifact
+from parser.emitters import EbnfEmitter
 from parser.item_parser import Parser
-from swift_syntax.items import SectionItem, VersionItem
+from parser.nodes import Rule
+from parser.optimizer import optimize_grammar
+from parser.passes import merge_char_classes
+from parser.symbols import SymbolTable
+from swift_syntax.cache import DefinitionCache, parser_version
+from swift_syntax import compiler, lexer, profiling
+from swift_syntax.items import PageItem, SectionItem, SyntaxDefItem, VersionItem
+from swift_syntax.xref import CrossReferenceIndex
+
+logger = logging.getLogger(__name__)
 
 suffix = '.ebnf'
 basedir = 'grammar'
+artifact_filename = 'grammar.bin'
+
+
+def section_header(title: str) -> str:
+    title = f'  {title}  '
+    return '\n'.join([
+        '(* ' + len(title) * '-' + ' *)',
+        '(* ' + title + ' *)',
+        '(* ' + len(title) * '-' + ' *)',
+        '\n'
+    ])
+
+
+def section_dirname(title: str) -> str:
+    return slugify(f'  {title}  ')
+
+
+def group_header(title: str) -> str:
+    return '(* ' + title + ' *)\n'
+
+
+def group_filename(title: str) -> str:
+    filename = re.sub(r'Grammar (of)?\s+?(an|a)? ', '', title)
+    filename = slugify(filename) + suffix
+    assert filename
+    return filename
+
+
+def dump_tag(item) -> tuple or str:
+    if isinstance(item, tuple):
+        # the link of a tag only matters to the cross-reference index, which is built before items are dumped
+        return item[:3]
+    if isinstance(item, Selector):
+        return item.extract()
+    return etree.tostring(item, encoding='unicode', with_tail=False)
+
+
+def dump_def(items) -> list[tuple[bool, str or tuple]]:
+    """
+    Serializes the items of a syntax-def into (is_tag, value) pairs that can cross process boundaries. The tuples of
+    well-known tags stay as they are, only tags of other shapes are written out as HTML.
+    """
+    return [(False, item) if isinstance(item, str) else (True, dump_tag(item)) for item in items]
+
+
+def load_def(dumped: list[tuple[bool, str or tuple]]) -> list:
+    return [(tag if isinstance(tag, tuple) else Selector(text=tag).xpath('/html/body/*')[0]) if is_tag else tag
+            for is_tag, tag in dumped]
+
+
+def item_text(item) -> str:
+    if isinstance(item, str):
+        return item
+    if isinstance(item, tuple):
+        return item[2]
+    if isinstance(item, Selector):
+        return item.xpath('string()').get()
+    return item.xpath('string()')
+
+
+def dump_section(item) -> dict:
+    return dict(title=item['title'],
+                groups=[dict(title=group['title'], defs=[dump_def(d) for d in group['defs']])
+                        for group in item['groups']])
+
+
+def convert_tree(items, passes=(), symbols: SymbolTable or None = None) -> Rule:
+    return next(convert_trees([items], passes, Parser(symbols)))
+
+
+def convert_def(items, passes=(), symbols: SymbolTable or None = None) -> str:
+    return EbnfEmitter().emit(convert_tree(items, passes, symbols))
+
+
+def convert_trees(defs, passes=(), parser: Parser or None = None):
+    """
+    Parses many syntax-defs with one parser and runs the passes over their trees, one definition after the other.
+    """
+    for tree in (Parser() if parser is None else parser).parse_trees(defs):
+        for optimization in passes:
+            tree = optimization(tree)
+        yield tree
+
+
+def convert_defs(defs, passes=(), parser: Parser or None = None):
+    emit = EbnfEmitter().emit
+    for tree in convert_trees(defs, passes, parser):
+        yield emit(tree)
+
+
+def convert_section(section: dict, passes=()) -> list[tuple[str, list[str]]]:
+    """
+    Worker side of the parallel mode: parses a dumped section into (group title, EBNF lines) pairs.
+    Definitions that are already plain strings come from the cache and are passed through.
+    """
+    parser = Parser()
+    groups = []
+    for group in section['groups']:
+        lines = convert_defs([load_def(d) for d in group['defs'] if not isinstance(d, str)], passes, parser)
+        groups.append((group['title'], [d if isinstance(d, str) else next(lines) for d in group['defs']]))
+    return groups
+
+
+def settings_passes(settings) -> list:
+    return [merge_char_classes] if settings.getbool('GRAMMAR_MERGE_CHAR_CLASSES') else []
+
+
+def cache_version(passes) -> str:
+    # lines converted with other passes must not be mixed up
+    return '+'.join([parser_version()] + [optimization.__name__ for optimization in passes])
+
 
 class SwiftSyntaxPipeline():
-    def __init__(self):
+    def __init__(self, basedir=basedir, workers=0, cache_dir=None, cache_max_entries=100000, incremental=False,
+                 manifest=None, echo=False, timers=False, passes=(), optimize=False, roots=None,
+                 parser_module=None, lexer_module=None, lexer_section='Lexical Structure', artifact=False, xref=None,
+                 stats=None, shared_cache=None):
         super().__init__()
+        self.basedir = basedir
+        self.passes = list(passes)
+        self.optimize = optimize
+        self.roots = roots
+        self.parser_module = parser_module
+        self.lexer_module = lexer_module
+        self.lexer_section = lexer_section
+        self.artifact = artifact
+        self.xref = xref
+        self.timers = timers
+        self.echo = echo
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.cache_max_entries = cache_max_entries
+        self.incremental = incremental
+        self.manifest = manifest
+        self.stats = stats
         self.index: IO or None = None
+        self.written: dict[str, str] = {}
+        self.executor: ProcessPoolExecutor or None = None
+        self.cache: DefinitionCache or None = None
+        # a cache that outlives this pipeline, such as the one of a multi-version run, is used but not closed
+        self.shared_cache = shared_cache
+        self.pending: list[str or tuple[str, Future, list]] = []
+        self.grammar_name = ''
+        self.header = ''
+        self.definitions: list[tuple[str, list]] = []
+        self.stream_section: str or None = None
+        self.stream_dirname: str or None = None
+        self.stream_files: list[str] = []
+        self.stream_group: str or None = None
+        self.stream_path: str or None = None
+        self.stream_file: IO or None = None
+
+        if timers:
+            # patch before Scrapy binds process_item and the spider callbacks
+            profiling.reset()
+            profiling.enable()
+
+    @property
+    def collects(self) -> bool:
+        # the whole grammar is only kept for the outputs that need all of it
+        return bool(self.optimize or self.parser_module or self.lexer_module or self.artifact)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls.from_settings(crawler.settings, stats=crawler.stats)
+        if pipeline.timers:
+            crawler.signals.connect(pipeline.response_received, signal=signals.response_received)
+        return pipeline
+
+    @classmethod
+    def from_settings(cls, settings, stats=None, shared_cache=None):
+        return cls(basedir=settings.get('GRAMMAR_DIR', basedir),
+                   workers=settings.getint('GRAMMAR_WORKERS'),
+                   cache_dir=settings.get('GRAMMAR_CACHE_DIR'),
+                   cache_max_entries=settings.getint('GRAMMAR_CACHE_MAX_ENTRIES', 100000),
+                   incremental=settings.getbool('GRAMMAR_INCREMENTAL'),
+                   manifest=settings.get('GRAMMAR_MANIFEST'),
+                   echo=settings.getbool('GRAMMAR_ECHO'),
+                   timers=settings.getbool('GRAMMAR_TIMERS'),
+                   passes=settings_passes(settings),
+                   optimize=settings.getbool('GRAMMAR_OPTIMIZE'),
+                   roots=settings.getlist('GRAMMAR_OPTIMIZE_ROOTS') or None,
+                   parser_module=settings.get('GRAMMAR_PARSER_MODULE'),
+                   lexer_module=settings.get('GRAMMAR_LEXER_MODULE'),
+                   lexer_section=settings.get('GRAMMAR_LEXER_SECTION', 'Lexical Structure'),
+                   artifact=settings.getbool('GRAMMAR_ARTIFACT'),
+                   xref=settings.get('GRAMMAR_XREF'),
+                   stats=stats,
+                   shared_cache=shared_cache)
 
     def open_spider(self, spider):
-        files = glob.glob(f'{basedir}/*')
-        for f in files:
-            try:
-                os.remove(f)
-            except PermissionError:
-                shutil.rmtree(f)
+        os.makedirs(self.basedir, exist_ok=True)
+        if not self.incremental:
+            files = glob.glob(f'{self.basedir}/*')
+            for f in files:
+                try:
+                    os.remove(f)
+                except (PermissionError, IsADirectoryError):
+                    shutil.rmtree(f)
 
-        self.index = open(os.path.join(basedir, 'index' + suffix), 'w')
+        self.written = {}
+        self.index = io.StringIO()
+        self.grammar_name = ''
+        self.header = ''
+        self.definitions = []
+        # one name for every spelling of a rule, shared by all definitions of the run
+        self.symbols = SymbolTable()
+        # parses every definition of the run
+        self.parser = Parser(self.symbols)
+        self.references = CrossReferenceIndex(self.symbols) if self.xref else None
+        if self.parser_module and compiler.tatsu is None:
+            raise ImportError('GRAMMAR_PARSER_MODULE needs TatSu: pip install TatSu')
+        if self.workers > 0 and getattr(spider, 'streaming', False):
+            # definitions arrive one at a time and are written as they come, there are no sections to hand out
+            logger.warning('GRAMMAR_WORKERS is ignored with GRAMMAR_STREAMING, definitions are converted in the '
+                           'spider process')
+        elif self.workers > 0:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        if self.collects and getattr(spider, 'streaming', False):
+            # the outputs built from the whole grammar keep every definition until the spider closes
+            outputs = [name for name, on in [('GRAMMAR_OPTIMIZE', self.optimize),
+                                             ('GRAMMAR_PARSER_MODULE', self.parser_module),
+                                             ('GRAMMAR_LEXER_MODULE', self.lexer_module),
+                                             ('GRAMMAR_ARTIFACT', self.artifact)] if on]
+            logger.warning(f'{", ".join(outputs)} keep every definition in memory, GRAMMAR_STREAMING does not keep '
+                           f'memory use flat with them')
+        if self.shared_cache is not None:
+            self.cache = self.shared_cache
+        elif self.cache_dir:
+            self.cache = DefinitionCache(self.cache_dir, max_entries=self.cache_max_entries,
+                                         version=cache_version(self.passes))
 
     def close_spider(self, spider):
-        self.index.close()
+        try:
+            self.flush_pending()
+            self.close_stream_section()
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+                self.executor = None
+            if self.cache is self.shared_cache:
+                self.cache = None
+            elif self.cache is not None:
+                self.close_cache()
+        self.write_file('index' + suffix, self.index.getvalue())
+        if self.collects:
+            trees = list(zip([section for section, _ in self.definitions],
+                             convert_trees([d for _, d in self.definitions], self.passes, self.parser)))
+            if self.optimize or self.parser_module:
+                rules, report = optimize_grammar([tree for _, tree in trees], self.roots)
+                if self.optimize:
+                    self.write_optimized(rules, report)
+                if self.parser_module:
+                    self.write_parser(rules, report)
+            if self.lexer_module:
+                self.write_lexer([tree for section, tree in trees if section == self.lexer_section])
+            if self.artifact:
+                self.write_artifact(trees)
+        if self.references is not None:
+            self.write_xref()
+        if self.incremental:
+            self.write_manifest(self.remove_stale())
+        if self.timers:
+            self.close_timers()
+
+    @staticmethod
+    def response_received(response, request, spider):
+        if 'download_latency' in request.meta:
+            profiling.record('download', request.meta['download_latency'])
+
+    def close_timers(self):
+        totals = profiling.report(self.stats)
+        profiling.disable()
+        for name, (calls, seconds) in sorted(totals.items(), key=lambda total: -total[1][1]):
+            logger.info(f'{name}: {calls} calls, {seconds:.3f}s')
+
+    def log(self, text: str = ''):
+        if self.echo:
+            print(text)
+        if text:
+            logger.debug(text.strip())
+
+    @staticmethod
+    def file_digest(path: str) -> str or None:
+        digest = hashlib.sha256()
+        try:
+            with open(path, 'rb') as file:
+                for chunk in iter(lambda: file.read(1 << 16), b''):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            return None
+        return digest.hexdigest()
+
+    def write_file(self, path: str, content: str or bytes):
+        """
+        Writes a file relative to the output directory. In incremental mode, files whose content is unchanged
+        are left alone and the others are replaced atomically.
+        """
+        full_path = os.path.join(self.basedir, path)
+        mode = 'wb' if isinstance(content, bytes) else 'w'
+        if not self.incremental:
+            with open(full_path, mode) as file:
+                file.write(content)
+            return
+
+        data = content if isinstance(content, bytes) else content.encode()
+        try:
+            with open(full_path, mode.replace('w', 'r')) as file:
+                existing = file.read()
+            existing = existing if isinstance(existing, bytes) else existing.encode()
+            status = 'unchanged' if existing == data else 'changed'
+        except FileNotFoundError:
+            status = 'added'
+        self.written[path] = status
+        if status == 'unchanged':
+            return
+        tmp_path = full_path + '.tmp'
+        with open(tmp_path, mode) as file:
+            file.write(content)
+        os.replace(tmp_path, full_path)
+
+    def remove_stale(self) -> list[str]:
+        removed = []
+        manifest = os.path.abspath(self.manifest) if self.manifest else None
+        for root, dirs, files in os.walk(self.basedir, topdown=False):
+            for name in files:
+                full_path = os.path.join(root, name)
+                path = os.path.relpath(full_path, self.basedir)
+                if name.startswith('.') or path in self.written or os.path.abspath(full_path) == manifest:
+                    continue
+                os.remove(full_path)
+                removed.append(path)
+            if root != self.basedir and not os.listdir(root):
+                os.rmdir(root)
+        return sorted(removed)
+
+    def write_manifest(self, removed: list[str]):
+        manifest = dict(
+            added=sorted(path for path, status in self.written.items() if status == 'added'),
+            changed=sorted(path for path, status in self.written.items() if status == 'changed'),
+            removed=removed,
+        )
+        for status, paths in manifest.items():
+            for path in paths:
+                logger.info(f'{status}: {path}')
+            if self.stats is not None:
+                self.stats.set_value(f'grammar/files_{status}', len(paths))
+        logger.info(f'Grammar files: {len(manifest["added"])} added, {len(manifest["changed"])} changed, '
+                    f'{len(manifest["removed"])} removed')
+        if self.manifest:
+            with open(self.manifest, 'w') as file:
+                json.dump(manifest, file, indent=2)
+                file.write('\n')
+
+    def close_cache(self):
+        hits, misses = self.cache.hits, self.cache.misses
+        self.cache.close()
+        self.cache = None
+        logger.info(f'Definition cache: {hits} hits, {misses} misses')
+        if self.stats is not None:
+            self.stats.set_value('grammar/cache_hits', hits)
+            self.stats.set_value('grammar/cache_misses', misses)
 
     def process_item(self, item, spider):
-        adapter = ItemAdapter(item)
         if isinstance(item, VersionItem):
             version = item.get('name')
             version = pascalize(slugify(version))
-            self.index.write(f'@@grammar :: {version}\n')
-            self.index.write(r'@@comments :: /\(\*((?:.|\n)*?)\*\)/' + '\n')
-            self.index.write('\n')
+            self.grammar_name = version
+            self.header = f'@@grammar :: {version}\n' + r'@@comments :: /\(\*((?:.|\n)*?)\*\)/' + '\n\n'
+            self.write_index(self.header)
 
-        elif adapter.is_item_class(SectionItem):
-            dirname = self.parse_section(item)
+        elif isinstance(item, SectionItem):
+            if self.references is not None:
+                dirname = section_dirname(item['title'])
+                for group in item['groups']:
+                    path = os.path.join(dirname, group_filename(group['title']))
+                    for d in group['defs']:
+                        self.references.add(item['title'], group['title'], path, d)
+            if self.collects:
+                self.definitions.extend((item['title'], d) for group in item['groups'] for d in group['defs'])
+            if self.executor is not None:
+                self.submit_section(item)
+            else:
+                dirname = self.parse_section(item)
+                self.write_index('#include :: "{}"\n'.format(os.path.join(dirname, '_index' + suffix)))
 
-            self.index.write('#include :: "{}"\n'.format(os.path.join(dirname, '_index' + suffix)))
+        elif isinstance(item, SyntaxDefItem):
+            if self.references is not None:
+                path = os.path.join(section_dirname(item['section']), group_filename(item['group']))
+                self.references.add(item['section'], item['group'], path, item['items'])
+            if self.collects:
+                self.definitions.append((item['section'], item['items']))
+            self.stream_def(item)
 
         return item
 
-    def parse_section(self, item):
-        title = f'  {item["title"]}  '
-        header = '\n'.join([
-            '(* ' + len(title) * '-' + ' *)',
-            '(* ' + title + ' *)',
-            '(* ' + len(title) * '-' + ' *)',
-            '\n'
-        ])
-        print(header)
-
-        dirname = slugify(title)
-        os.makedirs(os.path.join(basedir, dirname))
+    def write_optimized(self, rules: list[Rule], report):
+        """
+        Writes the whole grammar, optimized as one, next to the literal grammar and reports what changed.
+        """
+        for line in report.lines():
+            logger.info(f'optimizer: {line}')
+        if self.stats is not None:
+            self.stats.set_value('grammar/optimizer/merged_rules', len(report.merged_rules))
+            self.stats.set_value('grammar/optimizer/unreachable_rules', len(report.unreachable_rules))
+            self.stats.set_value('grammar/optimizer/duplicate_alternatives', report.duplicate_alternatives)
+            self.stats.set_value('grammar/optimizer/factored_prefixes', report.factored_prefixes)
+
+        emitter = EbnfEmitter()
+        content = [self.header] + [f'(* {line} *)\n' for line in report.lines()] + ['\n']
+        content += [emitter.emit(rule) + '\n' for rule in rules]
+        self.write_file('optimized' + suffix, ''.join(content))
+
+    def write_parser(self, rules: list[Rule], report):
+        """
+        Compiles the optimized grammar with TatSu into a parser module and a pickled model.
+        """
+        grammar = compiler.tatsu_grammar(rules, self.grammar_name or 'Swift', report.undefined_rules)
+        path = compiler.compile_parser(grammar, self.parser_module)
+        logger.info(f'compiled parser: {self.parser_module}, model: {path}')
+
+    def write_lexer(self, rules: list[Rule]):
+        """
+        Generates the lexer module from the rules of the lexical structure section.
+        """
+        if not rules:
+            logger.warning(f'no definitions in section {self.lexer_section!r}, the lexer only has fallbacks')
+        lexer.write_lexer(self.lexer_module, rules, self.grammar_name or 'Swift')
+        logger.info(f'generated lexer: {self.lexer_module}')
+
+    def write_artifact(self, trees: list[tuple[str, Rule]]):
+        """
+        Writes the whole grammar as one binary file that readers memory-map instead of parsing the EBNF files.
+        """
+        self.write_file(artifact_filename, dump_artifact(trees))
+        logger.info(f'grammar artifact: {os.path.join(self.basedir, artifact_filename)}')
+
+    def write_xref(self):
+        self.write_file(self.xref, self.references.dump(self.xref))
+        if self.stats is not None:
+            self.stats.set_value('grammar/xref_rules', len(self.references.rules))
+        logger.info(f'cross-reference index of {len(self.references.rules)} rules: '
+                    f'{os.path.join(self.basedir, self.xref)}')
+
+    def write_index(self, text: str):
+        # keep the index in item order while sections are still being converted
+        if self.pending:
+            self.pending.append(text)
+        else:
+            self.index.write(text)
+
+    def submit_section(self, item):
+        section = dump_section(item)
+        keys = []
+        if self.cache is not None:
+            for group in section['groups']:
+                for idx, dumped in enumerate(group['defs']):
+                    key = self.cache.key(dumped)
+                    line = self.cache.get(key)
+                    if line is None:
+                        keys.append(key)
+                    else:
+                        group['defs'][idx] = line
+                        keys.append(None)
+        self.pending.append((item['title'], self.executor.submit(convert_section, section, self.passes), keys))
+
+    def flush_pending(self):
+        pending, self.pending = self.pending, []
+        for entry in pending:
+            if isinstance(entry, str):
+                self.index.write(entry)
+                continue
+            title, future, keys = entry
+            groups = future.result()
+            if keys:
+                lines = (line for _, group_lines in groups for line in group_lines)
+                for key, line in zip(keys, lines):
+                    if key is not None:
+                        self.cache.put(key, line)
+            dirname = self.write_section(title, groups)
+            self.index.write('#include :: "{}"\n'.format(os.path.join(dirname, '_index' + suffix)))
+
+    def write_section(self, title: str, groups) -> str:
+        header = section_header(title)
+        self.log(header)
+
+        dirname = section_dirname(title)
+        os.makedirs(os.path.join(self.basedir, dirname), exist_ok=True)
 
         files = []
-        for group in item['groups']:
-            files.append(self.parse_group(group, dirname))
+        for group_title, lines in groups:
+            header_ = group_header(group_title)
+            self.log()
+            self.log(header_)
+            filename = group_filename(group_title)
+            content = [header_ + '\n']
+            for line in lines:
+                content.append(line + '\n')
+                self.log(line)
+            self.write_file(os.path.join(dirname, filename), ''.join(content))
+            self.log()
+            files.append(filename)
 
-        include_file = os.path.join(basedir, dirname, '_index' + suffix)
-        with open(include_file, 'w') as includes:
-            includes.write(header)
-            includes.writelines(map(lambda filename: f'#include :: "{filename}"\n', files))
+        includes = [header] + [f'#include :: "{filename}"\n' for filename in files]
+        self.write_file(os.path.join(dirname, '_index' + suffix), ''.join(includes))
         return dirname
 
-    def parse_group(self, item, dirname):
-        title = f'{item["title"]}'
-        header = '(* ' + title + ' *)\n'
-        print()
-        print(header)
-
-        filename = re.sub(r'Grammar (of)?\s+?(an|a)? ', '', title)
-        filename = slugify(filename) + suffix
-        assert filename
-        path = os.path.join(basedir, dirname, filename)
-        with open(path, 'w') as file:
-            file.write(header + '\n')
-            for definition in item['defs']:
-                self.parse_def(definition, file)
-
-        print()
-
-        return filename
-
-    def parse_def(self, item: Selector, file: IO):
-        parser = Parser()
-        line = parser.parse(item)
-        file.write(str(line) + '\n')
-        print(line)
+    def stream_def(self, item):
+        """
+        Writes a single definition to the file of its group, which stays open until the group changes.
+        """
+        if item['section'] != self.stream_section:
+            self.close_stream_section()
+            self.stream_section = item['section']
+            self.stream_dirname = section_dirname(self.stream_section)
+            self.log(section_header(self.stream_section))
+            os.makedirs(os.path.join(self.basedir, self.stream_dirname), exist_ok=True)
+            self.write_index('#include :: "{}"\n'.format(os.path.join(self.stream_dirname, '_index' + suffix)))
+
+        if item['group'] != self.stream_group:
+            self.close_stream_group()
+            self.stream_group = item['group']
+            header = group_header(self.stream_group)
+            self.log()
+            self.log(header)
+            filename = group_filename(self.stream_group)
+            self.stream_files.append(filename)
+            self.stream_path = os.path.join(self.stream_dirname, filename)
+            full_path = os.path.join(self.basedir, self.stream_path)
+            # in incremental mode the group is compared with the existing file once it is complete
+            self.stream_file = open(full_path + '.tmp' if self.incremental else full_path, 'w')
+            self.stream_file.write(header + '\n')
+
+        line = self.parse_def(item['items'])
+        self.stream_file.write(line + '\n')
+        self.log(line)
+
+    def close_stream_group(self):
+        if self.stream_file is None:
+            return
+        self.stream_file.close()
+        self.stream_file = None
+        self.stream_group = None
+        self.log()
+        if not self.incremental:
+            return
+
+        full_path = os.path.join(self.basedir, self.stream_path)
+        existing = self.file_digest(full_path)
+        if existing is None:
+            self.written[self.stream_path] = 'added'
+        elif existing == self.file_digest(full_path + '.tmp'):
+            self.written[self.stream_path] = 'unchanged'
+            os.remove(full_path + '.tmp')
+            return
+        else:
+            self.written[self.stream_path] = 'changed'
+        os.replace(full_path + '.tmp', full_path)
+
+    def close_stream_section(self):
+        self.close_stream_group()
+        if self.stream_section is None:
+            return
+        includes = [section_header(self.stream_section)]
+        includes += [f'#include :: "{filename}"\n' for filename in self.stream_files]
+        self.write_file(os.path.join(self.stream_dirname, '_index' + suffix), ''.join(includes))
+        self.stream_section = None
+        self.stream_files = []
+
+    def parse_section(self, item):
+        groups = [(group['title'], self.parse_group(group)) for group in item['groups']]
+        return self.write_section(item['title'], groups)
+
+    def parse_group(self, item):
+        if self.cache is None:
+            yield from convert_defs(item['defs'], self.passes, self.parser)
+            return
+        for definition in item['defs']:
+            yield self.parse_def(definition)
+
+    def parse_def(self, item: Selector) -> str:
+        if self.cache is None:
+            return self.convert_def(item)
+
+        key = self.cache.key(dump_def(item))
+        line = self.cache.get(key)
+        if line is None:
+            line = self.convert_def(item)
+            self.cache.put(key, line)
+        return line
+
+    def convert_def(self, item: Selector) -> str:
+        return next(convert_defs([item], self.passes, self.parser))
+
+
+class SwiftSitesPipeline(SwiftSyntaxPipeline):
+    """
+    Pipeline of the sites spider. Its pages arrive in no particular order, so they are kept until the crawl is done
+    and then converted in the order of their URLs. A grammar block that an earlier page already had, like a chapter
+    that the grammar summary repeats, is left out, and sections of the same title on several pages become one.
+    """
+
+    def open_spider(self, spider):
+        super().open_spider(spider)
+        self.pages = []
+
+    def process_item(self, item, spider):
+        if isinstance(item, PageItem):
+            self.pages.append(item)
+            return item
+        return super().process_item(item, spider)
+
+    def close_spider(self, spider):
+        try:
+            for item in self.page_items():
+                super().process_item(item, spider)
+        finally:
+            super().close_spider(spider)
+
+    def page_items(self):
+        pages = sorted(self.pages, key=lambda page: page['url'])
+        self.pages = []
+        version = next((page['version'] for page in pages if page['version']), None)
+        if version:
+            yield VersionItem(name=version)
+        sections: dict[str, list] = {}
+        seen = set()
+        for page in pages:
+            for section in page['sections']:
+                groups = sections.setdefault(section['title'], [])
+                for group in section['groups']:
+                    # links point elsewhere on every page, so blocks are told apart by their text
+                    key = (group['title'], tuple(tuple(map(item_text, d)) for d in group['defs']))
+                    if key not in seen:
+                        seen.add(key)
+                        groups.append(group)
+        if self.stats is not None:
+            self.stats.set_value('grammar/pages', len(pages))
+            self.stats.set_value('grammar/duplicate_groups',
+                                 sum(len(s['groups']) for page in pages for s in page['sections']) - len(seen))
+        for title, groups in sections.items():
+            if groups:
+                yield SectionItem(title=title, groups=groups)
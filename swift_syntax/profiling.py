@@ -0,0 +1,126 @@
+"""
+Opt-in timers and call counters for the conversion stages.
+
+enable() wraps the instrumented methods in place and disable() puts the originals back, so nothing is
+measured, and nothing costs anything, unless timers are switched on. Times are inclusive: a stage that calls
+another one also counts the time spent in it. Generators are timed per step, so consumers are not counted.
+"""
+import cProfile
+import importlib
+import inspect
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+targets = [
+    ('swift_syntax.spiders.swift', 'SwiftSpider', 'parse'),
+    ('swift_syntax.spiders.swift', 'SwiftSpider', 'parse_section'),
+    ('swift_syntax.spiders.swift', 'SwiftSpider', 'parse_section_defs'),
+    ('swift_syntax.spiders.swift', 'SwiftSpider', 'parse_admonition_grammar'),
+    ('swift_syntax.spiders.swift', 'SwiftSpider', 'parse_syntax_def'),
+    ('parser.item_tokenizer', 'Tokenizer', 'get_next_token'),
+    ('parser.item_parser', 'Parser', 'parse'),
+    ('parser.string_parser', 'StringParser', 'parse'),
+    ('swift_syntax.pipelines', 'SwiftSyntaxPipeline', 'process_item'),
+    ('swift_syntax.pipelines', 'SwiftSyntaxPipeline', 'write_file'),
+    ('swift_syntax.pipelines', 'SwiftSyntaxPipeline', 'close_stream_group'),
+    ('swift_syntax.pipelines', 'SwiftSyntaxPipeline', 'write_optimized'),
+    ('swift_syntax.pipelines', 'SwiftSyntaxPipeline', 'write_parser'),
+    ('swift_syntax.pipelines', 'SwiftSyntaxPipeline', 'write_lexer'),
+    ('swift_syntax.pipelines', 'SwiftSyntaxPipeline', 'write_artifact'),
+]
+
+totals: dict[str, list] = {}
+_originals: list[tuple[type, str, object]] = []
+
+
+def record(name: str, seconds: float, calls: int = 1):
+    total = totals.setdefault(name, [0, 0.0])
+    total[0] += calls
+    total[1] += seconds
+
+
+def _timed(name: str, func):
+    if inspect.isgeneratorfunction(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            generator = func(*args, **kwargs)
+            elapsed = 0.0
+            try:
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        item = next(generator)
+                    except StopIteration:
+                        return
+                    finally:
+                        elapsed += time.perf_counter() - start
+                    yield item
+            finally:
+                record(name, elapsed)
+    else:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+    return wrapper
+
+
+def enable():
+    if _originals:
+        return
+    for module, class_name, method in targets:
+        cls = getattr(importlib.import_module(module), class_name)
+        original = cls.__dict__[method]
+        name = f'{class_name}.{method}'
+        if isinstance(original, staticmethod):
+            replacement = staticmethod(_timed(name, original.__func__))
+        else:
+            replacement = _timed(name, original)
+        _originals.append((cls, method, original))
+        setattr(cls, method, replacement)
+
+
+def disable():
+    while _originals:
+        cls, method, original = _originals.pop()
+        setattr(cls, method, original)
+
+
+def enabled() -> bool:
+    return bool(_originals)
+
+
+def reset():
+    totals.clear()
+
+
+def report(stats=None, prefix='timers') -> dict[str, list]:
+    """
+    Copies the totals into a Scrapy stats collector, as <prefix>/<stage>/calls and <prefix>/<stage>/seconds.
+    """
+    if stats is not None:
+        for name, (calls, seconds) in totals.items():
+            stats.set_value(f'{prefix}/{name}/calls', calls)
+            stats.set_value(f'{prefix}/{name}/seconds', round(seconds, 6))
+    return dict(totals)
+
+
+@contextmanager
+def profile(path: str or None):
+    """
+    Runs the block under cProfile and dumps the stats to `path`, or does nothing when no path is given.
+    """
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
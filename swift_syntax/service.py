@@ -0,0 +1,290 @@
+"""
+Parses trees of Swift source files with the generated grammar in a pool of worker processes.
+
+Every worker reads the grammar once, when it starts, and then parses one file after the other. One JSON line
+per file is written as soon as its result comes back, in the order the files finish. A file that takes longer
+than its time budget, or that runs out of its memory budget, is reported as an error instead of
+holding up the run.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import resource
+except ImportError:  # not available on Windows, which then runs without a memory budget
+    resource = None
+
+from parser.artifact import GrammarArtifact, is_artifact
+from parser.ebnf_parser import read_grammar
+from parser.peg import ParseError, ParseTimeout, PegParser
+from swift_syntax.offline import get_settings
+from swift_syntax.pipelines import section_dirname
+from swift_syntax.profiling import profile
+
+logger = logging.getLogger(__name__)
+
+# the start rule of the Swift grammar, and of grammars that only go as far as statements
+start_rules = ['top_level_declaration', 'statements']
+
+# every statement of a file nests a little deeper in right recursive rules like statements, four frames each
+recursion_limit = 100000
+# bytes of C stack a frame of the parser takes: about 400 before Python 3.11, where every Python call is a C call
+# too, next to none since
+frame_size = 1024
+# bytes of C stack of the thread files are parsed in, enough for recursion_limit frames
+stack_size = recursion_limit * frame_size
+
+_parser: PegParser or None = None
+_start: str or None = None
+_timeout: float or None = None
+# bytes of address space one file may add to its worker
+_memory: int or None = None
+# the thread with the deep stack that parses the files of this process, started once
+_parse_thread: ThreadPoolExecutor or None = None
+
+
+def load_parser(grammar_path: str, lexical_section: str = 'Lexical Structure', memo_size: int = 100000) -> PegParser:
+    """
+    Reads the EBNF files of a grammar directory, or the binary grammar artifact, the rules of the lexical section
+    become tokens.
+    """
+    if is_artifact(grammar_path):
+        with GrammarArtifact(grammar_path) as grammar:
+            rules = grammar.rules()
+            lexical = {name for name in grammar if grammar.section(name) == lexical_section}
+        return PegParser(rules, lexical, memo_size=memo_size)
+    rules = read_grammar(grammar_path)
+    prefix = section_dirname(lexical_section) + os.sep
+    lexical = {rule.name for path, rule in rules if path.startswith(prefix)}
+    return PegParser([rule for _, rule in rules], lexical, memo_size=memo_size)
+
+
+def setup(grammar_path: str, lexical_section: str, start: str or None, timeout: float or None,
+          memo_size: int = 100000):
+    global _parser, _start, _timeout
+    _parser = load_parser(grammar_path, lexical_section, memo_size)
+    _start = start or next((name for name in start_rules if name in _parser.rules), None)
+    if _start is None:
+        raise ValueError(f'The grammar has none of the start rules {", ".join(start_rules)}')
+    _timeout = timeout
+
+
+def init_worker(grammar_path: str, lexical_section: str, start: str or None, timeout: float or None,
+                memory: int or None, memo_size: int = 100000):
+    global _memory, _parse_thread
+    setup(grammar_path, lexical_section, start, timeout, memo_size)
+    _memory = memory * 1024 * 1024 if memory else None
+    # a forked worker has the parse thread of its parent in name only, threads are not copied
+    _parse_thread = None
+    # the limit is the same for every thread of the worker, only the parse thread has the stack to go that deep
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), recursion_limit))
+
+
+def address_space() -> int or None:
+    """
+    Bytes of address space this process has mapped, None where /proc does not tell.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@contextmanager
+def memory_budget(budget: int or None):
+    """
+    Lets the process map at most `budget` bytes more than it already has, until the block is left. What earlier
+    files left behind is part of the base, so a large file does not take away from the budget of the next one.
+    """
+    used = address_space() if budget and resource is not None else None
+    if used is None:
+        yield
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = used + budget
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def failure(path: str, kind: str, message: str, **details) -> dict:
+    return {'path': path, 'ok': False, 'bytes': 0, 'lines': 0, 'seconds': 0.0,
+            'error': {'kind': kind, 'message': message, **details}}
+
+
+def parse_file(path: str) -> dict:
+    """
+    Parses one file with the grammar of this process and describes the outcome in a JSON serializable dict.
+    """
+    record = {'path': path, 'ok': False, 'bytes': 0, 'lines': 0, 'seconds': 0.0, 'error': None}
+    started = time.perf_counter()
+    try:
+        with memory_budget(_memory):
+            with open(path, 'rb') as f:
+                data = f.read()
+            record['bytes'] = len(data)
+            source = data.decode('utf-8')
+            record['lines'] = source.count('\n') + (not source.endswith('\n') and bool(source))
+            _parser.parse(source, _start, _timeout)
+        record['ok'] = True
+    except ParseError as e:
+        record['error'] = {'kind': 'syntax', 'message': str(e), 'offset': e.offset, 'line': e.line,
+                           'column': e.column, 'expected': e.expected}
+    except ParseTimeout as e:
+        record['error'] = {'kind': 'timeout', 'message': str(e)}
+    except MemoryError:
+        record['error'] = {'kind': 'memory', 'message': 'parsing ran out of the memory budget'}
+    except RecursionError:
+        record['error'] = {'kind': 'recursion', 'message': 'the source nests too deeply'}
+    except (OSError, UnicodeDecodeError) as e:
+        record['error'] = {'kind': 'read', 'message': str(e)}
+    record['seconds'] = round(time.perf_counter() - started, 6)
+    return record
+
+
+def parse_thread() -> ThreadPoolExecutor:
+    """
+    The thread of this process with a stack of stack_size bytes, started on first use and kept for later files.
+    """
+    global _parse_thread
+    if _parse_thread is None:
+        executor = ThreadPoolExecutor(1, thread_name_prefix='parse')
+        previous_size = threading.stack_size(stack_size)
+        try:
+            # the thread starts with the first task and keeps the stack size it started with
+            executor.submit(int).result()
+        finally:
+            threading.stack_size(previous_size)
+        _parse_thread = executor
+    return _parse_thread
+
+
+def parse_deep(path: str) -> dict:
+    """
+    Parses one file like parse_file, in the parse thread. The recursion limit is process wide, whoever raises it
+    to recursion_limit must not recurse that deep in any other thread.
+    """
+    return parse_thread().submit(parse_file, path).result()
+
+
+def find_sources(paths: list[str]):
+    """
+    Yields the given files and every .swift file below the given directories, in a stable order.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for directory, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.endswith('.swift'):
+                    yield os.path.join(directory, filename)
+
+
+def parse_files(paths, grammar_path: str, lexical_section: str = 'Lexical Structure', start: str or None = None,
+                timeout: float or None = None, memory: int or None = None, workers: int = 0, memo_size: int = 100000):
+    """
+    Yields the record of every file as it is parsed. With no workers the files are parsed in this process,
+    without a memory budget, and the recursion limit of the process is raised until the last one is yielded.
+    """
+    if not workers:
+        setup(grammar_path, lexical_section, start, timeout, memo_size)
+        previous_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(previous_limit, recursion_limit))
+        try:
+            yield from map(parse_deep, paths)
+        finally:
+            sys.setrecursionlimit(previous_limit)
+        return
+
+    initargs = (grammar_path, lexical_section, start, timeout, memory, memo_size)
+    paths = iter(paths)
+    # a few files queued per worker keep them busy without reading the whole directory tree up front
+    window = 4 * workers
+    pending = {}
+    executor = ProcessPoolExecutor(workers, initializer=init_worker, initargs=initargs)
+    try:
+        while True:
+            for path in itertools.islice(paths, window - len(pending)):
+                pending[executor.submit(parse_deep, path)] = path
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    yield future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    yield failure(path, 'crash', 'the worker process died')
+            if broken:
+                # the files still in flight went down with the pool, the rest get a new one
+                for path in pending.values():
+                    yield failure(path, 'crash', 'the worker process died')
+                pending.clear()
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(workers, initializer=init_worker, initargs=initargs)
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    settings = get_settings()
+
+    arg_parser = argparse.ArgumentParser(description='Parse Swift source files with the generated grammar.')
+    arg_parser.add_argument('inputs', nargs='+', metavar='PATH', help='.swift file or directory searched for them')
+    arg_parser.add_argument('-g', '--grammar', default=os.path.join(settings.get('GRAMMAR_DIR'), 'index.ebnf'),
+                            help='index.ebnf or grammar.bin of the generated grammar (default: %(default)s)')
+    arg_parser.add_argument('-o', '--output', default='-', help='JSON lines file, "-" writes stdout (default)')
+    arg_parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                            help='worker processes, 0 parses in this process (default: %(default)s)')
+    arg_parser.add_argument('--start', help=f'start rule (default: the first of {", ".join(start_rules)})')
+    arg_parser.add_argument('--timeout', type=float, default=settings.getfloat('GRAMMAR_PARSE_TIMEOUT'),
+                            help='seconds per file, 0 for no limit (default: %(default)s)')
+    arg_parser.add_argument('--memory', type=int, default=settings.getint('GRAMMAR_PARSE_MEMORY'),
+                            help='MB of address space a worker may add for one file, 0 for no limit '
+                                 '(default: %(default)s)')
+    arg_parser.add_argument('--memo-size', type=int, default=settings.getint('GRAMMAR_PARSE_MEMO_SIZE'),
+                            help='rule results memoized per file, 0 turns memoization off (default: %(default)s)')
+    arg_parser.add_argument('--lexical-section', default=settings.get('GRAMMAR_LEXER_SECTION'),
+                            help='section whose rules are tokens (default: %(default)s)')
+    arg_parser.add_argument('-v', '--verbose', action='store_true', help='log a summary of the run')
+    arg_parser.add_argument('--profile', metavar='FILE', help='dump cProfile stats of the run to FILE')
+    args = arg_parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else settings.get('LOG_LEVEL'),
+                        format='%(levelname)s: %(message)s')
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    files = failed = size = 0
+    started = time.perf_counter()
+    try:
+        with profile(args.profile):
+            for record in parse_files(find_sources(args.inputs), args.grammar, args.lexical_section, args.start,
+                                      args.timeout or None, args.memory or None, args.workers, args.memo_size):
+                output.write(json.dumps(record) + '\n')
+                files += 1
+                failed += not record['ok']
+                size += record['bytes']
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    seconds = time.perf_counter() - started
+    logger.info(f'{files} files, {failed} failed, {size / 1e6:.2f} MB in {seconds:.2f} s')
+    return 1 if failed else 0
@@ -12,6 +12,9 @@ BOT_NAME = 'swift_syntax'
 SPIDER_MODULES = ['swift_syntax.spiders']
 NEWSPIDER_MODULE = 'swift_syntax.spiders'
 
+# scrapy warmup fills the HTTP cache without converting anything
+COMMANDS_MODULE = 'swift_syntax.commands'
+
 
 # Crawl responsibly by identifying yourself (and your website) on the user-agent
 #USER_AGENT = 'swift_syntax (+http://www.yourdomain.com)'
@@ -20,14 +23,15 @@ NEWSPIDER_MODULE = 'swift_syntax.spiders'
 ROBOTSTXT_OBEY = False
 
 # Configure maximum concurrent requests performed by Scrapy (default: 16)
-#CONCURRENT_REQUESTS = 32
+# The sites spider fetches many small pages, mostly from one mirror
+CONCURRENT_REQUESTS = 32
 
 # Configure a delay for requests for the same website (default: 0)
 # See https://docs.scrapy.org/en/latest/topics/settings.html#download-delay
 # See also autothrottle settings and docs
 #DOWNLOAD_DELAY = 3
 # The download delay setting will honor only one of:
-#CONCURRENT_REQUESTS_PER_DOMAIN = 16
+CONCURRENT_REQUESTS_PER_DOMAIN = 16
 #CONCURRENT_REQUESTS_PER_IP = 16
 
 # Disable cookies (enabled by default)
@@ -68,14 +72,14 @@ ITEM_PIPELINES = {
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
-#AUTOTHROTTLE_ENABLED = True
+AUTOTHROTTLE_ENABLED = True
 # The initial download delay
-#AUTOTHROTTLE_START_DELAY = 5
+AUTOTHROTTLE_START_DELAY = 0.25
 # The maximum download delay to be set in case of high latencies
-#AUTOTHROTTLE_MAX_DELAY = 60
+AUTOTHROTTLE_MAX_DELAY = 10
 # The average number of requests Scrapy should be sending in parallel to
 # each remote server
-#AUTOTHROTTLE_TARGET_CONCURRENCY = 1.0
+AUTOTHROTTLE_TARGET_CONCURRENCY = 8.0
 # Enable showing throttling stats for every response received:
 #AUTOTHROTTLE_DEBUG = False
 
@@ -86,6 +90,54 @@ HTTPCACHE_EXPIRATION_SECS = 0
 HTTPCACHE_DIR = 'httpcache'
 HTTPCACHE_IGNORE_HTTP_CODES = []
 HTTPCACHE_STORAGE = 'scrapy.extensions.httpcache.FilesystemCacheStorage'
+# Set to answer every request from the cache filled by scrapy warmup, pages missing from it are skipped
+HTTPCACHE_IGNORE_MISSING = False
 
 # Logging
 LOG_LEVEL = 'WARN'
+
+# Grammar output
+# Directory the EBNF files are written to
+GRAMMAR_DIR = 'grammar'
+# Number of worker processes converting sections in parallel, 0 converts them in the spider process.
+# Ignored with GRAMMAR_STREAMING, which converts each definition in the spider process as it arrives
+GRAMMAR_WORKERS = 0
+# Directory of the persistent cache of converted definitions, None disables it
+GRAMMAR_CACHE_DIR = None
+# Least recently used definitions beyond this count are evicted from the cache
+GRAMMAR_CACHE_MAX_ENTRIES = 100000
+# Only rewrite files whose content changed and remove files no longer produced, instead of clearing GRAMMAR_DIR
+GRAMMAR_INCREMENTAL = False
+# Where to write the JSON manifest of added, changed and removed files of an incremental run
+GRAMMAR_MANIFEST = None
+# Also print every header and definition to stdout while converting, they are always logged at debug level
+GRAMMAR_ECHO = False
+# Yield one item per definition and write it to its group file as it arrives, instead of one item per section.
+# Memory use only stays flat without GRAMMAR_OPTIMIZE, GRAMMAR_PARSER_MODULE, GRAMMAR_LEXER_MODULE and GRAMMAR_ARTIFACT
+GRAMMAR_STREAMING = False
+# Time the spider, tokenizer, parser and writer stages and report the totals in the stats at close
+GRAMMAR_TIMERS = False
+# Merge alternatives matching a single character into one character class
+GRAMMAR_MERGE_CHAR_CLASSES = False
+# Also write the grammar optimized as a whole to optimized.ebnf
+GRAMMAR_OPTIMIZE = False
+# Rules the optimized grammar starts from, by default every rule that no other rule refers to
+GRAMMAR_OPTIMIZE_ROOTS = []
+# Compile the optimized grammar with TatSu into this Python module, plus a pickled model next to it
+GRAMMAR_PARSER_MODULE = None
+# Generate a regex lexer for Swift source from the lexical structure section into this Python module
+GRAMMAR_LEXER_MODULE = None
+GRAMMAR_LEXER_SECTION = 'Lexical Structure'
+# Seconds the parse service spends on one source file before it reports a timeout, 0 for no limit
+GRAMMAR_PARSE_TIMEOUT = 10
+# MB of address space a parse service worker may map on top of what it has for one source file, 0 for no limit
+GRAMMAR_PARSE_MEMORY = 1024
+# Rule results the parse service memoizes per file, the oldest are evicted beyond this count, 0 disables the memo
+GRAMMAR_PARSE_MEMO_SIZE = 100000
+# Also write the whole grammar to grammar.bin, a binary artifact that readers memory-map and decode rule by rule
+GRAMMAR_ARTIFACT = False
+# Also write a cross-reference index of where every rule is defined and used to this file in GRAMMAR_DIR,
+# as SQLite when its name ends in .sqlite or .db, otherwise as JSON
+GRAMMAR_XREF = None
+# Snapshot URLs or files of the grammar summary page of consecutive Swift versions, crawled by swift_versions
+GRAMMAR_VERSIONS = []
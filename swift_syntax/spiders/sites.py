@@ -0,0 +1,59 @@
+from scrapy import Request
+from scrapy.http import TextResponse
+from scrapy.spiders import SitemapSpider
+
+from swift_syntax.items import PageItem, SectionItem
+from swift_syntax.spiders.swift import SwiftSpider
+
+# the nearest enclosing section that has a heading of its own
+section_title = 'ancestor::*[contains(concat(" ", normalize-space(@class), " "), " section ")][h2][1]/h2/text()'
+
+
+class SwiftSitesSpider(SitemapSpider):
+    """
+    Crawls the pages of sitemaps or of a URL list concurrently, such as the Swift book, the evolution proposals and
+    localized copies on a mirror, and extracts the grammar blocks of every page that has any:
+
+        scrapy crawl swift_sites -a sitemap=http://mirror.local/swift-book/sitemap.xml,http://mirror.local/...
+        scrapy crawl swift_sites -a urls=urls.txt
+    """
+    name = 'swift_sites'
+    custom_settings = {
+        'ITEM_PIPELINES': {'swift_syntax.pipelines.SwiftSitesPipeline': 300},
+    }
+
+    parse_admonition_grammar = SwiftSpider.parse_admonition_grammar
+    parse_syntax_def = staticmethod(SwiftSpider.parse_syntax_def)
+
+    def __init__(self, sitemap=None, urls=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sitemap_urls = sitemap.split(',') if sitemap else []
+        self.urls = urls
+
+    def start_requests(self):
+        yield from super().start_requests()
+        for url in self.read_urls():
+            yield Request(url, callback=self.parse)
+
+    def read_urls(self) -> list[str]:
+        """
+        The URLs of the urls argument, either separated by commas or in a file with one URL per line.
+        """
+        if not self.urls:
+            return []
+        if '://' in self.urls:
+            return self.urls.split(',')
+        with open(self.urls, encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+    def parse(self, response, **kwargs):
+        if not isinstance(response, TextResponse):
+            return
+        page_title = response.css('h1::text').extract_first() or response.css('title::text').extract_first()
+        sections = {}
+        for grammar in response.css('.admonition.grammar'):
+            title = grammar.xpath(section_title).extract_first() or page_title
+            sections.setdefault(title, []).append(dict(self.parse_admonition_grammar(grammar)))
+        if sections:
+            yield PageItem(url=response.url, version=SwiftSpider.parse_version(response),
+                           sections=[SectionItem(title=title, groups=groups) for title, groups in sections.items()])
@@ -1,6 +1,7 @@
 import scrapy
 from scrapy import Selector
 
+from parser.item_tokenizer import compact
 from swift_syntax.items import SectionItem, AdmonitionGrammarItem, SyntaxDefItem, VersionItem
 
 
@@ -8,12 +9,37 @@ class SwiftSpider(scrapy.Spider):
     name = 'swift'
     allowed_domains = ['docs.swift.org']
     start_urls = ['https://docs.swift.org/swift-book/ReferenceManual/zzSummaryOfTheGrammar.html']
+    streaming = False
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.streaming = crawler.settings.getbool('GRAMMAR_STREAMING', spider.streaming)
+        return spider
 
     def parse(self, response, **kwargs):
-        version = response.css('nav h2 div::text').extract_first()
-        yield VersionItem(name=version)
+        yield VersionItem(name=self.parse_version(response))
         sections = response.css('#summary-of-the-grammar .section')
-        yield from [self.parse_section(x) for x in sections].__iter__()
+        if self.streaming:
+            for section in sections:
+                yield from self.parse_section_defs(section)
+        else:
+            yield from [self.parse_section(x) for x in sections].__iter__()
+
+    @staticmethod
+    def parse_version(response) -> str or None:
+        return response.css('nav h2 div::text').extract_first()
+
+    def parse_section_defs(self, node):
+        """
+        Streaming counterpart of parse_section: yields one item per definition, tagged with its section and group.
+        Sections and groups without any definition yield nothing.
+        """
+        title = node.css('h2::text').extract_first()
+        for grammar in node.css('.admonition.grammar'):
+            group = grammar.css('p.admonition-title::text').extract_first()
+            for x in grammar.css('div.syntax-group > p.syntax-def'):
+                yield SyntaxDefItem(section=title, group=group, items=self.parse_syntax_def(x))
 
     def parse_section(self, node):
         title = node.css('h2::text').extract_first()
@@ -28,13 +54,20 @@ class SwiftSpider(scrapy.Spider):
         return AdmonitionGrammarItem(title=title, defs=defs)
 
     @staticmethod
-    def parse_syntax_def(node: Selector):
-        items = node.xpath('*|*/following-sibling::text()')
-        for idx, item in enumerate(items):
-            if not item.extract().strip():
-                # item is not a node and an empty string
-                del items[idx]
-            elif not item.extract().startswith('<'):
-                # item is not a tag, but a string
-                items[idx] = item.extract().strip()
+    def parse_syntax_def(node: Selector) -> list:
+        """
+        The items of a syntax-def in one pass over the children of its element: the tags, as tuples when they have
+        a well-known shape, and the stripped texts that follow them. Nothing is serialized back to HTML.
+        """
+        items = []
+        after_tag = False
+        for child in node.root:
+            if isinstance(child.tag, str):
+                items.append(compact(child))
+                after_tag = True
+            # only the text after the first tag is part of the definition
+            if after_tag and child.tail is not None:
+                text = child.tail.strip()
+                if text:
+                    items.append(text)
         return items
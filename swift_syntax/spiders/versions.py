@@ -0,0 +1,30 @@
+import os
+
+import scrapy
+
+from swift_syntax.items import SnapshotItem
+
+
+class SwiftVersionsSpider(scrapy.Spider):
+    """
+    Fetches the grammar summary page of several Swift versions, such as archived snapshots, oldest first:
+
+        scrapy crawl swift_versions -a versions=https://web.archive.org/web/2021/...,saved/swift-5.7.html
+    """
+    name = 'swift_versions'
+    custom_settings = {
+        'ITEM_PIPELINES': {'swift_syntax.versions.SwiftVersionsPipeline': 300},
+    }
+
+    def __init__(self, versions=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.versions = versions.split(',') if isinstance(versions, str) else versions
+
+    def start_requests(self):
+        versions = self.versions or self.settings.getlist('GRAMMAR_VERSIONS')
+        for order, source in enumerate(versions):
+            url = source if '://' in source else 'file://' + os.path.abspath(source)
+            yield scrapy.Request(url, cb_kwargs=dict(order=order, source=source), dont_filter=True)
+
+    def parse(self, response, order=0, source=None, **kwargs):
+        yield SnapshotItem(source=source or response.url, order=order, html=response.text)
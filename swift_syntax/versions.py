@@ -0,0 +1,154 @@
+"""
+Converts snapshots of the grammar summary page of several Swift versions in one run.
+
+Every version gets its own grammar directory below GRAMMAR_DIR. The versions share one definition cache, so a
+definition already converted for an earlier snapshot is not parsed again. versions.json next to them stores every
+distinct rule once, keyed by the hash of its EBNF, maps the rules of each version to those hashes and lists the
+rules added, removed and changed between consecutive versions.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+from scrapy import Selector
+from scrapy.settings import Settings
+from slugify import slugify
+
+from parser.ebnf_parser import read_grammar
+from parser.emitters import EbnfEmitter
+from swift_syntax.cache import DefinitionCache, MemoryCache
+from swift_syntax.items import SnapshotItem
+from swift_syntax.offline import convert
+from swift_syntax.pipelines import basedir, cache_version, settings_passes, suffix, SwiftSyntaxPipeline
+from swift_syntax.spiders.swift import SwiftSpider
+
+logger = logging.getLogger(__name__)
+
+manifest_filename = 'versions.json'
+
+
+def rule_digest(lines: list[str]) -> str:
+    return hashlib.sha256('\n'.join(lines).encode()).hexdigest()
+
+
+def diff_versions(old: dict[str, str], new: dict[str, str]) -> dict:
+    """
+    Rule level diff of two versions, each a mapping from rule names to the digests of their EBNF.
+    """
+    return dict(added=[name for name in new if name not in old],
+                removed=[name for name in old if name not in new],
+                changed=[name for name in new if name in old and old[name] != new[name]])
+
+
+class VersionedGrammar:
+    def __init__(self, settings, stats=None):
+        self.settings = settings
+        self.stats = stats
+        self.basedir = settings.get('GRAMMAR_DIR', basedir)
+        os.makedirs(self.basedir, exist_ok=True)
+        if not settings.getbool('GRAMMAR_INCREMENTAL'):
+            for name in os.listdir(self.basedir):
+                path = os.path.join(self.basedir, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+
+        cache_dir = settings.get('GRAMMAR_CACHE_DIR')
+        if cache_dir:
+            self.cache = DefinitionCache(cache_dir, max_entries=settings.getint('GRAMMAR_CACHE_MAX_ENTRIES', 100000),
+                                         version=cache_version(settings_passes(settings)))
+        else:
+            self.cache = MemoryCache()
+        # every distinct rule, by the digest of its EBNF
+        self.rules: dict[str, dict] = {}
+        self.versions: list[dict] = []
+        self.diffs: list[dict] = []
+
+    def add(self, source: str, html: str) -> dict:
+        """
+        Converts the snapshot of the next version and diffs it against the previous one.
+        """
+        name = SwiftSpider.parse_version(Selector(text=html)) or os.path.splitext(os.path.basename(source))[0]
+        directory = slugify(name) or 'version'
+        taken = {version['directory'] for version in self.versions}
+        for number in range(2, len(taken) + 2):
+            if directory not in taken:
+                break
+            directory = f'{slugify(name) or "version"}-{number}'
+
+        # the settings of a crawler are frozen, and so are their copies
+        settings = Settings(self.settings.copy_to_dict())
+        settings.set('GRAMMAR_DIR', os.path.join(self.basedir, directory), priority='cmdline')
+        # the manifest of an incremental run would be overwritten by every version
+        settings.set('GRAMMAR_MANIFEST', None, priority='cmdline')
+        pipeline = SwiftSyntaxPipeline.from_settings(settings, self.stats, shared_cache=self.cache)
+        hits, misses = self.cache.hits, self.cache.misses
+
+        convert(html, pipeline, SwiftSpider(streaming=settings.getbool('GRAMMAR_STREAMING')))
+
+        version = dict(name=name, source=source, directory=directory, parsed=self.cache.misses - misses,
+                       reused=self.cache.hits - hits, rules=self.read_rules(pipeline.basedir))
+        if self.versions:
+            previous = self.versions[-1]
+            diff = diff_versions(previous['rules'], version['rules'])
+            self.diffs.append(dict(old=previous['name'], new=name, **diff))
+            logger.info(f'{name}: {version["parsed"]} definitions parsed, {version["reused"]} reused, '
+                        f'{len(diff["added"])} rules added, {len(diff["removed"])} removed, '
+                        f'{len(diff["changed"])} changed since {previous["name"]}')
+        else:
+            logger.info(f'{name}: {version["parsed"]} definitions parsed, {version["reused"]} reused')
+        self.versions.append(version)
+        return version
+
+    def read_rules(self, directory: str) -> dict[str, str]:
+        sections: dict[str, str] = {}
+        lines: dict[str, list[str]] = {}
+        emitter = EbnfEmitter()
+        for path, rule in read_grammar(os.path.join(directory, 'index' + suffix)):
+            sections.setdefault(rule.name, os.path.dirname(path))
+            lines.setdefault(rule.name, []).append(emitter.emit(rule))
+        rules = {}
+        for name, rule_lines in lines.items():
+            digest = rules[name] = rule_digest(rule_lines)
+            self.rules.setdefault(digest, dict(name=name, section=sections[name], lines=rule_lines))
+        return rules
+
+    def close(self):
+        if isinstance(self.cache, DefinitionCache):
+            self.cache.close()
+        if self.stats:
+            self.stats.set_value('grammar/versions', len(self.versions))
+            self.stats.set_value('grammar/distinct_rules', len(self.rules))
+        with open(os.path.join(self.basedir, manifest_filename), 'w', encoding='utf-8') as f:
+            json.dump(dict(rules=self.rules, versions=self.versions, diffs=self.diffs), f, indent=2)
+
+
+class SwiftVersionsPipeline:
+    """
+    Collects the snapshots of the versions spider and converts them in version order once the crawl is done.
+    """
+
+    def __init__(self, settings, stats=None):
+        self.settings = settings
+        self.stats = stats
+        self.snapshots: list[SnapshotItem] = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings, crawler.stats)
+
+    def process_item(self, item, spider):
+        if isinstance(item, SnapshotItem):
+            self.snapshots.append(item)
+        return item
+
+    def close_spider(self, spider):
+        grammar = VersionedGrammar(self.settings, self.stats)
+        try:
+            for snapshot in sorted(self.snapshots, key=lambda snapshot: snapshot['order']):
+                grammar.add(snapshot['source'], snapshot['html'])
+        finally:
+            grammar.close()
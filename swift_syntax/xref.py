@@ -0,0 +1,137 @@
+"""
+Cross-reference index of a converted grammar: where every rule is defined, by section, group, EBNF file and line
+and the anchor of the definition on the page, and every place that uses it, with the link of the reference.
+
+The index is written to GRAMMAR_DIR as JSON, one entry per rule name, or as SQLite when the file name ends in
+.sqlite or .db, and looked up with
+
+    python -m swift_syntax.xref grammar/xref.json type array_type
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+from parser.item_tokenizer import compact, Tokenizer
+from parser.symbols import SymbolTable
+
+sqlite_suffixes = ('.sqlite', '.db')
+
+definition_columns = ['section', 'group', 'file', 'line', 'anchor']
+use_columns = ['rule', 'section', 'group', 'file', 'line', 'href']
+
+schema = '''
+    CREATE TABLE definitions (name TEXT NOT NULL, section TEXT, "group" TEXT, file TEXT, line INTEGER, anchor TEXT);
+    CREATE INDEX definitions_name ON definitions (name);
+    CREATE TABLE uses (name TEXT NOT NULL, rule TEXT, section TEXT, "group" TEXT, file TEXT, line INTEGER, href TEXT);
+    CREATE INDEX uses_name ON uses (name);
+'''
+
+
+class CrossReferenceIndex:
+    def __init__(self, symbols: SymbolTable):
+        self.symbols = symbols
+        self.rules: dict[str, dict] = {}
+        # the last line written to every group file
+        self._lines: dict[str, int] = {}
+
+    def rule(self, name: str) -> dict:
+        entry = self.rules.get(name)
+        if entry is None:
+            entry = self.rules[name] = dict(definitions=[], uses=[])
+        return entry
+
+    def add(self, section: str, group: str, path: str, items):
+        """
+        Records the definition and the references of a syntax-def, which is the next line of the group file at path.
+        """
+        # the group file starts with its header and an empty line
+        line = self._lines[path] = self._lines.get(path, 2) + 1
+        name = None
+        for item in items:
+            if isinstance(item, str):
+                continue
+            if not isinstance(item, tuple):
+                item = compact(getattr(item, 'root', item))
+                if not isinstance(item, tuple):
+                    continue
+            try:
+                token = Tokenizer([item]).get_next_token()
+            except SyntaxError:
+                continue
+            link = item[3] if len(item) > 3 else None
+            if token.type == 'NAME' and name is None:
+                name = self.symbols.name(token.value)
+                self.rule(name)['definitions'].append(dict(section=section, group=group, file=path, line=line,
+                                                           anchor=link))
+            elif token.type == 'CATEGORY' and name is not None:
+                self.rule(self.symbols.name(token.value))['uses'].append(
+                    dict(rule=name, section=section, group=group, file=path, line=line, href=link))
+
+    def dump_json(self) -> str:
+        return json.dumps(dict(rules=self.rules), indent=2, ensure_ascii=False) + '\n'
+
+    def dump_sqlite(self) -> bytes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'xref.sqlite')
+            connection = sqlite3.connect(path)
+            try:
+                connection.executescript(schema)
+                connection.executemany('INSERT INTO definitions VALUES (?, ?, ?, ?, ?, ?)',
+                                       [(name, *map(definition.get, definition_columns))
+                                        for name, entry in self.rules.items() for definition in entry['definitions']])
+                connection.executemany('INSERT INTO uses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                       [(name, *map(use.get, use_columns))
+                                        for name, entry in self.rules.items() for use in entry['uses']])
+                connection.commit()
+            finally:
+                connection.close()
+            with open(path, 'rb') as f:
+                return f.read()
+
+    def dump(self, filename: str) -> str or bytes:
+        return self.dump_sqlite() if filename.endswith(sqlite_suffixes) else self.dump_json()
+
+
+def lookup(path: str, name: str) -> dict:
+    """
+    The definitions and uses of a rule in an index written by the pipeline, empty lists for a rule it has not seen.
+    """
+    if not path.endswith(sqlite_suffixes):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)['rules'].get(name, dict(definitions=[], uses=[]))
+    connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        columns = ', '.join(f'"{column}"' for column in definition_columns)
+        definitions = connection.execute(f'SELECT {columns} FROM definitions WHERE name = ? ORDER BY rowid', (name,))
+        definitions = [dict(zip(definition_columns, row)) for row in definitions]
+        columns = ', '.join(f'"{column}"' for column in use_columns)
+        uses = connection.execute(f'SELECT {columns} FROM uses WHERE name = ? ORDER BY rowid', (name,))
+        return dict(definitions=definitions, uses=[dict(zip(use_columns, row)) for row in uses])
+    finally:
+        connection.close()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Show where rules of the grammar are defined and used.')
+    arg_parser.add_argument('index', help='xref.json or xref.sqlite written with GRAMMAR_XREF')
+    arg_parser.add_argument('names', nargs='+', metavar='RULE')
+    args = arg_parser.parse_args(argv)
+
+    found = True
+    for name in args.names:
+        entry = lookup(args.index, name)
+        found &= bool(entry['definitions'] or entry['uses'])
+        print(f'{name}:')
+        for definition in entry['definitions']:
+            print(f'  defined at {definition["file"]}:{definition["line"]} ({definition["section"]}, '
+                  f'{definition["group"]}) #{definition["anchor"]}')
+        for use in entry['uses']:
+            print(f'  used by {use["rule"]} at {use["file"]}:{use["line"]}')
+    return 0 if found else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from parser.artifact import dump_artifact, GrammarArtifact, header, is_artifact, write_artifact
+from parser.ebnf_parser import read_grammar
+from parser.nodes import CharClass, Choice, Concatenation, Except, NonTerminal, Optional, Pattern, Prose, Rule, \
+    Sequence, Terminal
+from swift_syntax.offline import main
+from swift_syntax.service import load_parser
+
+fixture = os.path.join(os.path.dirname(__file__), 'fixtures', 'zzSummaryOfTheGrammar.html')
+
+rules = [
+    ('Types', Rule('type', Choice([NonTerminal('array_type'), Sequence([Terminal('('), NonTerminal('type'),
+                                                                       Terminal(')')])]))),
+    ('Types', Rule('array_type', Sequence([Terminal('['), NonTerminal('type'), Terminal(']')]))),
+    ('Lexical Structure', Rule('item', Except(CharClass([0x9, (0x20, 0xD7FF), (0xE000, 0x10FFFF)], unicode=True),
+                                              Choice([Terminal('*/'), Terminal('—')], grouped=True)))),
+    ('Lexical Structure', Rule('items', Concatenation([NonTerminal('item'), Optional(NonTerminal('items')),
+                                                      Pattern('[a-f]+'), Prose('any other character')]))),
+    ('Types', Rule('type', NonTerminal('type_identifier'))),
+]
+
+
+class ArtifactTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'grammar.bin')
+        write_artifact(self.path, rules)
+        self.grammar = GrammarArtifact(self.path)
+
+    def tearDown(self):
+        self.grammar.close()
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        self.assertEqual(['type', 'array_type', 'item', 'items'], list(self.grammar))
+        self.assertEqual(rules[1][1], self.grammar['array_type'])
+        self.assertEqual(rules[2][1], self.grammar['item'])
+        self.assertEqual(rules[3][1], self.grammar['items'])
+        # the two lines defining type become one rule
+        self.assertEqual(Rule('type', Choice([rules[0][1].body, NonTerminal('type_identifier')])),
+                         self.grammar['type'])
+        self.assertEqual('Lexical Structure', self.grammar.section('item'))
+
+    def test_lazy_lookup(self):
+        self.assertEqual(4, len(self.grammar))
+        self.assertIn('items', self.grammar)
+        self.assertNotIn('missing', self.grammar)
+        self.assertIsNone(self.grammar.get('missing'))
+        with self.assertRaises(KeyError):
+            self.grammar['missing']
+        self.grammar['items']
+        self.assertEqual(['items'], list(self.grammar._rules))
+
+    def test_compact_words(self):
+        self.assertEqual(2, header.unpack_from(dump_artifact(rules))[2])
+        many = [('Types', Rule(f'rule_{i}', Terminal(str(i)))) for i in range(0x10000)]
+        self.assertEqual(4, header.unpack_from(dump_artifact(many))[2])
+
+    def test_not_an_artifact(self):
+        path = os.path.join(self.directory.name, 'index.ebnf')
+        with open(path, 'w') as f:
+            f.write('type = "Int" ;\n' * 10)
+        self.assertTrue(is_artifact(self.path))
+        self.assertFalse(is_artifact(path))
+        with self.assertRaisesRegex(ValueError, 'not a grammar artifact'):
+            GrammarArtifact(path)
+
+
+class PipelineArtifactTests(unittest.TestCase):
+    def test_convert_and_parse(self):
+        with tempfile.TemporaryDirectory() as output:
+            with redirect_stdout(io.StringIO()):
+                main(['-o', output, '-s', 'GRAMMAR_ARTIFACT=1', fixture])
+            path = os.path.join(output, 'grammar.bin')
+            with GrammarArtifact(path) as grammar:
+                names = list(grammar)
+                self.assertEqual('Lexical Structure', grammar.section('identifier'))
+            ebnf_rules = read_grammar(os.path.join(output, 'index.ebnf'))
+            self.assertEqual(list(dict.fromkeys(rule.name for _, rule in ebnf_rules)), names)
+
+            parser = load_parser(path)
+            self.assertIn('identifier', parser.lexical)
+            source = 'let total: [Int] = -(count + 1) * 0x1F // sum\n'
+            self.assertEqual(len(source), parser.parse(source, 'statements'))
+
+    def test_incremental(self):
+        with tempfile.TemporaryDirectory() as output, redirect_stdout(io.StringIO()):
+            manifest = os.path.join(output, 'manifest.json')
+            options = ['-o', output, '-s', 'GRAMMAR_ARTIFACT=1', '-s', 'GRAMMAR_INCREMENTAL=1',
+                       '-s', f'GRAMMAR_MANIFEST={manifest}', fixture]
+            main(options)
+            with open(manifest) as f:
+                self.assertIn('grammar.bin', json.load(f)['added'])
+            main(options)
+            with open(manifest) as f:
+                self.assertEqual({'added': [], 'changed': [], 'removed': []}, json.load(f))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import tempfile
+import unittest
+
+from swift_syntax.cache import DefinitionCache
+
+
+class DefinitionCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_hit_and_miss(self):
+        key = DefinitionCache.key([(True, '<span class="arrow">→</span>'), (False, 'U+000A')])
+        cache = DefinitionCache(self.tmp.name, version='1')
+        self.assertIsNone(cache.get(key))
+        cache.put(key, 'a = /\\U0000000A/ ;')
+        cache.close()
+
+        cache = DefinitionCache(self.tmp.name, version='1')
+        self.assertEqual('a = /\\U0000000A/ ;', cache.get(key))
+        self.assertEqual((1, 0), (cache.hits, cache.misses))
+        cache.close()
+
+    def test_parser_version_change_invalidates(self):
+        cache = DefinitionCache(self.tmp.name, version='1')
+        cache.put('key', 'line')
+        cache.close()
+
+        cache = DefinitionCache(self.tmp.name, version='2')
+        self.assertIsNone(cache.get('key'))
+        cache.close()
+
+    def test_least_recently_used_are_evicted(self):
+        cache = DefinitionCache(self.tmp.name, max_entries=2, version='1')
+        for key in 'abc':
+            cache.put(key, key)
+        cache.close()
+
+        cache = DefinitionCache(self.tmp.name, max_entries=2, version='1')
+        self.assertEqual('b', cache.get('b'))
+        cache.put('d', 'd')
+        cache.close()
+
+        cache = DefinitionCache(self.tmp.name, max_entries=2, version='1')
+        self.assertEqual([None, 'b', None, 'd'], [cache.get(key) for key in 'abcd'])
+        cache.close()
@@ -0,0 +1,66 @@
+import importlib.util
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from parser.nodes import CharClass, Choice, Except, NonTerminal, Optional, Prose, Rule, Sequence, Terminal
+from swift_syntax import compiler
+from swift_syntax.offline import main
+
+fixture = os.path.join(os.path.dirname(__file__), 'fixtures', 'zzSummaryOfTheGrammar.html')
+
+
+class TatsuGrammarTests(unittest.TestCase):
+    def test_grammar(self):
+        rules = [
+            Rule('item', Except(CharClass([(0, 0x10FFFF)], unicode=True), Choice([Terminal('*'), Terminal('/')]))),
+            Rule('escape', Sequence([Terminal('\\'), Choice([Terminal('"'), NonTerminal('missing')], grouped=True)])),
+            Rule('text', Prose('Any Unicode scalar value')),
+        ]
+        expected = '\n'.join([
+            '@@grammar :: Swift',
+            '',
+            r"item = ! ( '*' | '/' ) /[\U00000000-\U0010FFFF]/ ;",
+            r"""escape = '\\' ( '"' | missing ) ;""",
+            'text = /(?!)/ ;',
+            'missing = /(?!)/ ;',
+        ]) + '\n'
+        self.assertEqual(expected, compiler.tatsu_grammar(rules, 'Swift', ['missing']))
+
+
+@unittest.skipIf(compiler.tatsu is None, 'TatSu is not installed')
+class CompilerTests(unittest.TestCase):
+    def test_compile_parser(self):
+        grammar = compiler.tatsu_grammar([
+            Rule('digits', Sequence([NonTerminal('digit'), Optional(NonTerminal('digits'))])),
+            Rule('digit', CharClass([(ord('0'), ord('9'))])),
+        ], 'Digits')
+        with tempfile.TemporaryDirectory() as output:
+            module_path = os.path.join(output, 'digits_parser.py')
+            model_path = compiler.compile_parser(grammar, module_path)
+            self.assertEqual(os.path.join(output, 'digits_parser.pickle'), model_path)
+
+            model = compiler.load_model(model_path)
+            self.assertEqual(('4', '2'), model.parse('42', start='digits'))
+
+            spec = importlib.util.spec_from_file_location('digits_parser', module_path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            self.assertEqual(('4', '2'), module.DigitsParser().parse('42', start='digits'))
+
+    def test_pipeline(self):
+        with tempfile.TemporaryDirectory() as output, redirect_stdout(io.StringIO()):
+            module_path = os.path.join(output, 'swift_parser.py')
+            self.assertEqual(0, main(['-o', os.path.join(output, 'grammar'),
+                                      '-s', f'GRAMMAR_PARSER_MODULE={module_path}', fixture]))
+            self.assertTrue(os.path.exists(module_path))
+            model = compiler.load_model(compiler.model_path(module_path))
+
+        self.assertEqual('Swift57', model.name)
+        self.assertEqual(('[', ('I', ('n', 't')), ']'), model.parse('[Int]', start='array_type'))
+
+
+if __name__ == '__main__':
+    unittest.main()
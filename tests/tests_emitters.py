@@ -0,0 +1,38 @@
+import json
+import unittest
+
+from parser.emitters import EbnfEmitter, JsonEmitter
+from parser.nodes import CharClass, Choice, Except, NonTerminal, Optional, Rule, Sequence, Terminal, walk
+from parser.string_parser import StringParser
+
+
+class EmitterTests(unittest.TestCase):
+    def test_string_parser_tree(self):
+        tree = StringParser().parse_tree('Any Unicode scalar value except U+000A or U+000D')
+        expected = Except(
+            Choice([CharClass([(0x0, 0xD7FF)], unicode=True), CharClass([(0xE000, 0x10FFFF)], unicode=True)],
+                   grouped=True),
+            Choice([CharClass([0xA], unicode=True), CharClass([0xD], unicode=True)], grouped=True))
+        self.assertEqual(expected, tree)
+
+    def test_ebnf(self):
+        rule = Rule('identifier', Choice([
+            Sequence([NonTerminal('identifier_head'), Optional(NonTerminal('identifier_characters'))]),
+            Sequence([Terminal('`'), NonTerminal('identifier_head'), Terminal('`')]),
+            Terminal('"'),
+            CharClass([(ord('a'), ord('z')), ord('_')]),
+        ]))
+        expected = 'identifier = identifier_head [ identifier_characters ] | "`" identifier_head "`" | \'"\' | /[a-z_]/ ;'
+        self.assertEqual(expected, EbnfEmitter().emit(rule))
+
+    def test_json_round_trip(self):
+        tree = Rule('digits', Sequence([
+            StringParser().parse_tree('Digit 0 through 9, a through f, or A through F'),
+            Optional(NonTerminal('digits')),
+        ]))
+        data = json.loads(json.dumps(JsonEmitter().emit(tree)))
+        self.assertEqual(tree, JsonEmitter.load(data))
+
+    def test_walk(self):
+        tree = StringParser().parse_tree('U+000A followed by U+000B')
+        self.assertEqual(['sequence', 'charclass', 'charclass'], [node.kind for node in walk(tree)])
@@ -1,7 +1,16 @@
+import os
+import subprocess
+import sys
 import unittest
+
+from scrapy import Selector
+
 from parser.item_parser import Parser
+from swift_syntax.spiders.swift import SwiftSpider
 from scrapy.http import TextResponse
 
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 
 class ItemParserTests(unittest.TestCase):
     def test_parse_whitespace(self):
@@ -22,3 +31,51 @@ class ItemParserTests(unittest.TestCase):
             '<span class="syntax-def-name"><a id="grammar_whitespace-item_1110"></a>whitespace-item</span>',
             '<span class="arrow"> → </span> U+0000, U+000B, or U+000C'
         ]
+
+    def test_exception_list_with_code(self):
+        html = ('<p class="syntax-def"><span class="syntax-def-name"><a id="grammar_quoted-text-item"></a>'
+                'quoted-text-item</span> <span class="arrow">→</span> Any Unicode scalar value except '
+                '<code>"</code>, <code>\\</code>, U+000A, or U+000D</p>')
+        items = SwiftSpider.parse_syntax_def(Selector(text=html).css('p.syntax-def')[0])
+        expected = ('quoted_text_item = ( /[\\U00000000-\\U0000D7FF]/ | /[\\U0000E000-\\U0010FFFF]/ ) ~ '
+                    '( /\\U00000022/ | /\\U0000005C/ | /\\U0000000A/ | /\\U0000000D/ ) ;')
+        self.assertEqual(expected, Parser().parse(items))
+
+    def test_parse_tuples(self):
+        items = [('span', 'syntax-def-name', 'array-type'), ('span', 'arrow', '→'), ('code', None, '['),
+                 ('span', 'syntactic-category', 'type'), ('code', None, ']'), ('sub', None, 'opt'), '|',
+                 'Digit 0 through 9']
+        self.assertEqual('array_type = "[" type [ "]" ] | /[0-9]/ ;', Parser().parse(items))
+
+    def test_text_over_several_lines(self):
+        name = [('span', 'syntax-def-name', 'a'), ('span', 'arrow', '→')]
+        expected = 'a = ( /[\\U00000000-\\U0000D7FF]/ | /[\\U0000E000-\\U0010FFFF]/ ) ~ /\\U0000000A/ ;'
+        self.assertEqual(expected, Parser().parse(name + ['Any Unicode scalar value except\nU+000A']))
+        self.assertEqual(expected, Parser().parse(name + ['Any Unicode scalar value except U+000A']))
+        self.assertEqual('a = "c" | /\\U0000000A/ ;', Parser().parse(name + [('code', None, 'c'), '|\nU+000A']))
+
+    def test_parse_many(self):
+        defs = [[('span', 'syntax-def-name', 'array-type'), ('span', 'arrow', '→'), ('code', None, '['),
+                 ('span', 'syntactic-category', 'type'), ('code', None, ']')],
+                [('span', 'syntax-def-name', 'digit'), ('span', 'arrow', '→'), 'Digit 0 through 9'],
+                [('span', 'syntax-def-name', 'empty'), ('span', 'arrow', '→'), 'Any keyword or'],
+                [('span', 'syntax-def-name', 'letter'), ('span', 'arrow', '→'),
+                 'Upper- or lowercase letter A through Z']]
+        parser = Parser()
+        lines = parser.parse_many(defs)
+        self.assertNotIsInstance(lines, list)
+        self.assertEqual([Parser().parse(items) for items in defs], list(lines))
+        # one tokenizer and one prose parser for all of them
+        tokenizer, string_parser = parser._tokenizer, parser._string_parser
+        self.assertEqual([Parser().parse_tree(items) for items in reversed(defs)],
+                         list(parser.parse_trees(reversed(defs))))
+        self.assertIs(tokenizer, parser._tokenizer)
+        self.assertIs(string_parser, parser._string_parser)
+
+    def test_import_without_scrapy(self):
+        code = ('import sys, parser.item_parser; '
+                'print(" ".join(sorted({name.partition(".")[0] for name in sys.modules})))')
+        output = subprocess.run([sys.executable, '-c', code], cwd=root, check=True, capture_output=True,
+                                text=True).stdout.split()
+        for module in ['scrapy', 'twisted', 'parsel', 'lxml', 'humps']:
+            self.assertNotIn(module, output)
@@ -0,0 +1,82 @@
+import os
+import unittest
+
+from lxml import etree
+from scrapy import Selector
+
+from parser.item_tokenizer import Tokenizer
+
+fixture = os.path.join(os.path.dirname(__file__), 'fixtures', 'zzSummaryOfTheGrammar.html')
+
+
+def tokenize(items, fast_path):
+    tokenizer = Tokenizer(items, fast_path=fast_path)
+    tokens = []
+    try:
+        while tokenizer.has_more_tokens():
+            tokens.append(tokenizer.get_next_token())
+    except SyntaxError as e:
+        tokens.append(str(e))
+    return tokens
+
+
+def syntax_defs(html):
+    """
+    The items of every syntax-def with their tags as Selectors, which take the fast path or the CSS selectors.
+    """
+    return [[item if isinstance(item.root, etree.ElementBase) else item.get().strip()
+             for item in node.xpath('*|*/following-sibling::text()') if item.get().strip()]
+            for node in Selector(text=html).css('p.syntax-def')]
+
+
+class ItemTokenizerTests(unittest.TestCase):
+    def assertSameTokens(self, items):
+        self.assertEqual(tokenize(items, fast_path=False), tokenize(items, fast_path=True))
+
+    def test_grammar_page(self):
+        with open(fixture, encoding='utf-8') as f:
+            defs = syntax_defs(f.read())
+        self.assertTrue(defs)
+        for items in defs:
+            self.assertSameTokens(items)
+
+    def test_token_types(self):
+        items, = syntax_defs(
+            '<p class="syntax-def"><span class="syntax-def-name"><a id="grammar_a"></a>a</span>'
+            '<span class="arrow"> → </span> <span class="syntactic-category"><a href="#b">b</a></span>'
+            '<sub>opt</sub> <code>c</code> | d</p>')
+        expected = [('NAME', 'a'), ('ARROW', '→'), ('CATEGORY', 'b'), ('OPT', 'opt'), ('CODE', 'c'),
+                    ('ALTERNATION', '|'), ('STRING', ' d')]
+        self.assertEqual(expected, tokenize(items, fast_path=True))
+
+    def test_unusual_shapes_fall_back(self):
+        for html in [
+            '<p class="syntax-def"><span class="syntax-def-name"> <a id="x"></a>name</span></p>',
+            '<p class="syntax-def"><span class="syntax-def-name other"><a id="x"></a>name</span></p>',
+            '<p class="syntax-def"><span class="syntax-def-name"><a class="syntax-def-name">x</a>y</span></p>',
+            '<p class="syntax-def"><span class="literal"><code>let</code></span></p>',
+            '<p class="syntax-def"><span class="syntactic-category"><a href="#a"> </a><a href="#b">b</a></span></p>',
+            '<p class="syntax-def"><span class="syntactic-category"><em>a</em></span></p>',
+            '<p class="syntax-def"><span class="arrow"><b>→</b></span></p>',
+            '<p class="syntax-def"><code>   </code><sub>opt</sub></p>',
+            '<p class="syntax-def"><code><!-- c -->x</code></p>',
+            '<p class="syntax-def"><em>unknown</em></p>',
+        ]:
+            with self.subTest(html=html):
+                self.assertSameTokens(syntax_defs(html)[0])
+
+    def test_plain_items(self):
+        with open(fixture, encoding='utf-8') as f:
+            defs = syntax_defs(f.read())
+        for items in defs:
+            elements = [item if isinstance(item, str) else item.root for item in items]
+            tuples = [item if isinstance(item, str) else (item.tag, item.get('class'), item.text_content())
+                      for item in elements]
+            expected = tokenize(items, fast_path=True)
+            self.assertEqual(expected, tokenize(elements, fast_path=True))
+            self.assertEqual(expected, tokenize(elements, fast_path=False))
+            self.assertEqual(expected, tokenize(tuples, fast_path=True))
+
+    def test_unknown_tuple(self):
+        self.assertEqual([('NAME', 'a'), "Unexpected token: \"('em', None, 'b')\""],
+                         tokenize([('span', 'syntax-def-name', ' a '), ('em', None, 'b')], fast_path=True))
@@ -0,0 +1,99 @@
+import io
+import os
+import re
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from parser.emitters import RegexEmitter
+from parser.nodes import CharClass, Choice, NonTerminal, Optional, Pattern, Rule, Sequence, Terminal
+from swift_syntax.lexer import first_ranges, lexer_source, load_lexer
+from swift_syntax.offline import main
+
+fixture = os.path.join(os.path.dirname(__file__), 'fixtures', 'zzSummaryOfTheGrammar.html')
+
+digit = CharClass([(ord('0'), ord('9'))])
+
+
+class RegexEmitterTests(unittest.TestCase):
+    def test_right_recursion_is_repetition(self):
+        rules = {
+            'digits': Sequence([NonTerminal('digit'), Optional(NonTerminal('digits'))]),
+            'list': Sequence([NonTerminal('digits'), Optional(Sequence([Terminal(','), NonTerminal('list')]))]),
+            'digit': digit,
+        }
+        regex = re.compile(RegexEmitter(rules).rule('list'))
+        self.assertTrue(regex.fullmatch('1,23,456'))
+        self.assertFalse(regex.fullmatch('1,,2'))
+
+    def test_nested_recursion_is_unrolled(self):
+        rules = {'nested': Sequence([Terminal('('), Optional(NonTerminal('nested')), Terminal(')')])}
+        regex = re.compile(RegexEmitter(rules, depth=3).visit(NonTerminal('nested')))
+        self.assertTrue(regex.fullmatch('((()))'))
+        self.assertFalse(regex.fullmatch('(((())))'))
+
+    def test_alternatives(self):
+        rules = {
+            'number': Choice([NonTerminal('integer'), NonTerminal('float'), NonTerminal('name')]),
+            'integer': Sequence([digit, Optional(NonTerminal('integer'))]),
+            'float': Sequence([NonTerminal('integer'), Terminal('.'), NonTerminal('integer')]),
+            'name': Choice([Terminal('a'), Terminal('b')]),
+        }
+        emitter = RegexEmitter(rules)
+        # the names match a single character each and stay one alternative
+        alternatives = [re.compile(emitter.visit(node)) for node in emitter.alternatives('number')]
+        self.assertEqual([['12'], ['1.5'], ['a', 'b']],
+                         [[text for text in ['12', '1.5', 'a', 'b'] if alternative.fullmatch(text)]
+                          for alternative in alternatives])
+
+    def test_first_ranges(self):
+        rules = {'sign': Choice([Terminal('+'), Terminal('-')]), 'digit': digit}
+        number = Sequence([Optional(NonTerminal('sign')), NonTerminal('digit')])
+        self.assertEqual([(43, 43), (45, 45), (48, 57)], first_ranges(number, rules))
+        self.assertIsNone(first_ranges(Optional(NonTerminal('digit')), rules))
+        self.assertEqual([(0xB2, 0xB5)], first_ranges(Pattern('[\\U000000B2-\\U000000B5]'), rules))
+
+
+class LexerTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.directory.name, 'swift_lexer.py')
+        with redirect_stdout(io.StringIO()):
+            main(['-o', os.path.join(cls.directory.name, 'grammar'), '-s', f'GRAMMAR_LEXER_MODULE={path}', fixture])
+        cls.lexer = load_lexer(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_tokenize(self):
+        source = 'let trueValue = 0x1F + "a\\"b" // note\n/* a /* nested */ comment */ `x` == nil'
+        expected = [
+            ('identifier', 'let', 0), ('identifier', 'trueValue', 4), ('operator', '=', 14), ('literal', '0x1F', 16),
+            ('operator', '+', 21), ('literal', '"a\\"b"', 23), ('identifier', '`x`', 67), ('operator', '==', 71),
+            ('literal', 'nil', 74),
+        ]
+        self.assertEqual(expected, list(self.lexer.tokenize(source)))
+
+    def test_longest_alternative(self):
+        self.assertEqual(['let', 'x', '=', '1.5'], [text for _, text, _ in self.lexer.tokenize('let x = 1.5')])
+        self.assertEqual(['x', '-', '1', '-', '-2e3', ')', '-', '1'],
+                         [text for _, text, _ in self.lexer.tokenize('x-1 - -2e3)-1')][:8])
+
+    def test_whitespace_and_comments(self):
+        tokens = list(self.lexer.tokenize('a // b\n c', skip=()))
+        self.assertEqual(['identifier', 'whitespace', 'identifier'], [kind for kind, _, _ in tokens])
+        self.assertEqual(' // b\n ', tokens[1][1])
+
+    def test_unexpected_character(self):
+        with self.assertRaisesRegex(SyntaxError, 'offset 4'):
+            list(self.lexer.tokenize('let ☃'))
+
+    def test_source_without_rules(self):
+        source = lexer_source([Rule('literal', digit)], kinds=['literal', 'operator'])
+        self.assertIn("tokens = ['literal', 'operator']", source)
+
+
+if __name__ == '__main__':
+    unittest.main()
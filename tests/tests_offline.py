@@ -0,0 +1,35 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from swift_syntax.offline import main
+
+fixture = os.path.join(os.path.dirname(__file__), 'fixtures', 'zzSummaryOfTheGrammar.html')
+
+
+class OfflineTests(unittest.TestCase):
+    def test_convert_snapshot(self):
+        with tempfile.TemporaryDirectory() as output, redirect_stdout(io.StringIO()):
+            self.assertEqual(0, main(['-o', output, fixture]))
+
+            with open(os.path.join(output, 'index.ebnf')) as f:
+                index = f.read()
+            self.assertTrue(index.startswith('@@grammar :: Swift57\n'))
+            self.assertIn('#include :: "types/_index.ebnf"\n', index)
+
+            with open(os.path.join(output, 'types', 'array-type.ebnf')) as f:
+                self.assertEqual('(* Grammar of an array type *)\n\narray_type = "[" type "]" ;\n', f.read())
+
+    def test_literal_snapshot(self):
+        with tempfile.TemporaryDirectory() as output, redirect_stdout(io.StringIO()):
+            self.assertEqual(0, main(['-o', output, fixture]))
+
+            with open(os.path.join(output, 'lexical-structure', 'literal.ebnf')) as f:
+                lines = f.read().splitlines()
+            self.assertIn('string_literal = \'"\' [ quoted_text ] \'"\' ;', lines)
+            self.assertIn('quoted_text_item = escaped_character ;', lines)
+            self.assertIn('quoted_text_item = ( /[\\U00000000-\\U0000D7FF]/ | /[\\U0000E000-\\U0010FFFF]/ ) ~ '
+                          '( /\\U00000022/ | /\\U0000005C/ | /\\U0000000A/ | /\\U0000000D/ ) ;', lines)
+            self.assertIn('escaped_character = "\\0" | "\\\\" | "\\t" | "\\n" | "\\r" | \'\\"\' | "\\\'" ;', lines)
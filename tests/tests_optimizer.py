@@ -0,0 +1,72 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from parser.emitters import EbnfEmitter
+from parser.nodes import Choice, NonTerminal, Optional, Rule, Sequence, Terminal
+from parser.optimizer import dependency_graph, optimize_grammar
+from swift_syntax.offline import main
+
+fixture = os.path.join(os.path.dirname(__file__), 'fixtures', 'zzSummaryOfTheGrammar.html')
+
+
+def emit(rules):
+    return [EbnfEmitter().emit(rule) for rule in rules]
+
+
+class OptimizerTests(unittest.TestCase):
+    def test_dependency_graph(self):
+        rules = [Rule('list', Choice([NonTerminal('item'), Sequence([NonTerminal('item'), NonTerminal('list')])])),
+                 Rule('item', Terminal('x'))]
+        self.assertEqual({'list': {'item', 'list'}, 'item': set()}, dependency_graph(rules))
+
+    def test_unreachable_rules(self):
+        rules = [Rule('start', NonTerminal('used')), Rule('used', Terminal('u')),
+                 Rule('loop', NonTerminal('island')), Rule('island', NonTerminal('loop'))]
+        optimized, report = optimize_grammar(rules, roots=['start'])
+        self.assertEqual(['start = used ;', 'used = "u" ;'], emit(optimized))
+        self.assertEqual(['loop', 'island'], report.unreachable_rules)
+
+    def test_merge_and_dedupe(self):
+        rules = [Rule('digit', Terminal('0')), Rule('digit', Choice([Terminal('1'), Terminal('0')]))]
+        optimized, report = optimize_grammar(rules)
+        self.assertEqual(['digit = "0" | "1" ;'], emit(optimized))
+        self.assertEqual(['digit'], report.merged_rules)
+        self.assertEqual(1, report.duplicate_alternatives)
+
+    def test_left_factoring(self):
+        a, b, c = NonTerminal('a'), NonTerminal('b'), NonTerminal('c')
+        cases = [
+            (Choice([Sequence([a, b]), Sequence([a, c])]), 'a ( b | c )'),
+            (Choice([a, Sequence([a, Terminal(','), b])]), 'a [ "," b ]'),
+            (Choice([Sequence([a, b, c]), Sequence([a, b, a]), a]), 'a [ b ( c | a ) ]'),
+            (Choice([Sequence([a, b]), c, Sequence([a, c])]), 'a b | c | a c'),
+        ]
+        for body, expected in cases:
+            with self.subTest(expected):
+                optimized, _ = optimize_grammar([Rule('rule', body)])
+                self.assertEqual(f'rule = {expected} ;', emit(optimized)[0])
+
+    def test_optional_keeps_alternatives(self):
+        a, b, c = NonTerminal('a'), NonTerminal('b'), NonTerminal('c')
+        optimized, _ = optimize_grammar([Rule('rule', Choice([a, Sequence([a, b]), Sequence([a, c])]))])
+        self.assertEqual(Sequence([a, Optional(Choice([b, c]))]), optimized[0].body)
+
+    def test_pipeline(self):
+        with tempfile.TemporaryDirectory() as output, redirect_stdout(io.StringIO()):
+            self.assertEqual(0, main(['-o', output, '-s', 'GRAMMAR_OPTIMIZE=1', fixture]))
+            with open(os.path.join(output, 'optimized.ebnf')) as f:
+                optimized = f.read()
+            with open(os.path.join(output, 'types', 'type-identifier.ebnf')) as f:
+                literal = f.read()
+
+        self.assertTrue(optimized.startswith('@@grammar :: Swift57\n'))
+        self.assertIn('(* left-factored 7 common prefixes *)\n', optimized)
+        self.assertIn('type_identifier = type_name [ "." type_identifier ] ;\n', optimized)
+        self.assertIn('type_identifier = type_name | type_name "." type_identifier ;\n', literal)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import re
+import unittest
+
+from parser.emitters import EbnfEmitter, TatsuEmitter
+from parser.nodes import CharClass, Choice, Except, NonTerminal, Sequence, Terminal
+from parser.passes import merge_char_classes
+from parser.string_parser import StringParser
+
+
+def accepts(node, code_point: int) -> bool:
+    """
+    Whether a single character node matches the given code point.
+    """
+    if isinstance(node, CharClass):
+        return any((item[0] <= code_point <= item[1]) if isinstance(item, tuple) else item == code_point
+                   for item in node.items)
+    if isinstance(node, Terminal):
+        return node.value == chr(code_point)
+    if isinstance(node, Choice):
+        return any(accepts(item, code_point) for item in node.items)
+    if isinstance(node, Except):
+        return accepts(node.item, code_point) and not accepts(node.exception, code_point)
+    raise TypeError(node.kind)
+
+
+class MergeCharClassesTests(unittest.TestCase):
+    prose = [
+        'Upper- or lowercase letter A through Z',
+        'Digit 0 or 1',
+        'Digit 0 through 9',
+        'Digit 0 through 9, a through f, or A through F',
+        'U+0000, U+0009, U+000B, U+000C, or U+0020',
+        'Any Unicode scalar value except U+000A or U+000D',
+        'Any Unicode scalar value except U+002A or U+002F',
+        'U+00A8, U+00AA, U+00AD, U+00AF, U+00B2–U+00B5, or U+00B7–U+00BA',
+        'U+0300–U+036F',
+    ]
+    samples = sorted(set(range(0x0, 0x300)) | set(range(0xD7F0, 0xE010)) | {0x10FFFF, 0x1F600})
+
+    def test_same_language(self):
+        for string in self.prose:
+            with self.subTest(string):
+                tree = StringParser().parse_tree(string)
+                merged = merge_char_classes(tree)
+                for code_point in self.samples:
+                    self.assertEqual(accepts(tree, code_point), accepts(merged, code_point), hex(code_point))
+
+    def test_merge(self):
+        cases = {
+            'Upper- or lowercase letter A through Z': '/[A-Za-z]/',
+            'Digit 0 or 1': '/[0-1]/',
+            'Digit 0 through 9, a through f, or A through F': '/[0-9A-Fa-f]/',
+            'Any Unicode scalar value except U+000A or U+000D':
+                r'/[\U00000000-\U00000009\U0000000B-\U0000000C\U0000000E-\U0000D7FF\U0000E000-\U0010FFFF]/',
+        }
+        for string, expected in cases.items():
+            with self.subTest(string):
+                self.assertEqual(expected, EbnfEmitter().emit(merge_char_classes(StringParser().parse_tree(string))))
+
+    def test_metacharacters(self):
+        for char in '.*+?(|':
+            with self.subTest(char):
+                merged = merge_char_classes(Choice([Terminal(char), Terminal(char)]))
+                self.assertEqual(CharClass([ord(char)]), merged)
+                pattern = EbnfEmitter().emit(merged)
+                self.assertEqual(f'/[{char}]/', pattern)
+                self.assertEqual(pattern, TatsuEmitter().emit(merged))
+                regex = re.compile(pattern[1:-1])
+                self.assertTrue(regex.fullmatch(char))
+                self.assertIsNone(regex.fullmatch('a'))
+        # what is left of an exception
+        tree = Except(Choice([Terminal('*'), Terminal('+')]), Terminal('+'))
+        self.assertEqual('/[*]/', EbnfEmitter().emit(merge_char_classes(tree)))
+
+    def test_keeps_order_around_other_alternatives(self):
+        tree = Choice([Terminal('-'), NonTerminal('operator'), Terminal('!'), Terminal('~')])
+        expected = Choice([Terminal('-'), NonTerminal('operator'), CharClass([ord('!'), ord('~')])])
+        self.assertEqual(expected, merge_char_classes(tree))
+
+    def test_leaves_sequences_alone(self):
+        tree = Sequence([Terminal('a'), Terminal('b')])
+        self.assertEqual(tree, merge_char_classes(tree))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,220 @@
+import os
+import random
+import tempfile
+import unittest
+
+from parser.ebnf_parser import EbnfParser, read_grammar
+from parser.emitters import EbnfEmitter
+from parser.nodes import CharClass, Choice, Except, NonTerminal, Optional, Rule, Sequence, Terminal
+from parser.peg import IncrementalParser, ParseError, ParseTimeout, PegParser
+
+
+class EbnfParserTests(unittest.TestCase):
+    def test_round_trip(self):
+        text = '\n'.join([
+            '(* Grammar of a type *)',
+            '',
+            'type = array_type | "(" type ")" ;',
+            'array_type = "[" type "]" ;',
+            r'item = ( /[\U00000000-\U0000D7FF]/ | /\U0000E000/ ) ~ ( "*" | "/" ) ;',
+            'items = item [ items ] , <prose> ;',
+        ])
+        rules = EbnfParser().parse(text)
+        self.assertEqual(['type', 'array_type', 'item', 'items'], [rule.name for rule in rules])
+        self.assertEqual(text.splitlines()[2:], [EbnfEmitter().emit(rule) for rule in rules])
+
+    def test_read_grammar(self):
+        with tempfile.TemporaryDirectory() as directory:
+            os.makedirs(os.path.join(directory, 'types'))
+            with open(os.path.join(directory, 'index.ebnf'), 'w') as f:
+                f.write('@@grammar :: Swift\n\n#include :: "types/_index.ebnf"\nstart = type ;\n')
+            with open(os.path.join(directory, 'types', '_index.ebnf'), 'w') as f:
+                f.write('#include :: "type.ebnf"\n')
+            with open(os.path.join(directory, 'types', 'type.ebnf'), 'w') as f:
+                f.write('type = "Int" ;\n')
+            rules = read_grammar(os.path.join(directory, 'index.ebnf'))
+        self.assertEqual([(os.path.join('types', 'type.ebnf'), 'type'), ('index.ebnf', 'start')],
+                         [(path, rule.name) for path, rule in rules])
+
+    def test_syntax_error(self):
+        with self.assertRaisesRegex(SyntaxError, 'expected ;'):
+            EbnfParser().parse('a = "b" = c ;')
+
+
+def expressions(**options) -> PegParser:
+    digit = CharClass([(ord('0'), ord('9'))])
+    return PegParser([
+        Rule('statements', Sequence([NonTerminal('statement'), Optional(NonTerminal('statements'))])),
+        Rule('statement', NonTerminal('expression')),
+        Rule('statement', Sequence([Terminal('let'), NonTerminal('identifier'), Terminal('='),
+                                    NonTerminal('expression')])),
+        Rule('expression', Sequence([NonTerminal('term'), Optional(Sequence([Terminal('+'),
+                                                                             NonTerminal('expression')]))])),
+        Rule('term', Choice([NonTerminal('identifier'), NonTerminal('number'),
+                             Sequence([Terminal('('), NonTerminal('expression'), Terminal(')')])])),
+        Rule('identifier', Sequence([CharClass([(ord('a'), ord('z'))]), Optional(NonTerminal('identifier'))])),
+        Rule('number', Choice([
+            Sequence([Terminal('0x'), CharClass([(ord('0'), ord('9')), (ord('a'), ord('f'))])]),
+            Sequence([digit, Optional(NonTerminal('number'))]),
+        ])),
+        Rule('whitespace', Sequence([Except(CharClass([(0, 0x7F)]), CharClass([(ord('!'), 0x7F)])),
+                                     Optional(NonTerminal('whitespace'))])),
+    ], lexical={'identifier', 'number', 'whitespace'}, **options)
+
+
+class PegParserTests(unittest.TestCase):
+    def setUp(self):
+        self.parser = expressions()
+
+    def test_parse(self):
+        source = 'let total = (a + 0xf) + 12\nlettuce + total\n'
+        self.assertEqual(len(source), self.parser.parse(source, 'statements'))
+
+    def test_keywords_are_not_identifiers(self):
+        self.assertEqual({'let'}, self.parser.keywords)
+        with self.assertRaises(ParseError) as raised:
+            self.parser.parse('let let = 1', 'statements')
+        self.assertEqual((4, 1, 5, ['identifier']), (raised.exception.offset, raised.exception.line,
+                                                     raised.exception.column, raised.exception.expected))
+
+    def test_error_at_farthest_position(self):
+        with self.assertRaisesRegex(ParseError, r"Unexpected end of input at line 2, column 7, expected: "
+                                                r"'\)', '\+'") as raised:
+            self.parser.parse('a\n(b + c', 'statements')
+        self.assertEqual(8, raised.exception.offset)
+
+    def test_left_recursion_grows(self):
+        # value reaches itself directly and through call, sum directly; the base alternatives come first
+        parser = PegParser([
+            Rule('sum', Choice([NonTerminal('value'), Sequence([NonTerminal('sum'), Terminal('+'),
+                                                                 NonTerminal('value')])])),
+            Rule('value', Choice([Terminal('a'), Sequence([Terminal('('), NonTerminal('sum'), Terminal(')')]),
+                                  Sequence([NonTerminal('value'), Terminal('!')]), NonTerminal('call')])),
+            Rule('call', Sequence([NonTerminal('value'), Terminal('('), NonTerminal('sum'), Terminal(')')])),
+        ])
+        self.assertEqual({'sum', 'value'}, parser.left_recursive)
+        for source in ['a', 'a!', 'a(a)', 'a + a(a + a!)!(a) + (a)!']:
+            self.assertEqual(len(source), parser.parse(source, 'sum'), source)
+        with self.assertRaises(ParseError):
+            parser.parse('a(a', 'sum')
+
+    def test_timeout(self):
+        self.parser.check_interval = 1
+        with self.assertRaises(ParseTimeout):
+            self.parser.parse('a + b', 'statements', timeout=-1)
+
+
+
+class MemoTests(unittest.TestCase):
+    rules = [
+        Rule('nested', Choice([Sequence([NonTerminal('group'), Terminal('+')]),
+                               Sequence([NonTerminal('group'), Terminal('-')])])),
+        Rule('group', Choice([Sequence([Terminal('('), NonTerminal('nested'), Terminal(')')]), Terminal('#')])),
+    ]
+    source = '(' * 12 + '#-' + ')-' * 12
+
+    def test_backtracked_rules(self):
+        self.assertEqual({'group'}, PegParser(self.rules).memoized)
+        self.assertEqual(set(), expressions().memoized)
+
+    def test_memo_makes_backtracking_linear(self):
+        plain = PegParser(self.rules, memo_size=0)
+        memoized = PegParser(self.rules)
+        self.assertEqual(len(self.source), plain.parse(self.source, 'nested'))
+        self.assertEqual(len(self.source), memoized.parse(self.source, 'nested'))
+        self.assertGreater(plain.calls, 2 ** 12)
+        self.assertLess(memoized.calls, 100)
+
+    def test_bounded_memo(self):
+        parser = PegParser(self.rules, memo_size=2)
+        self.assertEqual(len(self.source), parser.parse(self.source, 'nested'))
+        with self.assertRaises(ParseError):
+            parser.parse(self.source[:-1] + '*', 'nested')
+
+    def test_left_recursion(self):
+        parser = PegParser([
+            Rule('sum', Choice([Sequence([NonTerminal('sum'), Terminal('+'), NonTerminal('value')]),
+                                NonTerminal('value')])),
+            Rule('value', Choice([Terminal('a'), Sequence([Terminal('('), NonTerminal('sum'), Terminal(')')])])),
+        ])
+        self.assertEqual(3, parser.parse('(a)', 'sum'))
+        self.assertEqual(5, parser.parse('a + a', 'sum'))
+
+    def test_memo_of_grown_rules(self):
+        rules = [
+            Rule('start', Choice([Sequence([NonTerminal('sum'), Terminal('!')]),
+                                  Sequence([NonTerminal('sum'), Terminal('?')])])),
+            Rule('sum', Choice([NonTerminal('value'), Sequence([NonTerminal('sum'), Terminal('+'),
+                                                                 NonTerminal('value')])])),
+            Rule('value', Choice([Terminal('a'), Sequence([Terminal('('), NonTerminal('sum'), Terminal(')')])])),
+        ]
+        source = ' + '.join(['(a + a)'] * 20) + ' ?'
+        plain = PegParser(rules, memo_size=0)
+        memoized = PegParser(rules)
+        self.assertIn('sum', memoized.memoized)
+        self.assertEqual(len(source), plain.parse(source, 'start'))
+        self.assertEqual(len(source), memoized.parse(source, 'start'))
+        # the second alternative of start finds the grown sum in the memo instead of growing it again
+        self.assertLess(memoized.calls, plain.calls * 0.6)
+
+
+class IncrementalParserTests(unittest.TestCase):
+    def setUp(self):
+        self.document = IncrementalParser(expressions())
+        self.document.parse('let a = 1\nb + (c + 2)\nd\n')
+
+    def assertParsedAgain(self, expected: range, reparsed: range):
+        self.assertEqual(expected, reparsed)
+        fresh = IncrementalParser(expressions())
+        fresh.parse(self.document.text)
+        self.assertEqual(fresh.spans, self.document.spans)
+
+    def test_parse(self):
+        self.assertEqual([(0, 9), (9, 21), (21, 23)], self.document.spans)
+
+    def test_edit_in_one_item(self):
+        self.assertParsedAgain(range(1, 2), self.document.edit(15, 16, 'count'))
+        self.assertEqual('let a = 1\nb + (count + 2)\nd\n', self.document.text)
+        self.assertEqual((25, 27), self.document.spans[2])
+
+    def test_edit_joining_items(self):
+        self.assertParsedAgain(range(0, 1), self.document.edit(9, 10, ' + '))
+        self.assertEqual(2, len(self.document.spans))
+
+    def test_edit_splitting_items(self):
+        self.assertParsedAgain(range(1, 3), self.document.edit(12, 13, '\n'))
+        self.assertEqual(['b', '(c + 2)'], [self.document.text[start:end].strip()
+                                            for start, end in self.document.spans[1:3]])
+
+    def test_edit_at_the_end(self):
+        self.assertParsedAgain(range(2, 3), self.document.edit(23, 23, 'e + f'))
+        self.assertEqual('de + f', self.document.text[21:].strip())
+        self.assertParsedAgain(range(3, 4), self.document.edit(29, 29, 'g'))
+
+    def test_error_and_recovery(self):
+        with self.assertRaises(ParseError):
+            self.document.edit(16, 16, ' +')
+        # b alone still parses, the item after it does not
+        self.assertEqual([(0, 9), (9, 11)], self.document.spans)
+        self.assertFalse(self.document.complete)
+        self.assertParsedAgain(range(1, 3), self.document.edit(16, 18, ''))
+        self.assertTrue(self.document.complete)
+
+    def test_random_edits(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            start = rng.randrange(len(self.document.text) + 1)
+            end = min(len(self.document.text), start + rng.randrange(3))
+            replaced = self.document.text[start:end]
+            replacement = rng.choice(['', 'x', ' ', '\n', '+ ', '(1)', 'let y = '])
+            try:
+                self.document.edit(start, end, replacement)
+            except ParseError:
+                # undoing the edit goes back to text that parses
+                self.document.edit(start, start + len(replacement), replaced)
+            fresh = IncrementalParser(expressions())
+            fresh.parse(self.document.text)
+            self.assertEqual(fresh.spans, self.document.spans, repr(self.document.text))
+
+if __name__ == '__main__':
+    unittest.main()
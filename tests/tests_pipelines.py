@@ -0,0 +1,119 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from swift_syntax.offline import convert, get_settings
+from swift_syntax.pipelines import SwiftSyntaxPipeline
+from swift_syntax.spiders.swift import SwiftSpider
+
+fixture = os.path.join(os.path.dirname(__file__), 'fixtures', 'zzSummaryOfTheGrammar.html')
+
+
+def read_tree(path):
+    tree = {}
+    for root, _, files in os.walk(path):
+        for name in files:
+            with open(os.path.join(root, name)) as f:
+                tree[os.path.relpath(os.path.join(root, name), path)] = f.read()
+    return tree
+
+
+class PipelineTests(unittest.TestCase):
+    def setUp(self):
+        with open(fixture, encoding='utf-8') as f:
+            self.html = f.read()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def run_pipeline(self, name, **overrides):
+        settings = get_settings()
+        settings.set('GRAMMAR_DIR', os.path.join(self.tmp.name, name))
+        for key, value in overrides.items():
+            settings.set(key, value)
+        spider = SwiftSpider(streaming=settings.getbool('GRAMMAR_STREAMING'))
+        with redirect_stdout(io.StringIO()):
+            convert(self.html, SwiftSyntaxPipeline.from_settings(settings), spider)
+        return read_tree(os.path.join(self.tmp.name, name))
+
+    def test_parallel_matches_serial(self):
+        serial = self.run_pipeline('serial')
+        parallel = self.run_pipeline('parallel', GRAMMAR_WORKERS=2)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(24, len(serial))
+
+    def test_cached_run_matches(self):
+        cache_dir = os.path.join(self.tmp.name, 'cache')
+        fresh = self.run_pipeline('fresh', GRAMMAR_CACHE_DIR=cache_dir)
+        cached = self.run_pipeline('cached', GRAMMAR_CACHE_DIR=cache_dir)
+        parallel = self.run_pipeline('parallel', GRAMMAR_CACHE_DIR=cache_dir, GRAMMAR_WORKERS=2)
+        self.assertEqual(fresh, cached)
+        self.assertEqual(fresh, parallel)
+
+    def test_incremental_run(self):
+        output = os.path.join(self.tmp.name, 'incremental')
+        manifest = os.path.join(self.tmp.name, 'manifest.json')
+        full = self.run_pipeline('incremental', GRAMMAR_INCREMENTAL=True, GRAMMAR_MANIFEST=manifest)
+        self.assertEqual(self.run_pipeline('literal'), full)
+        with open(manifest) as f:
+            self.assertEqual(len(full), len(json.load(f)['added']))
+
+        mtime = os.stat(os.path.join(output, 'types', 'type.ebnf')).st_mtime_ns
+        start = self.html.index('<div class="section" id="ID_statements">')
+        end = self.html.index('</div>\n\n</div>\n</article>')
+        self.html = self.html[:start] + self.html[end + len('</div>\n'):]
+        self.html = self.html.replace('<code>?</code>', '<code>!</code>')
+        self.run_pipeline('incremental', GRAMMAR_INCREMENTAL=True, GRAMMAR_MANIFEST=manifest)
+
+        with open(manifest) as f:
+            self.assertEqual({
+                'added': [],
+                'changed': [os.path.join('expressions', 'optional-chaining-expression.ebnf'), 'index.ebnf',
+                            os.path.join('types', 'optional-type.ebnf')],
+                'removed': [os.path.join('statements', name) for name in ['_index.ebnf', 'declaration.ebnf',
+                                                                         'statement.ebnf']],
+            }, json.load(f))
+        self.assertFalse(os.path.exists(os.path.join(output, 'statements')))
+        self.assertEqual(mtime, os.stat(os.path.join(output, 'types', 'type.ebnf')).st_mtime_ns)
+
+    def test_streaming_matches_sections(self):
+        sections = self.run_pipeline('sections')
+        self.assertEqual(sections, self.run_pipeline('streaming', GRAMMAR_STREAMING=True))
+        self.assertEqual(sections, self.run_pipeline('streaming', GRAMMAR_STREAMING=True, GRAMMAR_INCREMENTAL=True))
+
+    def test_echo_also_logs(self):
+        settings = get_settings()
+        settings.set('GRAMMAR_DIR', os.path.join(self.tmp.name, 'echo'))
+        settings.set('GRAMMAR_ECHO', True)
+        stdout = io.StringIO()
+        with redirect_stdout(stdout), self.assertLogs('swift_syntax.pipelines', 'DEBUG') as logs:
+            convert(self.html, SwiftSyntaxPipeline.from_settings(settings), SwiftSpider())
+        line = 'array_type = "[" type "]" ;'
+        self.assertIn(line, stdout.getvalue().splitlines())
+        self.assertIn(f'DEBUG:swift_syntax.pipelines:{line}', logs.output)
+
+    def test_streaming_starts_no_workers(self):
+        settings = get_settings()
+        settings.set('GRAMMAR_DIR', os.path.join(self.tmp.name, 'streaming'))
+        settings.set('GRAMMAR_WORKERS', 2)
+        pipeline = SwiftSyntaxPipeline.from_settings(settings)
+        spider = SwiftSpider(streaming=True)
+        with self.assertLogs('swift_syntax.pipelines', 'WARNING') as logs:
+            pipeline.open_spider(spider)
+        self.assertIsNone(pipeline.executor)
+        self.assertIn('GRAMMAR_WORKERS is ignored', logs.output[0])
+        pipeline.close_spider(spider)
+
+    def test_streaming_with_whole_grammar_outputs(self):
+        settings = get_settings()
+        settings.set('GRAMMAR_DIR', os.path.join(self.tmp.name, 'streaming'))
+        settings.set('GRAMMAR_ARTIFACT', True)
+        settings.set('GRAMMAR_OPTIMIZE', True)
+        pipeline = SwiftSyntaxPipeline.from_settings(settings)
+        spider = SwiftSpider(streaming=True)
+        with self.assertLogs('swift_syntax.pipelines', 'WARNING') as logs:
+            pipeline.open_spider(spider)
+        self.assertIn('GRAMMAR_OPTIMIZE, GRAMMAR_ARTIFACT keep every definition in memory', logs.output[0])
+        pipeline.close_spider(spider)
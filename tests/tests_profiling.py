@@ -0,0 +1,35 @@
+import unittest
+
+from parser.string_parser import StringParser
+from swift_syntax import profiling
+
+
+class ProfilingTests(unittest.TestCase):
+    def tearDown(self):
+        profiling.disable()
+        profiling.reset()
+
+    def test_enable_and_disable(self):
+        original = StringParser.__dict__['parse']
+        profiling.enable()
+        self.assertIsNot(original, StringParser.__dict__['parse'])
+        StringParser().parse('U+000A')
+        StringParser().parse('Digit 0 or 1')
+        profiling.disable()
+        self.assertIs(original, StringParser.__dict__['parse'])
+
+        StringParser().parse('U+000A')
+        calls, seconds = profiling.totals['StringParser.parse']
+        self.assertEqual(2, calls)
+        self.assertGreater(seconds, 0)
+
+    def test_report_to_stats(self):
+        class Stats(dict):
+            def set_value(self, key, value):
+                self[key] = value
+
+        profiling.record('download', 0.5)
+        profiling.record('download', 0.25)
+        stats = Stats()
+        profiling.report(stats)
+        self.assertEqual({'timers/download/calls': 2, 'timers/download/seconds': 0.75}, stats)
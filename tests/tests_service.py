@@ -0,0 +1,118 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from swift_syntax import offline, service
+
+fixture = os.path.join(os.path.dirname(__file__), 'fixtures', 'zzSummaryOfTheGrammar.html')
+
+sources = {
+    'App.swift': 'let total: [Int] = -(count + 1) * 0x1F; // sum\nvar name = "a\\"b"\n',
+    os.path.join('Model', 'Item.swift'): '/* an /* inner */ comment */\nflag == true\n',
+    os.path.join('Model', 'Broken.swift'): 'let = 1\n',
+    'notes.txt': 'not swift',
+}
+
+
+class ServiceTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.grammar = os.path.join(cls.directory.name, 'grammar')
+        with redirect_stdout(io.StringIO()):
+            offline.main(['-o', cls.grammar, fixture])
+        cls.sources = os.path.join(cls.directory.name, 'sources')
+        for path, text in sources.items():
+            os.makedirs(os.path.dirname(os.path.join(cls.sources, path)), exist_ok=True)
+            with open(os.path.join(cls.sources, path), 'w') as f:
+                f.write(text)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_find_sources(self):
+        expected = ['App.swift', os.path.join('Model', 'Broken.swift'), os.path.join('Model', 'Item.swift')]
+        self.assertEqual(expected, [os.path.relpath(path, self.sources)
+                                    for path in service.find_sources([self.sources])])
+
+    def test_parse_files(self):
+        grammar = os.path.join(self.grammar, 'index.ebnf')
+        records = {os.path.basename(record['path']): record
+                   for record in service.parse_files(service.find_sources([self.sources]), grammar)}
+        self.assertEqual({'App.swift': True, 'Item.swift': True, 'Broken.swift': False},
+                         {name: record['ok'] for name, record in records.items()})
+        self.assertEqual((65, 2), (records['App.swift']['bytes'], records['App.swift']['lines']))
+        error = records['Broken.swift']['error']
+        self.assertEqual(('syntax', 4, 1, 5, ['identifier']),
+                         (error['kind'], error['offset'], error['line'], error['column'], error['expected']))
+
+    def test_timeout(self):
+        service.setup(os.path.join(self.grammar, 'index.ebnf'), 'Lexical Structure', None, -1)
+        service._parser.check_interval = 1
+        try:
+            record = service.parse_file(os.path.join(self.sources, 'App.swift'))
+        finally:
+            service._parser.check_interval = 4096
+        self.assertEqual('timeout', record['error']['kind'])
+
+    def test_left_recursive_rules(self):
+        # optional types and postfix expressions are left recursive in the reference grammar
+        path = os.path.join(self.directory.name, 'Postfix.swift')
+        with open(path, 'w') as f:
+            f.write('let size: [Int?]? = nil\nlet count = items.count + 1\nvar first = items[0]!.name\n'
+                    'let value = load(path)?.value.0\n-shapes.first!.area(scale) == total\n')
+        records = list(service.parse_files([path], os.path.join(self.grammar, 'index.ebnf')))
+        self.assertTrue(records[0]['ok'], records[0]['error'])
+
+    def test_longest_literal(self):
+        path = os.path.join(self.directory.name, 'Float.swift')
+        with open(path, 'w') as f:
+            f.write('let x = 1.5\nlet y = x-1 * -2.5e3\n')
+        records = list(service.parse_files([path], os.path.join(self.grammar, 'index.ebnf')))
+        self.assertTrue(records[0]['ok'], records[0]['error'])
+
+    def test_deep_source_in_process(self):
+        path = os.path.join(self.directory.name, 'Deep.swift')
+        with open(path, 'w') as f:
+            f.write('let x = 1\n' * 2000)
+        limit = sys.getrecursionlimit()
+        records = list(service.parse_files([path, path], os.path.join(self.grammar, 'index.ebnf')))
+        self.assertEqual([True, True], [record['ok'] for record in records])
+        # the limit is set back once the files are parsed, and the parse thread is kept for the next run
+        self.assertEqual(limit, sys.getrecursionlimit())
+        thread = service._parse_thread
+        list(service.parse_files([path], os.path.join(self.grammar, 'index.ebnf')))
+        self.assertIs(thread, service._parse_thread)
+
+    @unittest.skipIf(service.resource is None or service.address_space() is None, 'needs /proc and resource')
+    def test_memory_budget_per_file(self):
+        limits = service.resource.getrlimit(service.resource.RLIMIT_AS)
+        with self.assertRaises(MemoryError):
+            with service.memory_budget(16 * 1024 * 1024):
+                bytearray(64 * 1024 * 1024)
+        self.assertEqual(limits, service.resource.getrlimit(service.resource.RLIMIT_AS))
+        # the budget is on top of what the process already has, however much that is
+        kept = bytearray(64 * 1024 * 1024)
+        with service.memory_budget(16 * 1024 * 1024):
+            bytearray(8 * 1024 * 1024)
+        del kept
+
+    def test_main_with_workers(self):
+        output = os.path.join(self.directory.name, 'results.jsonl')
+        self.assertEqual(1, service.main(['-g', os.path.join(self.grammar, 'index.ebnf'), '-o', output, '-j', '2',
+                                          self.sources, os.path.join(self.sources, 'missing.swift')]))
+        with open(output) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(4, len(records))
+        self.assertEqual(2, sum(record['ok'] for record in records))
+        kinds = sorted(record['error']['kind'] for record in records if not record['ok'])
+        self.assertEqual(['read', 'syntax'], kinds)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import filecmp
+import functools
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import contextmanager, redirect_stdout
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from swift_syntax.offline import main
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+fixture = os.path.join(os.path.dirname(__file__), 'fixtures', 'zzSummaryOfTheGrammar.html')
+
+regex_literals = '''<html><head><title>SE-0354</title></head><body>
+<h1>Regex Literals</h1>
+<div class="admonition grammar">
+<p class="admonition-title">Grammar of a regex literal</p>
+<div class="syntax-group">
+<p class="syntax-def"><span class="syntax-def-name"><a id="grammar_regex-literal"></a>regex-literal</span>
+<span class="arrow">→</span> <code>/</code></p>
+</div>
+</div>
+</body></html>
+'''
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def serve(directory: str):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=directory))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def write_mirror(directory: str, url: str):
+    """
+    A book with the grammar summary, a chapter repeating one of its sections with other links and a page without
+    grammar, plus an evolution proposal with a grammar block of its own.
+    """
+    with open(fixture, encoding='utf-8') as f:
+        summary = f.read()
+    types = summary[summary.index('<div class="section" id="ID_types">'):
+                    summary.index('<div class="section" id="ID_expressions">')]
+    chapter = ('<html><head><title>Types</title></head><body><div class="section" id="types"><h1>Types</h1>\n'
+               + types.replace('href="#', 'href="summary.html#') + '</div></body></html>\n')
+    pages = {
+        os.path.join('book', 'summary.html'): summary,
+        os.path.join('book', 'types.html'): chapter,
+        os.path.join('book', 'about.html'): '<html><body><h1>About</h1><p>No grammar here.</p></body></html>\n',
+        os.path.join('evolution', '0354-regex-literals.html'): regex_literals,
+    }
+    for path, text in pages.items():
+        os.makedirs(os.path.join(directory, os.path.dirname(path)), exist_ok=True)
+        with open(os.path.join(directory, path), 'w', encoding='utf-8') as f:
+            f.write(text)
+    locations = ''.join(f'<url><loc>{url}/book/{name}</loc></url>' for name in ['summary.html', 'types.html',
+                                                                               'about.html'])
+    with open(os.path.join(directory, 'sitemap.xml'), 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locations}</urlset>\n')
+
+
+def scrapy(*args: str):
+    subprocess.run([sys.executable, '-m', 'scrapy', *args, '-s', 'LOG_LEVEL=ERROR'], cwd=root, check=True,
+                   capture_output=True)
+
+
+def same_tree(left: str, right: str) -> bool:
+    comparison = filecmp.dircmp(left, right)
+    if comparison.left_only or comparison.right_only or comparison.funny_files:
+        return False
+    _, mismatch, errors = filecmp.cmpfiles(left, right, comparison.common_files, shallow=False)
+    return not mismatch and not errors and all(same_tree(os.path.join(left, name), os.path.join(right, name))
+                                               for name in comparison.common_dirs)
+
+
+class SitesTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.mirror = os.path.join(self.directory.name, 'mirror')
+        self.cache = os.path.join(self.directory.name, 'httpcache')
+
+    def crawl(self, command: str, url: str, output: str, *options: str):
+        scrapy(command, 'swift_sites', '-a', f'sitemap={url}/sitemap.xml',
+               '-a', f'urls={url}/evolution/0354-regex-literals.html', '-s', f'GRAMMAR_DIR={output}',
+               '-s', f'HTTPCACHE_DIR={self.cache}', *options)
+
+    def test_crawl_sitemap(self):
+        output = os.path.join(self.directory.name, 'grammar')
+        with serve(self.mirror) as url:
+            write_mirror(self.mirror, url)
+            scrapy('crawl', 'swift_sites', '-a', f'sitemap={url}/sitemap.xml', '-s', f'GRAMMAR_DIR={output}',
+                   '-s', 'HTTPCACHE_ENABLED=0')
+
+        # the chapter repeats the summary, so the grammar is the one of the summary alone
+        expected = os.path.join(self.directory.name, 'expected')
+        with redirect_stdout(io.StringIO()):
+            main(['-o', expected, fixture])
+        self.assertTrue(same_tree(expected, output))
+
+    def test_convert_from_warm_cache(self):
+        warmed = os.path.join(self.directory.name, 'warmed')
+        live = os.path.join(self.directory.name, 'live')
+        with serve(self.mirror) as url:
+            write_mirror(self.mirror, url)
+            self.crawl('warmup', url, warmed)
+            self.assertFalse(os.path.exists(warmed))
+            self.crawl('crawl', url, live, '-s', 'HTTPCACHE_ENABLED=0')
+
+        # the mirror is gone, every page comes from the cache
+        cached = os.path.join(self.directory.name, 'cached')
+        self.crawl('crawl', url, cached, '-s', 'HTTPCACHE_IGNORE_MISSING=1')
+        with open(os.path.join(cached, 'regex-literals', 'regex-literal.ebnf')) as f:
+            self.assertIn('regex_literal = "/" ;', f.read())
+        self.assertTrue(same_tree(live, cached))
+
+
+if __name__ == '__main__':
+    unittest.main()
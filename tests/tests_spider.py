@@ -0,0 +1,75 @@
+import os
+import unittest
+
+from scrapy import Selector
+
+from parser.item_parser import Parser
+from parser.item_tokenizer import Tokenizer
+from swift_syntax.spiders.swift import SwiftSpider
+
+fixture = os.path.join(os.path.dirname(__file__), 'fixtures', 'zzSummaryOfTheGrammar.html')
+
+
+def legacy_syntax_def(node: Selector):
+    """
+    The extraction the spider used before, kept as the reference.
+    """
+    items = node.xpath('*|*/following-sibling::text()')
+    for idx, item in enumerate(items):
+        if not item.extract().strip():
+            del items[idx]
+        elif not item.extract().startswith('<'):
+            items[idx] = item.extract().strip()
+    return items
+
+
+def tokens(items) -> list:
+    tokenizer = Tokenizer(items)
+    result = []
+    while tokenizer.has_more_tokens():
+        result.append(tokenizer.get_next_token())
+    return result
+
+
+def syntax_def(html: str) -> Selector:
+    return Selector(text=html).css('p.syntax-def')[0]
+
+
+class SyntaxDefExtractionTests(unittest.TestCase):
+    def test_grammar_page(self):
+        with open(fixture, encoding='utf-8') as f:
+            nodes = Selector(text=f.read()).css('p.syntax-def')
+        self.assertEqual(99, len(nodes))
+        for node in nodes:
+            with self.subTest(html=node.get()):
+                items = SwiftSpider.parse_syntax_def(node)
+                legacy = legacy_syntax_def(node)
+                self.assertEqual(tokens(legacy), tokens(items))
+                self.assertEqual(Parser().parse(legacy), Parser().parse(items))
+                # every tag of the page has a well-known shape, none is kept as an element
+                self.assertTrue(all(isinstance(item, (str, tuple)) for item in items))
+
+    def test_items(self):
+        node = syntax_def('<p class="syntax-def"><span class="syntax-def-name"><a id="grammar_a"></a>a</span> '
+                          '<span class="arrow">→</span> <code>b</code><sub>opt</sub> | c </p>')
+        self.assertEqual([('span', 'syntax-def-name', 'a', 'grammar_a'), ('span', 'arrow', '→'), ('code', None, 'b'),
+                          ('sub', None, 'opt'), '| c'], SwiftSpider.parse_syntax_def(node))
+
+    def test_unusual_tags_stay_elements(self):
+        node = syntax_def('<p class="syntax-def">before <span class="syntax-def-name">a</span> '
+                          '<span class="syntactic-category"><em>b</em></span></p>')
+        items = SwiftSpider.parse_syntax_def(node)
+        self.assertEqual(('span', 'syntax-def-name', 'a'), items[0])
+        self.assertEqual('em', items[1][0].tag)
+        self.assertEqual(2, len(items))
+
+    def test_texts_the_legacy_extraction_got_wrong(self):
+        # a blank text right before another text, and a text starting with "<"
+        node = syntax_def('<p class="syntax-def"><code>a</code> <!-- c --> b <code>c</code> &lt;d</p>')
+        self.assertEqual([('code', None, 'a'), 'b', ('code', None, 'c'), '<d'], SwiftSpider.parse_syntax_def(node))
+        with self.assertRaises(SyntaxError):
+            tokens(legacy_syntax_def(node))
+
+
+if __name__ == '__main__':
+    unittest.main()
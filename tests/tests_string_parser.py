@@ -1,11 +1,20 @@
 import math
+import os
 import unittest
 from pprint import pprint
 
+from scrapy import Selector
+
+from parser.item_tokenizer import Tokenizer
+from parser.nodes import CharClass, Except, NonTerminal, Prose
 from parser.string_tokenizer import StringTokenizer, Token
-from parser.string_parser import StringParser
+from parser.string_parser import compile_table, LOOK, DROP, StringParser
+from swift_syntax.spiders.swift import SwiftSpider
+from tests.reference_string_parser import RecursiveStringParser, parse_all
 import re
 
+fixture = os.path.join(os.path.dirname(__file__), 'fixtures', 'zzSummaryOfTheGrammar.html')
+
 
 class StringParserTests(unittest.TestCase):
     parser: StringParser
@@ -96,3 +105,75 @@ class StringParserTests(unittest.TestCase):
         expected = '"0" | "1"'
         result = self.parser.parse(s)
         self.assertEqual(expected, result)
+
+    def test_long_sequence_does_not_recurse(self):
+        s = ' followed by '.join(f'U+{i:04X}' for i in range(5000))
+        tree = self.parser.parse_tree(s)
+        self.assertEqual(5000, len(tree.items))
+        self.assertEqual(CharClass([4999], unicode=True), tree.items[-1])
+
+    def test_nested_exceptions(self):
+        self.assertEqual(Except(NonTerminal('identifier'), Except(NonTerminal('keyword'), NonTerminal('operator'))),
+                         self.parser.parse_tree('identifier except keyword except operator'))
+
+    def test_trailing_tokens_are_ignored(self):
+        self.assertEqual(CharClass([0xA], unicode=True), self.parser.parse_tree('U+000A U+000B foo'))
+        # the token after the expression is still read
+        with self.assertRaisesRegex(SyntaxError, 'Unexpected token: "f"$'):
+            self.parser.parse_tree('U+000A foo')
+
+    def test_syntax_errors(self):
+        with self.assertRaisesRegex(SyntaxError, 'Unexpected end of input, expected: CHAR'):
+            self.parser.parse_tree('Digit 0 through')
+        with self.assertRaisesRegex(SyntaxError, 'Unexpected token: "and", expected THROUGH'):
+            self.parser.parse_tree('Upper- or lowercase letter a and z')
+
+    def test_parse_many(self):
+        strings = ['U+000A, U+000B, or U+000C', 'Digit 0 or 1', 'A decimal integer greater than zero']
+        lines = self.parser.parse_many(strings)
+        self.assertNotIsInstance(lines, list)
+        self.assertEqual([StringParser().parse(s) for s in strings], list(lines))
+
+    def test_parse_many_fallback(self):
+        strings = ['U+000A', 'Digit 0 through', 'Digit 0 or 1']
+        self.assertEqual([CharClass([0xA], unicode=True), Prose('Digit 0 through'), self.parser.parse_tree(strings[2])],
+                         list(self.parser.parse_trees(strings, fallback=Prose)))
+        with self.assertRaises(SyntaxError):
+            list(self.parser.parse_many(strings))
+
+    def test_same_trees_as_recursive_descent(self):
+        with open(fixture, encoding='utf-8') as f:
+            nodes = Selector(text=f.read()).css('p.syntax-def')
+        page = []
+        for node in nodes:
+            tokenizer = Tokenizer(SwiftSpider.parse_syntax_def(node))
+            while tokenizer.has_more_tokens():
+                token = tokenizer.get_next_token()
+                if token.type == 'STRING':
+                    page.append(token.value)
+        long = [', '.join(f'U+{i:04X}' for i in range(500)) + ', or U+01F4',
+                ' followed by '.join(f'U+{i:04X}' for i in range(500))]
+        for name, strings in [('page', page), ('long', long)]:
+            with self.subTest(name):
+                self.assertEqual(parse_all(RecursiveStringParser, strings), parse_all(StringParser, strings))
+
+
+class ParseTableTests(unittest.TestCase):
+    token_types = ['A', 'B', 'C']
+
+    def test_conflict(self):
+        grammar = [('start', 'A B', None), ('start', 'other', None), ('other', 'A C', None)]
+        with self.assertRaisesRegex(ValueError, 'start has two productions starting with A'):
+            compile_table(grammar, self.token_types, set())
+
+    def test_unknown_symbol(self):
+        with self.assertRaisesRegex(ValueError, 'Unknown symbol D in a production of start'):
+            compile_table([('start', 'A D', None)], self.token_types, set())
+
+    def test_empty_production_is_the_default(self):
+        grammar = [('start', 'A tail', None), ('tail', 'B', None), ('tail', '', None)]
+        table = compile_table(grammar, self.token_types, set())
+        tail = table['A'][0][0]
+        self.assertEqual(((), LOOK), tail['C'])
+        self.assertEqual(((), LOOK), tail[None])
+        self.assertEqual(((), DROP), tail['B'])
@@ -0,0 +1,63 @@
+import unittest
+
+from parser.string_tokenizer import scan, StringTokenizer, Token
+
+
+class StringTokenizerTests(unittest.TestCase):
+    def tokenize(self, s):
+        tokenizer = StringTokenizer(s)
+        tokens = []
+        while tokenizer.has_more_tokens():
+            token = tokenizer.get_next_token()
+            if token is not None:
+                tokens.append(token)
+        return tokens
+
+    def test_unicode_alternation(self):
+        expected = [
+            Token('UNICODE', 'U+000A'), Token('COMMA', ','),
+            Token('UNICODE', 'U+000B'), Token('COMMA', ','),
+            Token('OR', 'or'), Token('UNICODE', 'U+000C'),
+        ]
+        self.assertEqual(expected, self.tokenize('U+000A, U+000B, or U+000C'))
+
+    def test_skips_whitespace_runs(self):
+        expected = [Token('DIGIT', 'Digit'), Token('CHAR', '0'), Token('THROUGH', 'through'), Token('CHAR', '9')]
+        self.assertEqual(expected, self.tokenize('  Digit   0\n through\t9  '))
+        self.assertEqual([], self.tokenize('   '))
+
+    def test_word_boundary_at_cursor(self):
+        # a hyphen is only a CHAR when it stands on its own
+        with self.assertRaises(SyntaxError):
+            self.tokenize('U+000A-U+000B')
+
+    def test_long_input_does_not_recurse(self):
+        s = ' '.join(['U+000A followed by'] * 5000) + ' U+000B'
+        tokens = self.tokenize(s)
+        self.assertEqual(10001, len(tokens))
+        self.assertEqual(Token('UNICODE', 'U+000B'), tokens[-1])
+
+    def test_scan(self):
+        for s in ['U+000A, U+000B, or U+000C', '  Digit   0\n through\t9  ', '   ', '']:
+            types, values, error = scan(s)
+            self.assertEqual(self.tokenize(s), [Token(*token) for token in zip(types, values)])
+            self.assertIsNone(error)
+
+    def test_scan_stops_at_error(self):
+        types, values, error = scan('U+000A or  U+000A-U+000B')
+        self.assertEqual(['UNICODE', 'OR', 'UNICODE'], types)
+        self.assertEqual(['U+000A', 'or', 'U+000A'], values)
+        self.assertEqual('Unexpected token: "-"', str(error))
+
+    def test_reset(self):
+        tokenizer = StringTokenizer('U+000A or')
+        tokenizer.get_next_token()
+        tokenizer.reset('Digit 0')
+        self.assertEqual(Token('DIGIT', 'Digit'), tokenizer.get_next_token())
+
+    def test_scan_into_buffers(self):
+        buffers = ['STALE'], ['stale']
+        types, values, _ = scan('U+000A or U+000B', buffers)
+        self.assertIs(buffers[0], types)
+        self.assertEqual(['UNICODE', 'OR', 'UNICODE'], buffers[0])
+        self.assertEqual(['U+000A', 'or', 'U+000B'], buffers[1])
@@ -0,0 +1,101 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from swift_syntax.offline import get_settings, main
+from swift_syntax.versions import diff_versions, manifest_filename, VersionedGrammar
+
+fixture = os.path.join(os.path.dirname(__file__), 'fixtures', 'zzSummaryOfTheGrammar.html')
+
+nil_literal = ('<p class="syntax-def"><span class="syntax-def-name"><a id="grammar_nil-literal"></a>nil-literal</span> '
+               '<span class="arrow">→</span> <code>nil</code></p>')
+regex_literal = ('<p class="syntax-def"><span class="syntax-def-name"><a id="grammar_regex-literal"></a>regex-literal'
+                 '</span> <span class="arrow">→</span> <code>/</code></p>')
+
+
+def next_version(html: str) -> str:
+    """
+    The fixture as the next Swift version: one rule removed, one added and one changed.
+    """
+    assert nil_literal in html
+    return (html.replace('Swift 5.7', 'Swift 5.8')
+            .replace(nil_literal, regex_literal)
+            .replace('<code>-</code> | <code>!</code></p>', '<code>-</code> | <code>!</code> | <code>~</code></p>'))
+
+
+class VersionsTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        with open(fixture, encoding='utf-8') as f:
+            self.html = f.read()
+        self.snapshot = os.path.join(self.directory.name, 'swift-5.8.html')
+        with open(self.snapshot, 'w', encoding='utf-8') as f:
+            f.write(next_version(self.html))
+        self.output = os.path.join(self.directory.name, 'grammar')
+
+    def test_diff_versions(self):
+        self.assertEqual(dict(added=['d'], removed=['a'], changed=['c']),
+                         diff_versions({'a': '1', 'b': '2', 'c': '3'}, {'b': '2', 'c': '4', 'd': '5'}))
+
+    def test_convert_versions(self):
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(0, main(['-o', self.output, '--versions', fixture, self.snapshot]))
+
+        with open(os.path.join(self.output, manifest_filename)) as f:
+            manifest = json.load(f)
+        old, new = manifest['versions']
+        self.assertEqual(('Swift 5.7', 'swift-5-7', 'Swift 5.8', 'swift-5-8'),
+                         (old['name'], old['directory'], new['name'], new['directory']))
+        for version in manifest['versions']:
+            with open(os.path.join(self.output, version['directory'], 'index.ebnf')) as f:
+                self.assertIn('@@grammar :: ' + version['name'].replace(' ', '').replace('.', ''), f.read())
+
+        # only the added and the changed definition are parsed again
+        self.assertEqual(2, new['parsed'])
+        self.assertEqual(old['parsed'] + old['reused'], new['parsed'] + new['reused'])
+        self.assertEqual([dict(old='Swift 5.7', new='Swift 5.8', added=['regex_literal'], removed=['nil_literal'],
+                               changed=['prefix_operator'])], manifest['diffs'])
+
+        # unchanged rules are stored once
+        self.assertEqual(old['rules']['type'], new['rules']['type'])
+        self.assertEqual(len(old['rules']) + 2, len(manifest['rules']))
+        changed = [manifest['rules'][version['rules']['prefix_operator']] for version in manifest['versions']]
+        self.assertEqual(['prefix_operator = "-" | "!" ;', 'prefix_operator = "-" | "!" | "~" ;'],
+                         [rule['lines'][0] for rule in changed])
+        self.assertEqual('expressions', changed[0]['section'])
+
+    def settings(self):
+        settings = get_settings()
+        settings.set('GRAMMAR_DIR', self.output)
+        return settings
+
+    def test_persistent_cache(self):
+        settings = self.settings()
+        settings.set('GRAMMAR_CACHE_DIR', os.path.join(self.directory.name, 'cache'))
+        parsed = []
+        for _ in range(2):
+            grammar = VersionedGrammar(settings)
+            try:
+                parsed.append(grammar.add(fixture, self.html)['parsed'])
+            finally:
+                grammar.close()
+        self.assertTrue(parsed[0])
+        self.assertEqual(0, parsed[1])
+
+    def test_same_version_twice(self):
+        grammar = VersionedGrammar(self.settings())
+        try:
+            first = grammar.add(fixture, self.html)
+            second = grammar.add(fixture, self.html)
+        finally:
+            grammar.close()
+        self.assertEqual(('swift-5-7', 'swift-5-7-2'), (first['directory'], second['directory']))
+        self.assertEqual((0, dict(old='Swift 5.7', new='Swift 5.7', added=[], removed=[], changed=[])),
+                         (second['parsed'], grammar.diffs[0]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from parser.item_parser import Parser
+from parser.symbols import SymbolTable
+from swift_syntax.offline import main
+from swift_syntax.xref import lookup, main as xref_main
+
+fixture = os.path.join(os.path.dirname(__file__), 'fixtures', 'zzSummaryOfTheGrammar.html')
+
+
+class SymbolTableTests(unittest.TestCase):
+    def test_interned_names(self):
+        symbols = SymbolTable()
+        name = symbols.name('array-type')
+        self.assertEqual('array_type', name)
+        self.assertIs(name, symbols.name('array-type'))
+        self.assertIs(name, symbols.name('arrayType'))
+        self.assertEqual(1, len(symbols))
+
+    def test_parsers_share_a_table(self):
+        symbols = SymbolTable()
+        items = [('span', 'syntax-def-name', 'array-type'), ('span', 'arrow', '→'),
+                 ('span', 'syntactic-category', 'element-type')]
+        first = Parser(symbols).parse_tree(items)
+        second = Parser(symbols).parse_tree(items)
+        self.assertIs(first.name, second.name)
+        self.assertIs(first.body.name, second.body.name)
+        self.assertIn('element-type', symbols)
+
+
+class CrossReferenceTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def convert(self, *options: str) -> str:
+        output = os.path.join(self.directory.name, 'grammar')
+        with redirect_stdout(io.StringIO()):
+            main(['-o', output, *options, fixture])
+        return output
+
+    def line(self, output: str, location: dict) -> str:
+        with open(os.path.join(output, location['file'])) as f:
+            return f.read().splitlines()[location['line'] - 1]
+
+    def test_definitions_and_uses(self):
+        output = self.convert('-s', 'GRAMMAR_XREF=xref.json')
+        index = os.path.join(output, 'xref.json')
+        entry = lookup(index, 'type')
+        self.assertEqual(4, len(entry['definitions']))
+        self.assertEqual(dict(section='Types', group='Grammar of a type', file=os.path.join('types', 'type.ebnf'),
+                              line=3, anchor='grammar_type'), entry['definitions'][0])
+        self.assertEqual([('type', '#grammar_type'), ('array_type', '#grammar_type'),
+                          ('optional_type', '#grammar_type'), ('type_annotation', '#grammar_type')],
+                         [(use['rule'], use['href']) for use in entry['uses']])
+        self.assertEqual(dict(definitions=[], uses=[]), lookup(index, 'missing'))
+
+        # every location points at its line of the EBNF
+        with open(index) as f:
+            names = list(json.load(f)['rules'])
+        for name in names:
+            entry = lookup(index, name)
+            for definition in entry['definitions']:
+                self.assertTrue(self.line(output, definition).startswith(f'{name} = '))
+            for use in entry['uses']:
+                line = self.line(output, use)
+                self.assertTrue(line.startswith(f'{use["rule"]} = '))
+                self.assertIn(name, line.split(' = ', 1)[1])
+
+    def test_sqlite_and_streaming(self):
+        output = self.convert('-s', 'GRAMMAR_XREF=xref.json')
+        with open(os.path.join(output, 'xref.json')) as f:
+            rules = json.load(f)['rules']
+        output = self.convert('-s', 'GRAMMAR_XREF=xref.sqlite', '-s', 'GRAMMAR_STREAMING=1')
+        index = os.path.join(output, 'xref.sqlite')
+        for name, entry in rules.items():
+            self.assertEqual(entry, lookup(index, name))
+
+        with redirect_stdout(io.StringIO()) as stdout:
+            self.assertEqual(0, xref_main([index, 'array_type']))
+            self.assertEqual(1, xref_main([index, 'missing']))
+        self.assertIn('defined at types/array-type.ebnf:3', stdout.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()